@@ -0,0 +1,74 @@
+"""JSON -> JSONB for degree_plans / profiles, with GIN indexes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Older databases have a mix of json columns and the one jsonb column added
+by migrate_courses_data.py. Converting them all to jsonb enables the
+containment (@>) and jsonpath (@@) queries used by /api/history/search
+and the cohort analytics.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = {
+    "degree_plans": [
+        "semesters", "completed_courses", "priority_courses",
+        "semester_difficulty", "risk_analysis", "courses_data",
+    ],
+    "profiles": ["goals", "preferences"],
+}
+
+# (name, table, column, operator class); semesters is searched with
+# jsonpath wildcards, which jsonb_path_ops can't index
+GIN_INDEXES = [
+    ("ix_degree_plans_semesters_gin", "degree_plans", "semesters", None),
+    ("ix_degree_plans_completed_courses_gin", "degree_plans", "completed_courses", "jsonb_path_ops"),
+    ("ix_degree_plans_priority_courses_gin", "degree_plans", "priority_courses", "jsonb_path_ops"),
+    ("ix_degree_plans_courses_data_gin", "degree_plans", "courses_data", "jsonb_path_ops"),
+    ("ix_profiles_goals_gin", "profiles", "goals", "jsonb_path_ops"),
+    ("ix_profiles_preferences_gin", "profiles", "preferences", "jsonb_path_ops"),
+]
+
+
+def _alter_type(type_name: str) -> None:
+    for table, columns in JSON_COLUMNS.items():
+        for column in columns:
+            # Column defaults are typed too, so drop and restore them around the cast
+            op.execute(f"""
+                DO $$
+                DECLARE column_default text;
+                BEGIN
+                    SELECT pg_get_expr(d.adbin, d.adrelid) INTO column_default
+                    FROM pg_attrdef d
+                    JOIN pg_attribute a ON a.attrelid = d.adrelid AND a.attnum = d.adnum
+                    WHERE d.adrelid = '{table}'::regclass AND a.attname = '{column}';
+
+                    ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT;
+                    ALTER TABLE {table} ALTER COLUMN {column} TYPE {type_name} USING {column}::{type_name};
+                    IF column_default IS NOT NULL THEN
+                        EXECUTE format(
+                            'ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT (%s)::{type_name}',
+                            regexp_replace(column_default, '::jsonb?$', '')
+                        );
+                    END IF;
+                END $$;
+            """)
+
+
+def upgrade() -> None:
+    _alter_type("jsonb")
+    for name, table, column, opclass in GIN_INDEXES:
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} {opclass or ''})")
+
+
+def downgrade() -> None:
+    for name, _, _, _ in GIN_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    _alter_type("json")
@@ -0,0 +1,98 @@
+"""Materialized views for cohort analytics
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+Per-course and per-risk-level aggregates over degree_plans, read by
+/api/analytics/cohort. The SQL is a frozen copy of COURSE_STATS_SQL /
+RISK_STATS_SQL in app/services/cohort_analytics_service.py. The unique
+indexes allow REFRESH MATERIALIZED VIEW CONCURRENTLY.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+COURSE_STATS_SQL = r"""
+SELECT
+    coalesce(p.degree_program, '') AS degree_program,
+    pc.code AS course_code,
+    count(*) FILTER (WHERE pc.scheduled OR pc.unscheduled) AS plans,
+    count(*) FILTER (WHERE pc.scheduled) AS scheduled_plans,
+    coalesce(sum(pc.semester), 0) AS semester_sum,
+    count(pc.semester) AS semester_count,
+    count(*) FILTER (WHERE pc.unscheduled) AS unscheduled_plans,
+    count(*) FILTER (WHERE pc.bottleneck) AS bottleneck_plans,
+    count(*) FILTER (WHERE (pc.scheduled OR pc.unscheduled) AND p.risk_analysis ->> 'graduation_risk' = 'Delayed') AS delayed_plans,
+    count(*) FILTER (WHERE (pc.scheduled OR pc.unscheduled) AND p.risk_analysis ->> 'burnout_risk' = 'Low') AS burnout_low,
+    count(*) FILTER (WHERE (pc.scheduled OR pc.unscheduled) AND p.risk_analysis ->> 'burnout_risk' = 'Medium') AS burnout_medium,
+    count(*) FILTER (WHERE (pc.scheduled OR pc.unscheduled) AND p.risk_analysis ->> 'burnout_risk' = 'High') AS burnout_high
+FROM degree_plans p
+-- Grouped per plan, so the outer aggregate needs no join or sort over all plan courses
+CROSS JOIN LATERAL (
+    -- Unscheduled: in the plan's course list, but neither scheduled nor completed
+    SELECT code, min(semester) AS semester, bool_or(scheduled) AS scheduled,
+           bool_or(listed) AND NOT bool_or(scheduled) AND NOT bool_or(completed) AS unscheduled,
+           bool_or(bottleneck) AS bottleneck
+    FROM (
+        SELECT c.code, substring(s.key FROM '(\d+)$')::int AS semester,
+               true AS scheduled, false AS listed, false AS completed, false AS bottleneck
+        FROM jsonb_each(CASE WHEN jsonb_typeof(p.semesters) = 'object' THEN p.semesters ELSE '{}' END) s
+        CROSS JOIN LATERAL jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(s.value) = 'array' THEN s.value ELSE '[]' END
+        ) c(code)
+        UNION ALL
+        SELECT d.course ->> 'code', NULL, false, true, false, false
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof(p.courses_data) = 'array' THEN p.courses_data ELSE '[]' END
+        ) d(course)
+        UNION ALL
+        SELECT c.code, NULL, false, false, true, false
+        FROM jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(p.completed_courses) = 'array' THEN p.completed_courses ELSE '[]' END
+        ) c(code)
+        UNION ALL
+        SELECT trim(b.code), NULL, false, false, false, true
+        FROM jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(p.risk_analysis -> 'risk_factors') = 'array'
+                 THEN p.risk_analysis -> 'risk_factors' ELSE '[]' END
+        ) f(factor)
+        CROSS JOIN LATERAL regexp_split_to_table(
+            substring(f.factor FROM '^Bottleneck courses \(many dependents\): (.+)$'), ','
+        ) b(code)
+    ) flags
+    WHERE code <> ''
+    GROUP BY code
+) pc
+GROUP BY 1, 2
+"""
+
+RISK_STATS_SQL = """
+SELECT
+    coalesce(degree_program, '') AS degree_program,
+    coalesce(risk_analysis ->> 'burnout_risk', 'Unknown') AS burnout_risk,
+    coalesce(risk_analysis ->> 'graduation_risk', 'Unknown') AS graduation_risk,
+    count(*) AS plans,
+    now() AS refreshed_at
+FROM degree_plans
+GROUP BY 1, 2, 3
+"""
+
+
+def upgrade() -> None:
+    op.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS plan_course_stats AS {COURSE_STATS_SQL}")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_plan_course_stats ON plan_course_stats (degree_program, course_code)")
+    op.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS plan_risk_stats AS {RISK_STATS_SQL}")
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_plan_risk_stats "
+        "ON plan_risk_stats (degree_program, burnout_risk, graduation_risk)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS plan_risk_stats")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS plan_course_stats")
@@ -0,0 +1,39 @@
+"""Per-user rolling chat memory
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+Summaries of older Study Buddy / profile chat turns, written by the
+background summarizer in app/services/chat_session_service.py and loaded
+into new chat sessions of the same user.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() creates the table and its index on startup, possibly before this runs
+    if not sa.inspect(op.get_bind()).has_table("chat_memories"):
+        op.create_table(
+            "chat_memories",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("kind", sa.String(50), nullable=False),
+            sa.Column("summary", sa.Text(), nullable=False, server_default=""),
+            sa.Column("summarized_turns", sa.Integer(), server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.UniqueConstraint("user_id", "kind", name="uq_chat_memories_user_kind"),
+        )
+    op.create_index("ix_chat_memories_id", "chat_memories", ["id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chat_memories_id", table_name="chat_memories")
+    op.drop_table("chat_memories")
@@ -0,0 +1,49 @@
+"""Background job queue
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+
+Queued long-running AI requests (/api/jobs/*). Workers claim jobs with
+SELECT ... FOR UPDATE SKIP LOCKED on (status, created_at); finished jobs
+are deleted once expires_at passes.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # init_db() creates the table and its indexes on startup, possibly before this runs
+    if not sa.inspect(op.get_bind()).has_table("jobs"):
+        op.create_table(
+            "jobs",
+            sa.Column("id", sa.String(32), primary_key=True),
+            sa.Column("kind", sa.String(50), nullable=False),
+            sa.Column("status", sa.String(20), nullable=False, server_default="queued"),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=True),
+            sa.Column("payload", postgresql.JSONB(), nullable=False),
+            sa.Column("result", postgresql.JSONB(), nullable=True),
+            sa.Column("error", sa.Text(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("callback_url", sa.String(500), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+            sa.Column("started_at", sa.DateTime(), nullable=True),
+            sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+            sa.Column("finished_at", sa.DateTime(), nullable=True),
+            sa.Column("expires_at", sa.DateTime(), nullable=True),
+        )
+    op.create_index("ix_jobs_status_created_at", "jobs", ["status", "created_at"], if_not_exists=True)
+    op.create_index("ix_jobs_expires_at", "jobs", ["expires_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_jobs_expires_at", table_name="jobs")
+    op.drop_index("ix_jobs_status_created_at", table_name="jobs")
+    op.drop_table("jobs")
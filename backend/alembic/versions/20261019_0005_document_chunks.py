@@ -0,0 +1,45 @@
+"""pgvector document chunks for retrieval
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+
+Embedded chunks of uploaded documents for RETRIEVAL_BACKEND=pgvector,
+ranked with the <=> cosine distance. The unique (document_id, model,
+chunk_index) index also serves the per-document searches (a document's
+chunks are ranked exactly, no ANN index). The embedding column has no
+fixed dimension, so switching OLLAMA_EMBEDDING_MODEL needs no migration
+(rows are kept per model). Skipped on databases other than Postgres.
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS document_chunks (
+            id BIGSERIAL PRIMARY KEY,
+            document_id VARCHAR(64) NOT NULL,
+            model VARCHAR(100) NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            filename VARCHAR(255),
+            content TEXT NOT NULL,
+            embedding vector NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            UNIQUE (document_id, model, chunk_index)
+        )
+    """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP TABLE IF EXISTS document_chunks")
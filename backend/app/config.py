@@ -1,7 +1,7 @@
 """Application configuration using Pydantic settings."""
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List
+from typing import Any, Dict, List
 
 
 class Settings(BaseSettings):
@@ -14,6 +14,118 @@ class Settings(BaseSettings):
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "llama3.1:8b"
     
+    # Ollama backend pool: JSON list of base URLs (replaces ollama_base_url when
+    # set), optional weights per URL, routing ("least_outstanding" or
+    # "weighted"), health-check interval, and passive ejection of a backend
+    # for ollama_eject_seconds after consecutive failed calls
+    ollama_backends: List[str] = []
+    ollama_backend_weights: Dict[str, float] = {}
+    ollama_routing: str = "least_outstanding"
+    ollama_health_check_seconds: float = 15.0
+    ollama_eject_after_failures: int = 3
+    ollama_eject_seconds: float = 30.0
+    
+    # Ollama runtime options (num_thread 0 = physical cores of this host)
+    ollama_num_thread: int = 0
+    ollama_num_gpu: int = 99
+    
+    # LLM circuit breaker: opens when, over the last llm_breaker_window_seconds
+    # (and at least llm_breaker_min_calls calls), the share of failed or slow
+    # calls reaches llm_breaker_failure_rate. While open, AI calls return their
+    # fallback at once; after llm_breaker_open_seconds, trial calls go through,
+    # and a probe every llm_breaker_probe_seconds closes it once Ollama is back
+    llm_breaker_window_seconds: float = 60.0
+    llm_breaker_min_calls: int = 5
+    llm_breaker_failure_rate: float = 0.5
+    llm_breaker_slow_call_seconds: float = 90.0
+    llm_breaker_open_seconds: float = 30.0
+    llm_breaker_half_open_calls: int = 1
+    llm_breaker_probe_seconds: float = 10.0
+    
+    # Ollama option profiles per task: num_ctx, num_predict, temperature, stop.
+    # Keys a profile leaves out come from "default"; override as JSON in .env
+    ollama_profiles: Dict[str, Dict[str, Any]] = {
+        "default": {"num_ctx": 8192, "num_predict": 4096, "temperature": 0.4},
+        "brief": {"num_ctx": 4096, "num_predict": 512},
+        "chat": {"num_ctx": 4096, "num_predict": 768, "temperature": 0.5, "stop": ["\nUSER:", "\nUSER MESSAGE:"]},
+        "study_plan": {"num_ctx": 4096, "num_predict": 2048},
+        "revision": {"num_ctx": 4096, "num_predict": 1536},
+        "document": {"num_ctx": 8192, "num_predict": 1024, "temperature": 0.3},
+        "explain": {"num_ctx": 4096, "num_predict": 1024, "temperature": 0.3},
+        "questions": {"num_ctx": 8192, "num_predict": 3072, "temperature": 0.5},
+        "grading": {"num_ctx": 8192, "num_predict": 2048, "temperature": 0.2},
+        "grading_batch": {"num_ctx": 8192, "num_predict": 4096, "temperature": 0.2},
+        "summary": {"num_ctx": 4096, "num_predict": 384, "temperature": 0.2},
+    }
+    
+    # Prompt-eval speed assumed by the token report until Ollama reports timings
+    ollama_prompt_eval_tokens_per_sec: float = 1500.0
+    
+    # Server-side chat sessions (Study Buddy / profile): LRU size, idle expiry,
+    # transcript token cap, and how long Ollama keeps the model (and its prompt
+    # cache) loaded between turns
+    chat_session_max: int = 1000
+    chat_session_idle_seconds: int = 1800
+    chat_session_max_tokens: int = 2048
+    chat_session_keep_alive: str = "10m"
+    
+    # Rolling chat memory: transcripts over this many tokens get their older
+    # turns summarized in the background, once no foreground Ollama call has
+    # been running for the idle delay; the summary is stored per user
+    chat_summary_trigger_tokens: int = 1024
+    chat_summary_idle_delay: float = 0.5
+    
+    # Retrieval over uploaded study material: documents are split into chunks
+    # of about retrieval_chunk_tokens, embedded with ollama_embedding_model and
+    # stored in a "numpy" index (memory-mapped files in retrieval_index_dir) or
+    # "pgvector" (document_chunks table); prompts carry the top-k chunks
+    ollama_embedding_model: str = "nomic-embed-text"
+    retrieval_backend: str = "numpy"
+    retrieval_index_dir: str = "data/retrieval_index"
+    retrieval_chunk_tokens: int = 200
+    retrieval_chunk_overlap_tokens: int = 40
+    retrieval_top_k: int = 4
+    
+    # Answer grading micro-batches (/api/practice/evaluate, short / long
+    # answers): requests arriving within the window share one LLM call of
+    # at most grading_batch_max_requests requests (0 seconds = no batching)
+    grading_batch_window_seconds: float = 0.3
+    grading_batch_max_requests: int = 8
+    
+    # Background jobs (/api/jobs): workers per API process (0 = none here),
+    # poll interval for jobs submitted by other processes, how long results
+    # are kept, heartbeat interval, and when a running job counts as
+    # abandoned and is run again from the start (up to job_max_attempts runs)
+    job_workers: int = 2
+    job_poll_seconds: float = 1.0
+    job_result_ttl_seconds: int = 86400
+    job_heartbeat_seconds: float = 10.0
+    job_stale_seconds: float = 60.0
+    job_max_attempts: int = 3
+    # Webhook hosts allowed for callback_url (empty = any public address;
+    # listed hosts may also be internal)
+    job_webhook_allowed_hosts: List[str] = []
+    
+    # Planner worker pool (0 = one process per CPU core)
+    planner_workers: int = 0
+    
+    # Stored catalogs kept compiled in memory
+    catalog_cache_size: int = 32
+    
+    # Bulk course import (rows per INSERT, and row count that switches to COPY)
+    course_import_chunk_size: int = 500
+    course_import_copy_threshold: int = 5000
+    
+    # Prerequisite graph layouts kept in memory (one per catalog + settings)
+    graph_layout_cache_size: int = 16
+    
+    # Cohort analytics materialized views refresh interval (0 = never)
+    cohort_analytics_refresh_seconds: int = 600
+    
+    # Authenticated-user cache (per worker)
+    user_cache_ttl_seconds: int = 60
+    user_cache_size: int = 10000
+    
     # CORS
     cors_origins: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000", "*"]
     
@@ -1,4 +1,6 @@
 """Database configuration with SQLAlchemy async support."""
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.pool import NullPool
@@ -25,6 +27,10 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+# JSONB on Postgres (indexable, supports containment), plain JSON elsewhere
+JSONBType = JSON().with_variant(JSONB(), "postgresql")
+
+
 class Base(DeclarativeBase):
     """Base class for all SQLAlchemy models."""
     pass
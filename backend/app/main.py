@@ -13,7 +13,14 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
 from app.database import init_db
-from app.routers import courses_router, planner_router, ai_router, auth_router, revision_router, history_router, manual_entry_router, practice_router
+from app.services.batch_planner_service import batch_planner_service
+from app.services.chat_session_service import chat_session_service
+from app.services.cohort_analytics_service import cohort_analytics_service
+from app.services.course_cache_service import course_cache_service
+from app.services.job_queue_service import job_queue_service
+from app.services.ollama_service import ollama_service
+from app.services.token_accounting_service import RouteContextMiddleware
+from app.routers import courses_router, planner_router, ai_router, auth_router, revision_router, history_router, manual_entry_router, practice_router, catalogs_router, analytics_router, jobs_router
 
 settings = get_settings()
 
@@ -24,8 +31,21 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Degree Planner API...")
     await init_db()
     print("✅ Database initialized")
+    course_cache_service.start_listener()
+    cohort_analytics_service.start_refresher()
+    chat_session_service.start_summarizer(ollama_service.summarize_conversation)
+    ollama_service.pool.start_health_checks(ollama_service.check_connection)
+    ollama_service.breaker.start_probe(ollama_service.probe)
+    job_queue_service.start_workers()
     yield
     print("👋 Shutting down...")
+    await course_cache_service.stop_listener()
+    await cohort_analytics_service.stop_refresher()
+    await job_queue_service.stop_workers()
+    await chat_session_service.stop_summarizer()
+    await ollama_service.pool.stop_health_checks()
+    await ollama_service.breaker.stop_probe()
+    batch_planner_service.shutdown()
 
 
 app = FastAPI(
@@ -59,6 +79,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Lets token accounting book Ollama calls under the route that made them
+app.add_middleware(RouteContextMiddleware)
+
 # Include routers
 app.include_router(courses_router, prefix="/api")
 app.include_router(planner_router, prefix="/api")
@@ -68,6 +91,9 @@ app.include_router(revision_router, prefix="/api")  # /api/revision/*
 app.include_router(history_router, prefix="/api")  # /api/history/*
 app.include_router(manual_entry_router, prefix="/api")  # /api/manual-entry/*
 app.include_router(practice_router, prefix="/api")  # /api/practice/*
+app.include_router(catalogs_router, prefix="/api")  # /api/catalogs/*
+app.include_router(analytics_router, prefix="/api")  # /api/analytics/*
+app.include_router(jobs_router, prefix="/api")  # /api/jobs/*
 
 
 @app.get("/")
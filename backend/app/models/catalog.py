@@ -0,0 +1,37 @@
+"""Versioned course catalog database model."""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import String, Integer, DateTime, JSON, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+
+class CatalogVersion(Base):
+    """
+    One immutable version of a named course catalog.
+    
+    Plan and AI requests reference (catalog_id, version) instead of
+    re-uploading the course list on every call.
+    """
+    
+    __tablename__ = "catalog_versions"
+    __table_args__ = (UniqueConstraint("catalog_id", "version", name="uq_catalog_version"),)
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    catalog_id: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    
+    # Same shape as CourseInput: [{"code", "name", "credits", "prerequisites", "difficulty"}]
+    courses: Mapped[List[Dict[str, Any]]] = mapped_column(JSON, nullable=False)
+    course_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    source: Mapped[str] = mapped_column(String(50), default="upload")  # upload/courses_table
+    
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    
+    def __repr__(self) -> str:
+        return f"<CatalogVersion {self.catalog_id}@{self.version}>"
@@ -1,7 +1,7 @@
 """Course database model."""
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy import String, Integer, DateTime, JSON, Text
+from sqlalchemy import String, Integer, DateTime, JSON, Text, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.database import Base
@@ -26,3 +26,23 @@ class Course(Base):
     
     def __repr__(self) -> str:
         return f"<Course {self.code}: {self.name}>"
+
+
+class CoursePrerequisite(Base):
+    """
+    One prerequisite edge: course_code requires prerequisite_code.
+    
+    Mirrors Course.prerequisites so graph queries (ancestors / descendants)
+    can run as recursive CTEs. prerequisite_code has no foreign key because
+    catalogs may reference courses that aren't in the table.
+    """
+    
+    __tablename__ = "course_prerequisites"
+    
+    course_code: Mapped[str] = mapped_column(
+        String(20), ForeignKey("courses.code", ondelete="CASCADE"), primary_key=True
+    )
+    prerequisite_code: Mapped[str] = mapped_column(String(20), primary_key=True, index=True)
+    
+    def __repr__(self) -> str:
+        return f"<CoursePrerequisite {self.course_code} -> {self.prerequisite_code}>"
@@ -0,0 +1,40 @@
+"""Background job database model."""
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import String, Integer, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base, JSONBType
+
+
+class Job(Base):
+    """A queued long-running AI request (see job_queue_service)."""
+    
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim the oldest queued job; the reaper scans running / expired ones
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+        Index("ix_jobs_expires_at", "expires_at"),
+    )
+    
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)  # analyze-plan/career-advice/generate-courses
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")  # queued/running/succeeded/failed
+    user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    
+    # Request body, and the response body once done
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSONBType, nullable=False)
+    result: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONBType, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    callback_url: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # Refreshed while running
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)  # Result kept until then
+    
+    def __repr__(self) -> str:
+        return f"<Job {self.id}: {self.kind} {self.status}>"
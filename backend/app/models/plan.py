@@ -1,33 +1,43 @@
 """Degree Plan database model."""
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from sqlalchemy import String, Integer, DateTime, JSON, Text, ForeignKey
+from sqlalchemy import String, Integer, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Base
+from app.database import Base, JSONBType
 
 
 class DegreePlan(Base):
     """Saved degree plan model."""
     
     __tablename__ = "degree_plans"
+    __table_args__ = (
+        # semesters is queried with jsonpath wildcards ($.*[*]), which only jsonb_ops indexes
+        Index("ix_degree_plans_semesters_gin", "semesters", postgresql_using="gin"),
+        Index("ix_degree_plans_completed_courses_gin", "completed_courses",
+              postgresql_using="gin", postgresql_ops={"completed_courses": "jsonb_path_ops"}),
+        Index("ix_degree_plans_priority_courses_gin", "priority_courses",
+              postgresql_using="gin", postgresql_ops={"priority_courses": "jsonb_path_ops"}),
+        Index("ix_degree_plans_courses_data_gin", "courses_data",
+              postgresql_using="gin", postgresql_ops={"courses_data": "jsonb_path_ops"}),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False, default="My Degree Plan")
     
     # Plan structure: {"semester_1": ["CS101", "MA101"], "semester_2": [...]}
-    semesters: Mapped[Dict[str, List[str]]] = mapped_column(JSON, nullable=False)
+    semesters: Mapped[Dict[str, List[str]]] = mapped_column(JSONBType, nullable=False)
     
     # Input parameters used to generate plan
-    completed_courses: Mapped[List[str]] = mapped_column(JSON, default=list)
-    priority_courses: Mapped[List[str]] = mapped_column(JSON, default=list)
+    completed_courses: Mapped[List[str]] = mapped_column(JSONBType, default=list)
+    priority_courses: Mapped[List[str]] = mapped_column(JSONBType, default=list)
     max_courses_per_semester: Mapped[int] = mapped_column(Integer, default=5)
     total_semesters: Mapped[int] = mapped_column(Integer, default=6)
     
     # Analysis results
-    semester_difficulty: Mapped[Dict[str, str]] = mapped_column(JSON, default=dict)
-    risk_analysis: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True)
+    semester_difficulty: Mapped[Dict[str, str]] = mapped_column(JSONBType, default=dict)
+    risk_analysis: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSONBType, nullable=True)
     career_alignment_notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     advisor_explanation: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
@@ -36,7 +46,7 @@ class DegreePlan(Base):
     career_goal: Mapped[Optional[str]] = mapped_column(String(200), nullable=True)
     
     # Full course data for complete restoration
-    courses_data: Mapped[List[Dict[str, Any]]] = mapped_column(JSON, default=list)
+    courses_data: Mapped[List[Dict[str, Any]]] = mapped_column(JSONBType, default=list)
     data_source: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)  # demo/uploaded/manual
     
     # Metadata
@@ -1,10 +1,10 @@
 """
 User and Profile Database Models.
 """
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, JSONBType
 
 
 class User(Base):
@@ -25,6 +25,12 @@ class User(Base):
 class Profile(Base):
     """User profile model for degree planning."""
     __tablename__ = "profiles"
+    __table_args__ = (
+        Index("ix_profiles_goals_gin", "goals",
+              postgresql_using="gin", postgresql_ops={"goals": "jsonb_path_ops"}),
+        Index("ix_profiles_preferences_gin", "preferences",
+              postgresql_using="gin", postgresql_ops={"preferences": "jsonb_path_ops"}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
@@ -36,10 +42,25 @@ class Profile(Base):
     academic_year = Column(String(50), nullable=True)
     
     # Flexible JSON fields
-    goals = Column(JSON, default=list)
-    preferences = Column(JSON, default=dict)
+    goals = Column(JSONBType, default=list)
+    preferences = Column(JSONBType, default=dict)
     
     completed_onboarding = Column(Boolean, default=False)
     
     # Relationship back to User
     user = relationship("User", back_populates="profile")
+
+
+class ChatMemory(Base):
+    """Rolling summary of a user's older chat turns, per chat kind."""
+    __tablename__ = "chat_memories"
+    __table_args__ = (
+        UniqueConstraint("user_id", "kind", name="uq_chat_memories_user_kind"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(50), nullable=False)  # "study_buddy", "profile"
+    summary = Column(Text, nullable=False, default="")
+    summarized_turns = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
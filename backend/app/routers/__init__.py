@@ -7,6 +7,9 @@ from app.routers.revision import router as revision_router
 from app.routers.history import router as history_router
 from app.routers.manual_entry import router as manual_entry_router
 from app.routers.practice import router as practice_router
+from app.routers.catalogs import router as catalogs_router
+from app.routers.analytics import router as analytics_router
+from app.routers.jobs import router as jobs_router
 
 __all__ = [
     "courses_router", 
@@ -16,6 +19,9 @@ __all__ = [
     "revision_router",
     "history_router",
     "manual_entry_router",
-    "practice_router"
+    "practice_router",
+    "catalogs_router",
+    "analytics_router",
+    "jobs_router"
 ]
 
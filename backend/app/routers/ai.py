@@ -14,9 +14,15 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
+from app.models.user import User
+from app.utils.security import get_current_user_optional
 
 from app.services.ollama_service import ollama_service
+from app.services.chat_session_service import chat_session_service
+from app.services.retrieval_service import retrieval_service
 from app.services.planner_service import planner_service
+from app.services.catalog_service import catalog_service
+from app.services.token_accounting_service import token_accounting_service
 from app.schemas.plan import (
     AIAnalyzeRequest,
     AIExplanation,
@@ -39,17 +45,23 @@ router = APIRouter(prefix="/ai", tags=["AI Features (Local Ollama)"])
 
 
 @router.post("/analyze-plan", response_model=AIExplanation)
-async def analyze_plan(request: AIAnalyzeRequest):
+async def analyze_plan(request: AIAnalyzeRequest, db: AsyncSession = Depends(get_db)):
     """
     Analyze a degree plan using LOCAL AI.
     
     CRITICAL: Analysis uses ONLY the courses in the provided plan.
     """
+    catalog = await catalog_service.resolve(db, request.catalog_id, request.catalog_version)
+    if catalog is not None:
+        courses = catalog.course_dicts
+    else:
+        courses = [c.model_dump() for c in request.courses] if request.courses else None
+    
     try:
         result = await ollama_service.analyze_plan(
             degree_plan=request.degree_plan,
             career_goal=request.career_goal,
-            courses=[c.model_dump() for c in request.courses] if request.courses else None
+            courses=courses
         )
         
         # Map ALL fields from Ollama response to schema
@@ -105,16 +117,22 @@ async def analyze_plan(request: AIAnalyzeRequest):
 
 
 @router.post("/career-advice", response_model=CareerAdviceResponse)
-async def get_career_advice(request: CareerAdviceRequest):
+async def get_career_advice(request: CareerAdviceRequest, db: AsyncSession = Depends(get_db)):
     """
     Get career-aligned course recommendations.
     
-    CRITICAL: Only recommends courses from the available_courses list.
+    CRITICAL: Only recommends courses from the available_courses list
+    (or the stored catalog when catalog_id is given).
     """
+    available_courses = request.available_courses
+    catalog = await catalog_service.resolve(db, request.catalog_id, request.catalog_version)
+    if catalog is not None:
+        available_courses = [f"{c.code}: {c.name}" for c in catalog.courses]
+    
     try:
         result = await ollama_service.get_career_advice(
             career_goal=request.career_goal,
-            available_courses=request.available_courses,
+            available_courses=available_courses,
             completed_courses=request.completed_courses
         )
         
@@ -177,7 +195,7 @@ async def assess_burnout_risk(request: BurnoutAssessRequest):
 
 
 @router.post("/simulate-failure", response_model=FailureSimulationResponse)
-async def simulate_failure(request: FailureSimulationRequest):
+async def simulate_failure(request: FailureSimulationRequest, db: AsyncSession = Depends(get_db)):
     """
     Simulate course failures and generate recovery plan.
     
@@ -186,6 +204,10 @@ async def simulate_failure(request: FailureSimulationRequest):
     - How long graduation is delayed
     - Minimum-impact recovery path
     """
+    catalog = await catalog_service.resolve(db, request.catalog_id, request.catalog_version)
+    catalog_courses = catalog.courses if catalog is not None else request.courses
+    course_map = {c.code: c for c in catalog_courses}
+    
     try:
         # Remove failed courses from completed
         adjusted_completed = [
@@ -195,7 +217,7 @@ async def simulate_failure(request: FailureSimulationRequest):
         
         # Generate new plan with failures accounted for
         new_request = PlanGenerateRequest(
-            courses=request.courses,
+            courses=catalog_courses,
             completed_courses=adjusted_completed,
             remaining_semesters=request.remaining_semesters,
             max_courses_per_semester=request.max_courses_per_semester,
@@ -206,7 +228,9 @@ async def simulate_failure(request: FailureSimulationRequest):
             }
         )
         
-        recovery_result = planner_service.generate_plan(new_request)
+        recovery_result = planner_service.generate_plan(
+            new_request, catalog=catalog.compiled if catalog is not None else None
+        )
         
         # Calculate affected courses (dependents of failed courses)
         affected = []
@@ -214,10 +238,7 @@ async def simulate_failure(request: FailureSimulationRequest):
             # Any course in the original plan that depends on the failed course
             for sem, courses in request.degree_plan.items():
                 for course in courses:
-                    course_data = next(
-                        (c for c in request.courses if c.code == course), 
-                        None
-                    )
+                    course_data = course_map.get(course)
                     if course_data and failed in course_data.prerequisites:
                         affected.append(course)
         
@@ -284,9 +305,13 @@ async def generate_revision(request: RevisionRequest):
 
 
 @router.post("/study-buddy", response_model=StudyBuddyResponse)
-async def get_study_support(request: StudyBuddyRequest):
+async def get_study_support(
+    request: StudyBuddyRequest,
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
     """
     Get behavioral or academic support from AI Study Buddy.
+    Signed-in users get their chat memory kept across sessions.
     """
     try:
         result = await ollama_service.get_study_support(
@@ -296,7 +321,9 @@ async def get_study_support(request: StudyBuddyRequest):
             planned_tasks=request.planned_tasks,
             mode=request.mode,
             message=request.message,
-            history=request.history
+            history=request.history,
+            session_id=request.session_id,
+            owner=current_user.id if current_user else None
         )
         return result
     except Exception as e:
@@ -312,10 +339,38 @@ async def ai_health_check():
         "ollama_available": is_connected,
         "model": ollama_service.model,
         "base_url": ollama_service.base_url,
-        "status": "ready" if is_connected else "offline"
+        "status": "ready" if is_connected else "offline",
+        "circuit_breaker": ollama_service.breaker.state,
+        "backends": ollama_service.pool.info(),
+        "structured_output": ollama_service.json_stats,
+        "grading_batches": ollama_service.grading_batcher.info(),
+        "retrieval": await retrieval_service.info(),
+        "chat_sessions": chat_session_service.info()
     }
 
 
+@router.get("/breaker")
+async def ai_breaker_state():
+    """
+    State of the circuit breaker around Ollama.
+    
+    While "open", AI endpoints skip Ollama and answer with their fallback
+    responses right away; "half_open" lets trial calls through.
+    """
+    return ollama_service.breaker.info()
+
+
+@router.get("/token-report")
+async def ai_token_report():
+    """
+    Prompt vs completion tokens per route since startup.
+    
+    prompt_eval_ms_saved estimates the prompt-eval time the mode-specific
+    system prompts saved against sending the full prompt on every call.
+    """
+    return token_accounting_service.report()
+
+
 class GenerateCoursesRequest(BaseModel):
     """Request for generating degree-specific courses."""
     degree_name: str
@@ -369,6 +424,7 @@ async def generate_degree_courses(request: GenerateCoursesRequest):
 # Need to import authentication dependency
 from app.routers.auth import get_current_user
 from app.models.user import User, Profile
+from app.services.user_cache_service import user_cache_service
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 
@@ -413,7 +469,9 @@ async def get_profile_intelligence(
             current_profile=current_profile_dict,
             message=request.message,
             history=request.history,
-            auth_action=request.auth_action
+            auth_action=request.auth_action,
+            session_id=request.session_id,
+            owner=current_user.id
         )
         
         # 3. Update DB if suggestions exist
@@ -437,6 +495,7 @@ async def get_profile_intelligence(
             
         await db.commit()
         await db.refresh(db_profile)
+        user_cache_service.invalidate(current_user.email)
         
         return ai_result
         
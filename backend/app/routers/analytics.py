@@ -0,0 +1,43 @@
+"""
+Analytics Router - Cohort statistics across saved degree plans.
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.schemas.analytics import CohortAnalyticsResponse, CohortSort
+from app.services.cohort_analytics_service import cohort_analytics_service
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+@router.get("/cohort", response_model=CohortAnalyticsResponse)
+async def get_cohort_analytics(
+    degree_program: Optional[str] = Query(None, description="Only plans for this degree program ('' = plans without one)"),
+    sort: CohortSort = Query("frequency"),
+    limit: int = Query(50, ge=1, le=1000),
+    min_plans: int = Query(1, ge=1, description="Hide courses seen in fewer plans"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Which courses most often end up unscheduled, flagged as bottlenecks or
+    in delayed plans, across every saved plan.
+    
+    - **frequency**: share of plans containing the course
+    - **avg_semester**: mean semester the course is placed in
+    - **unscheduled_rate**: share of those plans where it couldn't be scheduled
+    - **bottleneck_rate**: share of all plans flagging it as a bottleneck
+    
+    On Postgres this reads materialized views (`alembic upgrade head`)
+    refreshed every few minutes; see `refreshed_at`.
+    """
+    try:
+        return await cohort_analytics_service.get_cohort(
+            db, degree_program=degree_program, sort=sort, limit=limit, min_plans=min_plans
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Cohort analytics failed: {str(e)}"
+        )
@@ -18,6 +18,7 @@ from app.utils.security import (
     get_current_user,
     oauth2_scheme
 )
+from app.services.user_cache_service import user_cache_service
 import uuid
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -95,7 +96,7 @@ async def login(
         )
     
     # Create access token
-    access_token = create_access_token(subject=user.email)
+    access_token = create_access_token(subject=user.email, user=user)
     
     return Token(access_token=access_token, token_type="bearer")
 
@@ -119,6 +120,7 @@ async def social_login(
              existing_user.provider = request.provider
              existing_user.provider_id = request.provider_id
              await db.commit()
+             user_cache_service.invalidate(existing_user.email)
     else:
         # 2. Create new user
         # We don't have a password for social users
@@ -143,7 +145,7 @@ async def social_login(
         existing_user = new_user
 
     # 3. Issue App JWT
-    access_token = create_access_token(subject=existing_user.email)
+    access_token = create_access_token(subject=existing_user.email, user=existing_user)
     
     return Token(access_token=access_token, token_type="bearer")
 
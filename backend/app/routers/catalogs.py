@@ -0,0 +1,143 @@
+"""Stored, versioned course catalog API router."""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Path, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.schemas.catalog import (
+    CatalogCreateRequest,
+    CatalogVersionResponse,
+    CatalogVersionDetail,
+    CatalogListResponse,
+)
+from app.services.catalog_service import catalog_service
+from app.models.user import User
+from app.utils.security import get_current_user
+
+router = APIRouter(prefix="/catalogs", tags=["Catalogs"])
+
+CatalogId = Path(..., min_length=1, max_length=100, pattern=r"^[A-Za-z0-9_.-]+$")
+
+
+def _version_response(row, issues=None) -> CatalogVersionResponse:
+    return CatalogVersionResponse(
+        catalog_id=row.catalog_id,
+        version=row.version,
+        course_count=row.course_count,
+        content_hash=row.content_hash,
+        source=row.source,
+        created_at=row.created_at,
+        issues=issues or [],
+    )
+
+
+@router.get("", response_model=CatalogListResponse)
+async def list_catalogs(db: AsyncSession = Depends(get_db)):
+    """List the latest version of every stored catalog."""
+    rows = await catalog_service.list_latest(db)
+    return CatalogListResponse(
+        catalogs=[_version_response(row) for row in rows],
+        total=len(rows)
+    )
+
+
+@router.post("/{catalog_id}", response_model=CatalogVersionResponse, status_code=status.HTTP_201_CREATED)
+async def create_catalog_version(
+    request: CatalogCreateRequest,
+    response: Response,
+    catalog_id: str = CatalogId,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Store a new version of a named catalog (signed-in users only).
+
+    Only the user who stored a catalog's first version can add versions
+    to it; anyone else gets 403.
+
+    The catalog is validated once here (duplicates and prerequisite cycles
+    are rejected). Uploading the same courses as the latest version
+    returns that version with 200 instead of creating a new one.
+    """
+    try:
+        row, issues, created = await catalog_service.create_version(
+            db, catalog_id, request.courses,
+            user_id=current_user.id
+        )
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Catalog {catalog_id} was updated concurrently, please retry"
+        )
+
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return _version_response(row, issues)
+
+
+@router.post("/{catalog_id}/snapshot", response_model=CatalogVersionResponse, status_code=status.HTTP_201_CREATED)
+async def snapshot_course_table(
+    response: Response,
+    catalog_id: str = CatalogId,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Store the current courses table as the next version of a catalog (owner only)."""
+    try:
+        row, issues, created = await catalog_service.snapshot_courses_table(
+            db, catalog_id,
+            user_id=current_user.id
+        )
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except IntegrityError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Catalog {catalog_id} was updated concurrently, please retry"
+        )
+
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return _version_response(row, issues)
+
+
+@router.get("/{catalog_id}/versions", response_model=List[CatalogVersionResponse])
+async def list_catalog_versions(
+    catalog_id: str = CatalogId,
+    db: AsyncSession = Depends(get_db)
+):
+    """List all versions of a catalog, newest first."""
+    rows = await catalog_service.list_versions(db, catalog_id)
+    if not rows:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Catalog {catalog_id} not found"
+        )
+    return [_version_response(row) for row in rows]
+
+
+@router.get("/{catalog_id}", response_model=CatalogVersionDetail)
+async def get_catalog(
+    catalog_id: str = CatalogId,
+    version: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a catalog version with its courses (latest unless ?version= is given)."""
+    loaded = await catalog_service.resolve(db, catalog_id, version)
+    return CatalogVersionDetail(
+        catalog_id=loaded.catalog_id,
+        version=loaded.version,
+        course_count=len(loaded.courses),
+        content_hash=loaded.content_hash,
+        source=loaded.source,
+        created_at=loaded.created_at,
+        issues=loaded.compiled.issues or [],
+        courses=loaded.courses
+    )
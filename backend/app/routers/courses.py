@@ -1,6 +1,10 @@
 """Course management API router."""
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import shutil
+import tempfile
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -12,35 +16,140 @@ from app.schemas.course import (
     CourseResponse,
     CourseListResponse,
     CourseBulkImport,
+    CourseBulkImportResponse,
+    CourseSearchResponse,
+    CourseGraphResponse,
+    GraphLayoutRequest,
+    GraphLayoutResponse,
 )
+from app.schemas.plan import CourseInput
+from app.services.catalog_service import catalog_service
+from app.services.course_cache_service import course_cache_service
+from app.services.graph_layout_service import GraphLayout, graph_layout_service
+from app.services.planner_service import compile_catalog
+from app.services.course_import_service import course_import_service, read_course_file
+from app.services.course_search_service import SearchMode, course_search_service
+from app.services.prerequisite_graph_service import prerequisite_graph_service
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
 
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+
+def _cached_json(request: Request, body: bytes, etag: str, media_type: str = "application/json") -> Response:
+    """Serve pre-serialized JSON (or other bytes), or 304 if the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
 @router.get("", response_model=CourseListResponse)
-async def list_courses(db: AsyncSession = Depends(get_db)):
-    """Get all courses."""
-    result = await db.execute(select(Course).order_by(Course.code))
-    courses = result.scalars().all()
-    return CourseListResponse(
-        courses=[CourseResponse.model_validate(c) for c in courses],
-        total=len(courses)
+async def list_courses(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Get all courses.
+    
+    Served from an in-memory snapshot with an ETag; send it back as
+    If-None-Match to get 304 while the catalog is unchanged.
+    """
+    snapshot = await course_cache_service.get(db)
+    return _cached_json(request, snapshot.body, snapshot.etag)
+
+
+@router.get("/search", response_model=CourseSearchResponse)
+async def search_courses(
+    q: str = Query(..., min_length=1, max_length=100, description="Code, name or description text"),
+    mode: SearchMode = Query("auto", description="prefix, fuzzy (typo-tolerant), fulltext, or auto (any)"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search courses by code, name and description.
+    
+    Results are ranked: exact code, then code prefix, then text relevance
+    and trigram similarity. Uses Postgres pg_trgm / full-text indexes
+    (run migrate_course_search.py) with an in-memory fallback.
+    """
+    return await course_search_service.search(db, q.strip(), mode=mode, limit=limit, offset=offset)
+
+
+LayoutFormat = Literal["json", "binary"]
+
+
+def _layout_response(request: Request, layout: GraphLayout, format: str) -> Response:
+    if format == "binary":
+        return _cached_json(request, layout.binary_body, f'"{layout.catalog_hash[:32]}-bin"', "application/octet-stream")
+    return _cached_json(request, layout.json_body, f'"{layout.catalog_hash[:32]}"')
+
+
+@router.get("/graph-layout", response_model=GraphLayoutResponse)
+async def get_graph_layout(
+    request: Request,
+    catalog_id: Optional[str] = None,
+    catalog_version: Optional[int] = None,
+    format: LayoutFormat = Query("json", description="json, or binary typed arrays"),
+    node_width: int = Query(180, ge=1, le=1000),
+    node_height: int = Query(80, ge=1, le=1000),
+    node_sep: int = Query(80, ge=0, le=1000),
+    rank_sep: int = Query(100, ge=0, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Layered layout of the prerequisite graph, ready to draw.
+    
+    Lays out a stored catalog (catalog_id) or the courses table. Layouts
+    are computed once per catalog and cached; format=binary returns the
+    same arrays as a little-endian typed-array payload (see
+    GraphLayoutService.to_binary).
+    """
+    catalog = await catalog_service.resolve(db, catalog_id, catalog_version)
+    if catalog is not None:
+        compiled = catalog.compiled
+    else:
+        result = await db.execute(select(Course.code, Course.name, Course.credits, Course.prerequisites))
+        compiled = compile_catalog([
+            CourseInput(code=code, name=name, credits=credits, prerequisites=prerequisites or [])
+            for code, name, credits, prerequisites in result.all()
+        ])
+    
+    layout = graph_layout_service.get_layout(compiled, node_width, node_height, node_sep, rank_sep)
+    return _layout_response(request, layout, format)
+
+
+@router.post("/graph-layout", response_model=GraphLayoutResponse)
+async def layout_course_graph(
+    data: GraphLayoutRequest,
+    request: Request,
+    format: LayoutFormat = Query("json", description="json, or binary typed arrays")
+):
+    """Layered layout for a client-provided course list (cached by graph hash)."""
+    layout = graph_layout_service.get_layout(
+        compile_catalog(data.courses), data.node_width, data.node_height, data.node_sep, data.rank_sep
     )
+    return _layout_response(request, layout, format)
 
 
 @router.get("/{code}", response_model=CourseResponse)
-async def get_course(code: str, db: AsyncSession = Depends(get_db)):
+async def get_course(code: str, request: Request, db: AsyncSession = Depends(get_db)):
     """Get a specific course by code."""
-    result = await db.execute(select(Course).where(Course.code == code.upper()))
-    course = result.scalar_one_or_none()
+    snapshot = await course_cache_service.get(db)
+    cached = snapshot.courses.get(code.upper())
     
-    if not course:
+    if not cached:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Course {code} not found"
         )
     
-    return CourseResponse.model_validate(course)
+    return _cached_json(request, *cached)
 
 
 @router.post("", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
@@ -72,10 +181,43 @@ async def create_course(
     db.add(course)
     await db.flush()
     await db.refresh(course)
+    await prerequisite_graph_service.sync(db, [course])
+    await course_cache_service.invalidate(db)
     
     return CourseResponse.model_validate(course)
 
 
+async def _walk(code: str, direction: str, max_depth: int, db: AsyncSession) -> CourseGraphResponse:
+    snapshot = await course_cache_service.get(db)
+    code = code.upper()
+    if code not in snapshot.courses:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Course {code} not found"
+        )
+    return await prerequisite_graph_service.walk(db, code, direction, max_depth)
+
+
+@router.get("/{code}/ancestors", response_model=CourseGraphResponse)
+async def get_course_ancestors(
+    code: str,
+    max_depth: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Full prerequisite chain of a course (one recursive query)."""
+    return await _walk(code, "ancestors", max_depth, db)
+
+
+@router.get("/{code}/descendants", response_model=CourseGraphResponse)
+async def get_course_descendants(
+    code: str,
+    max_depth: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Every course this course unlocks, directly or transitively."""
+    return await _walk(code, "descendants", max_depth, db)
+
+
 @router.put("/{code}", response_model=CourseResponse)
 async def update_course(
     code: str,
@@ -99,6 +241,9 @@ async def update_course(
     
     await db.flush()
     await db.refresh(course)
+    if "prerequisites" in update_data:
+        await prerequisite_graph_service.sync(db, [course])
+    await course_cache_service.invalidate(db)
     
     return CourseResponse.model_validate(course)
 
@@ -115,50 +260,86 @@ async def delete_course(code: str, db: AsyncSession = Depends(get_db)):
             detail=f"Course {code} not found"
         )
     
+    await prerequisite_graph_service.remove(db, course.code)
     await db.delete(course)
+    await course_cache_service.invalidate(db)
+
+
+async def _bulk_response(db: AsyncSession, courses, results) -> CourseBulkImportResponse:
+    """Summarize an upsert as a bulk import response (invalidating the cache if it wrote)."""
+    if courses:
+        await course_cache_service.invalidate(db)
+    counts = {"created": 0, "updated": 0, "skipped": 0}
+    for row in results:
+        counts[row.status] += 1
+    return CourseBulkImportResponse(
+        courses=[CourseResponse.model_validate(c) for c in courses],
+        total=len(courses),
+        results=results,
+        **counts
+    )
 
 
-@router.post("/bulk", response_model=CourseListResponse)
+@router.post("/bulk", response_model=CourseBulkImportResponse)
 async def bulk_import_courses(
     data: CourseBulkImport,
     db: AsyncSession = Depends(get_db)
 ):
-    """Bulk import courses (useful for importing from CSV)."""
-    created_courses = []
+    """
+    Bulk import courses (useful for importing from CSV).
     
-    for course_data in data.courses:
-        # Skip if exists
-        existing = await db.execute(
-            select(Course).where(Course.code == course_data.code.upper())
-        )
-        if existing.scalar_one_or_none():
-            continue
-        
-        course = Course(
-            code=course_data.code.upper(),
-            name=course_data.name,
-            credits=course_data.credits,
-            prerequisites=course_data.prerequisites,
-            semester_offered=course_data.semester_offered,
-            difficulty_weight=course_data.difficulty_weight,
-            description=course_data.description,
-        )
-        db.add(course)
-        created_courses.append(course)
+    Existing codes are skipped, or updated with on_conflict="update".
+    Rows are written with chunked INSERT ... ON CONFLICT statements (COPY
+    for very large imports) and each row reports created/updated/skipped.
+    """
+    courses, results = await course_import_service.upsert_courses(
+        db, data.courses, on_conflict=data.on_conflict
+    )
+    return await _bulk_response(db, courses, results)
+
+
+@router.post("/import")
+async def import_course_file(
+    file: UploadFile = File(...),
+    on_conflict: Literal["skip", "update"] = Query("skip", description="What to do with codes that already exist")
+):
+    """
+    Import a CSV or XLSX course catalog without loading it into memory.
     
-    await db.flush()
+    Recognized columns: code/course_code/course_id, name/course_name,
+    credits, prerequisites (separated by ; | or ,), semester_offered,
+    difficulty (1-5 or Easy/Medium/Hard), description. Codes are
+    normalized to uppercase without spaces.
     
-    # Refresh all courses
-    for course in created_courses:
-        await db.refresh(course)
+    Rows are read and upserted in batches. The response streams NDJSON:
+    row-level errors, a progress line after each batch and a final
+    summary (with prerequisites that match no known course).
+    """
+    filename = file.filename or "courses"
     
-    return CourseListResponse(
-        courses=[CourseResponse.model_validate(c) for c in created_courses],
-        total=len(created_courses)
-    )
+    # The upload is closed once this handler returns, so hand the stream
+    # its own spooled copy (kept on disk past 1 MB)
+    spool = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    await run_in_threadpool(shutil.copyfileobj, file.file, spool)
+    spool.seek(0)
+    
+    try:
+        rows = await run_in_threadpool(read_course_file, spool, filename)
+    except ValueError as e:
+        spool.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    async def stream():
+        try:
+            async for line in course_import_service.stream_file_import(rows, on_conflict=on_conflict):
+                yield line
+        finally:
+            spool.close()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
-@router.get("/demo/load", response_model=CourseListResponse)
+@router.get("/demo/load", response_model=CourseBulkImportResponse)
 async def load_demo_courses(db: AsyncSession = Depends(get_db)):
     """Load demo course data."""
     demo_courses = [
@@ -178,32 +359,5 @@ async def load_demo_courses(db: AsyncSession = Depends(get_db)):
         CourseCreate(code="EL102", name="Open Elective II", credits=3, prerequisites=[]),
     ]
     
-    created_courses = []
-    
-    for course_data in demo_courses:
-        existing = await db.execute(
-            select(Course).where(Course.code == course_data.code)
-        )
-        if existing.scalar_one_or_none():
-            continue
-        
-        course = Course(
-            code=course_data.code,
-            name=course_data.name,
-            credits=course_data.credits,
-            prerequisites=course_data.prerequisites,
-            semester_offered=course_data.semester_offered,
-            difficulty_weight=course_data.difficulty_weight,
-        )
-        db.add(course)
-        created_courses.append(course)
-    
-    await db.flush()
-    
-    for course in created_courses:
-        await db.refresh(course)
-    
-    return CourseListResponse(
-        courses=[CourseResponse.model_validate(c) for c in created_courses],
-        total=len(created_courses)
-    )
+    courses, results = await course_import_service.upsert_courses(db, demo_courses)
+    return await _bulk_response(db, courses, results)
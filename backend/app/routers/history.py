@@ -1,14 +1,16 @@
 """
 History Router - CRUD operations for plan history.
 """
+import json
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, desc
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import cast, desc, literal, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime
 
-from app.database import get_db
+from app.database import engine, get_db
 from app.models.plan import DegreePlan
 from app.utils.security import get_current_user_optional
 
@@ -72,6 +74,48 @@ class SavePlanRequest(BaseModel):
     data_source: Optional[str] = None
 
 
+def _history_item(plan: DegreePlan) -> PlanHistoryItem:
+    return PlanHistoryItem(
+        id=plan.id,
+        name=plan.name,
+        created_at=plan.created_at,
+        total_semesters=plan.total_semesters,
+        completed_courses_count=len(plan.completed_courses or []),
+        total_courses_count=sum(len(courses) for courses in (plan.semesters or {}).values()),
+        degree_program=plan.degree_program,
+        career_goal=plan.career_goal
+    )
+
+
+def _containment_filters(includes: List[str], completed: List[str], priority: List[str]) -> list:
+    """
+    JSONB conditions served by the GIN indexes on degree_plans.
+    
+    semesters is {"semester_1": [codes], ...}, so "scheduled anywhere" is a
+    jsonpath wildcard match (@@); the course lists use containment (@>).
+    """
+    filters = []
+    for code in includes:
+        # json.dumps gives a valid jsonpath string literal
+        path = f"$.*[*] == {json.dumps(code)}"
+        filters.append(DegreePlan.semesters.op("@@")(cast(literal(path), JSONPATH)))
+    if completed:
+        filters.append(type_coerce(DegreePlan.completed_courses, JSONB).contains(completed))
+    if priority:
+        filters.append(type_coerce(DegreePlan.priority_courses, JSONB).contains(priority))
+    return filters
+
+
+def _plan_matches(plan: DegreePlan, includes: List[str], completed: List[str], priority: List[str]) -> bool:
+    """In-Python equivalent of _containment_filters (databases without JSONB)."""
+    scheduled = {code for codes in (plan.semesters or {}).values() for code in codes}
+    return (
+        all(code in scheduled for code in includes)
+        and set(completed) <= set(plan.completed_courses or [])
+        and set(priority) <= set(plan.priority_courses or [])
+    )
+
+
 # ==========================================
 # ENDPOINTS
 # ==========================================
@@ -92,19 +136,52 @@ async def get_plan_history(
     result = await db.execute(query)
     plans = result.scalars().all()
     
-    return [
-        PlanHistoryItem(
-            id=plan.id,
-            name=plan.name,
-            created_at=plan.created_at,
-            total_semesters=plan.total_semesters,
-            completed_courses_count=len(plan.completed_courses or []),
-            total_courses_count=sum(len(courses) for courses in (plan.semesters or {}).values()),
-            degree_program=plan.degree_program,
-            career_goal=plan.career_goal
+    return [_history_item(plan) for plan in plans]
+
+
+@router.get("/search", response_model=List[PlanHistoryItem])
+async def search_plan_history(
+    includes: List[str] = Query(default=[]),
+    completed: List[str] = Query(default=[]),
+    priority: List[str] = Query(default=[]),
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user_optional)
+):
+    """
+    Find saved plans by course, e.g. ?includes=CS401 or ?completed=CS201.
+    
+    - **includes**: course scheduled in some semester (repeat for all-of)
+    - **completed**: course(s) already completed
+    - **priority**: course(s) marked as priority
+    
+    Runs as JSONB containment / jsonpath queries on the GIN indexes
+    (run `alembic upgrade head` on older databases).
+    """
+    includes = [code.strip().upper() for code in includes if code.strip()]
+    completed = [code.strip().upper() for code in completed if code.strip()]
+    priority = [code.strip().upper() for code in priority if code.strip()]
+    if not (includes or completed or priority):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give at least one of includes, completed or priority"
         )
-        for plan in plans
-    ]
+    
+    user_id = current_user.id if current_user else None
+    query = select(DegreePlan).order_by(desc(DegreePlan.created_at))
+    if user_id:
+        query = query.where(DegreePlan.user_id == user_id)
+    else:
+        query = query.where(DegreePlan.user_id.is_(None))
+    
+    if engine.dialect.name == "postgresql":
+        result = await db.execute(query.where(*_containment_filters(includes, completed, priority)).limit(limit))
+        plans = result.scalars().all()
+    else:
+        result = await db.execute(query)
+        plans = [p for p in result.scalars().all() if _plan_matches(p, includes, completed, priority)][:limit]
+    
+    return [_history_item(plan) for plan in plans]
 
 
 @router.get("/{plan_id}", response_model=PlanHistoryDetail)
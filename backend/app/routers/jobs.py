@@ -0,0 +1,202 @@
+"""
+Jobs Router - Background runs of the long AI endpoints.
+
+POST /api/jobs/{analyze-plan,career-advice,generate-courses} take the same
+body as the /api/ai endpoint and return a job id at once; the result
+(the endpoint's response body) is then polled from /api/jobs/{job_id}
+or streamed as server-sent events from /api/jobs/{job_id}/events.
+"""
+from typing import Any, Callable, Dict, Optional, Type
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, get_db
+from app.models.job import Job
+from app.routers.ai import GenerateCoursesRequest, analyze_plan, generate_degree_courses, get_career_advice
+from app.schemas.job import JobStatus, JobSubmitted
+from app.schemas.plan import AIAnalyzeRequest, CareerAdviceRequest
+from app.services.job_queue_service import FINISHED, job_queue_service
+from app.utils.security import get_current_user_optional
+
+settings = get_settings()
+
+router = APIRouter(prefix="/jobs", tags=["Background Jobs"])
+
+# Seconds between SSE keep-alive comments (proxies drop idle streams)
+KEEPALIVE_SECONDS = 15
+
+
+def _endpoint_job(request_model: Type[BaseModel], endpoint: Callable, with_db: bool = True):
+    """Job handler running an /api/ai endpoint on the stored request body."""
+    async def run(payload: Dict[str, Any], db: AsyncSession) -> Dict[str, Any]:
+        request = request_model(**payload)
+        response = await (endpoint(request, db) if with_db else endpoint(request))
+        return response.model_dump(mode="json")
+    return run
+
+
+job_queue_service.register("analyze-plan", _endpoint_job(AIAnalyzeRequest, analyze_plan))
+job_queue_service.register("career-advice", _endpoint_job(CareerAdviceRequest, get_career_advice))
+job_queue_service.register(
+    "generate-courses", _endpoint_job(GenerateCoursesRequest, generate_degree_courses, with_db=False)
+)
+
+
+def _job_status(job: Job) -> JobStatus:
+    return JobStatus(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        attempts=job.attempts,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        expires_at=job.expires_at,
+        result=job.result,
+        error=job.error
+    )
+
+
+async def _submit(
+    http_request: Request,
+    db: AsyncSession,
+    kind: str,
+    body: BaseModel,
+    callback_url: Optional[str],
+    current_user
+) -> JobSubmitted:
+    try:
+        job = await job_queue_service.submit(
+            db,
+            kind,
+            body.model_dump(mode="json"),
+            user_id=current_user.id if current_user else None,
+            callback_url=callback_url
+        )
+    except PermissionError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JobSubmitted(
+        job_id=job.id,
+        kind=job.kind,
+        status=job.status,
+        status_url=str(http_request.url_for("get_job", job_id=job.id)),
+        events_url=str(http_request.url_for("job_events", job_id=job.id))
+    )
+
+
+async def _get_job_or_404(db: AsyncSession, job_id: str, current_user) -> Job:
+    job = await job_queue_service.get(db, job_id)
+    # Jobs submitted while signed in are only visible to their owner
+    if job is None or (job.user_id is not None and (current_user is None or current_user.id != job.user_id)):
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+CALLBACK_URL = Query(
+    None,
+    description="Optional webhook (signed-in users only): the finished job's state is POSTed here"
+)
+
+
+@router.post("/analyze-plan", response_model=JobSubmitted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_analyze_plan(
+    request: AIAnalyzeRequest,
+    http_request: Request,
+    callback_url: Optional[str] = CALLBACK_URL,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user_optional)
+):
+    """Queue POST /api/ai/analyze-plan; the job result is its AIExplanation."""
+    return await _submit(http_request, db, "analyze-plan", request, callback_url, current_user)
+
+
+@router.post("/career-advice", response_model=JobSubmitted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_career_advice(
+    request: CareerAdviceRequest,
+    http_request: Request,
+    callback_url: Optional[str] = CALLBACK_URL,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user_optional)
+):
+    """Queue POST /api/ai/career-advice; the job result is its CareerAdviceResponse."""
+    return await _submit(http_request, db, "career-advice", request, callback_url, current_user)
+
+
+@router.post("/generate-courses", response_model=JobSubmitted, status_code=status.HTTP_202_ACCEPTED)
+async def submit_generate_courses(
+    request: GenerateCoursesRequest,
+    http_request: Request,
+    callback_url: Optional[str] = CALLBACK_URL,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user_optional)
+):
+    """Queue POST /api/ai/generate-courses; the job result is its GenerateCoursesResponse."""
+    return await _submit(http_request, db, "generate-courses", request, callback_url, current_user)
+
+
+@router.get("/stats")
+async def get_job_stats():
+    """Job counters of this API worker."""
+    return job_queue_service.info()
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user_optional)
+):
+    """
+    State of a job; `result` holds the endpoint's response once it succeeded.
+
+    Finished jobs are kept for JOB_RESULT_TTL_SECONDS, then 404.
+    """
+    return _job_status(await _get_job_or_404(db, job_id, current_user))
+
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user_optional)
+):
+    """
+    Server-sent events for a job: one event per state change, named after
+    the state (queued / running / succeeded / failed) with the JobStatus as
+    data. The stream ends after succeeded or failed.
+    """
+    job = await _get_job_or_404(db, job_id, current_user)
+
+    async def stream():
+        current = job
+        last_status = None
+        idle = 0.0
+        while True:
+            if current is None:
+                yield "event: expired\ndata: {}\n\n"
+                return
+            if current.status != last_status:
+                last_status = current.status
+                idle = 0.0
+                yield f"event: {current.status}\ndata: {_job_status(current).model_dump_json()}\n\n"
+                if current.status in FINISHED:
+                    return
+            # Woken right away by this process's workers; others are polled
+            if not await job_queue_service.wait_for_change(job_id, settings.job_poll_seconds):
+                idle += settings.job_poll_seconds
+                if idle >= KEEPALIVE_SECONDS:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+            async with AsyncSessionLocal() as session:
+                current = await job_queue_service.get(session, job_id)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.services.ollama_service import OllamaService
+from app.utils.catalog_validation import validate_catalog
 
 router = APIRouter(prefix="/manual-entry", tags=["Manual Entry"])
 
@@ -69,19 +70,9 @@ async def analyze_manual_entry(
     ollama = OllamaService()
     
     # Validate basic structure
-    issues = []
-    warnings = []
-    
-    # Check for duplicate codes
-    codes = [c.code for c in request.courses]
-    if len(codes) != len(set(codes)):
-        issues.append("Duplicate course codes found")
-    
-    # Check prerequisites reference existing courses
-    for course in request.courses:
-        for prereq in course.prerequisites:
-            if prereq not in codes:
-                warnings.append(f"Course {course.code} has prerequisite {prereq} not in course list")
+    report = validate_catalog(request.courses, duplicate_severity="error")
+    issues = report.errors
+    warnings = report.warnings
     
     # Calculate totals
     total_credits = sum(c.credits for c in request.courses)
@@ -204,33 +195,13 @@ Rules:
 @router.post("/validate")
 async def validate_courses(courses: List[ManualCourse]):
     """Quick validation of course entries without full AI analysis."""
-    issues = []
-    warnings = []
-    
-    codes = [c.code for c in courses]
-    
-    # Check duplicates
-    seen = set()
-    for code in codes:
-        if code in seen:
-            issues.append(f"Duplicate course code: {code}")
-        seen.add(code)
-    
-    # Check prerequisites
-    for course in courses:
-        for prereq in course.prerequisites:
-            if prereq not in codes:
-                warnings.append(f"{course.code} requires {prereq} which is not in your list")
-    
-    # Check credits
-    for course in courses:
-        if course.credits <= 0 or course.credits > 6:
-            warnings.append(f"{course.code} has unusual credit value: {course.credits}")
+    report = validate_catalog(courses, duplicate_severity="error", credit_range=(1, 6))
     
     return {
-        "is_valid": len(issues) == 0,
-        "issues": issues,
-        "warnings": warnings,
+        "is_valid": report.is_valid,
+        "issues": report.errors,
+        "warnings": report.warnings,
+        "details": [issue.model_dump() for issue in report.issues],
         "total_courses": len(courses),
         "total_credits": sum(c.credits for c in courses)
     }
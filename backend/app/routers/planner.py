@@ -1,6 +1,6 @@
 """Degree Plan generation and management API router."""
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -11,16 +11,26 @@ from app.schemas.plan import (
     PlanGenerateResponse,
     PlanSaveRequest,
     PlanSaveResponse,
+    PlanRepairRequest,
+    PlanRepairResponse,
+    BatchPlanRequest,
+    PlanSweepRequest,
+    PlanSweepResponse,
+    PlanAlternativesRequest,
+    PlanAlternativesResponse,
     CourseInput,
 )
 from app.services.planner_service import planner_service
+from app.services.batch_planner_service import batch_planner_service
+from app.services.catalog_service import catalog_service
 from app.utils.ics_generator import generate_ics_file
+from app.utils.security import get_current_user_optional
 
 router = APIRouter(prefix="/plan", tags=["Degree Plan"])
 
 
 @router.post("/generate", response_model=PlanGenerateResponse)
-async def generate_plan(request: PlanGenerateRequest):
+async def generate_plan(request: PlanGenerateRequest, db: AsyncSession = Depends(get_db)):
     """
     Generate an optimized degree plan.
     
@@ -30,9 +40,16 @@ async def generate_plan(request: PlanGenerateRequest):
     3. Prioritizes requested courses
     4. Calculates difficulty ratings per semester
     5. Assesses graduation and burnout risks
+    
+    Pass catalog_id (+ catalog_version) instead of courses to plan against
+    a stored, pre-validated catalog.
     """
+    catalog = await catalog_service.resolve(db, request.catalog_id, request.catalog_version)
+    if catalog is not None:
+        request = request.model_copy(update={"courses": catalog.courses})
+    
     try:
-        result = planner_service.generate_plan(request)
+        result = planner_service.generate_plan(request, catalog=catalog.compiled if catalog else None)
         return result
     except Exception as e:
         raise HTTPException(
@@ -41,6 +58,137 @@ async def generate_plan(request: PlanGenerateRequest):
         )
 
 
+@router.post("/generate-batch")
+async def generate_plan_batch(request: BatchPlanRequest):
+    """
+    Generate plans for a whole cohort against one shared catalog.
+    
+    The catalog is compiled once and students are planned in parallel
+    across worker processes. Results stream back as NDJSON (one
+    BatchPlanResult per line, in completion order) followed by a
+    summary line. The catalog is validated once up front; an invalid one
+    is a 400.
+    """
+    try:
+        catalog = batch_planner_service.compile_batch_catalog(request.courses)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return StreamingResponse(
+        batch_planner_service.stream_plans(catalog, request.students),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/sweep", response_model=PlanSweepResponse)
+async def sweep_plan_parameters(request: PlanSweepRequest):
+    """
+    Evaluate a grid of max load x semesters x priority sets in one call.
+    
+    Returns compact matrices (confidence, unscheduled count, burnout and
+    graduation risk) indexed as [priority_set][max_courses][semesters].
+    The catalog is validated once up front; an invalid one is a 400.
+    """
+    try:
+        return await batch_planner_service.sweep(request)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Parameter sweep failed: {str(e)}"
+        )
+
+
+@router.post("/alternatives", response_model=PlanAlternativesResponse)
+async def generate_plan_alternatives(request: PlanAlternativesRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Generate up to k non-dominated alternative plans (Pareto front).
+    
+    Each alternative carries its objective vector (semesters used, max
+    difficulty, priority lateness, confidence) so the client can compare
+    e.g. fastest graduation against lowest burnout. The search runs under
+    request.time_budget_ms.
+    """
+    catalog = await catalog_service.resolve(db, request.catalog_id, request.catalog_version)
+    if catalog is not None:
+        request = request.model_copy(update={"courses": catalog.courses})
+    
+    try:
+        return planner_service.generate_alternatives(request, catalog=catalog.compiled if catalog else None)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Alternative plan generation failed: {str(e)}"
+        )
+
+
+@router.post("/repair", response_model=PlanRepairResponse)
+async def repair_plan(
+    request: PlanRepairRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user = Depends(get_current_user_optional)
+):
+    """
+    Incrementally repair a plan after completed/failed/added/removed courses
+    or changed limits, instead of regenerating it from scratch.
+    
+    Semesters the change cannot influence are reused as-is; only the
+    affected suffix is rescheduled. The response includes a diff.
+    """
+    if request.plan_id is not None:
+        user_id = current_user.id if current_user else None
+        query = select(DegreePlan).where(DegreePlan.id == request.plan_id)
+        if user_id:
+            query = query.where(DegreePlan.user_id == user_id)
+        else:
+            query = query.where(DegreePlan.user_id.is_(None))
+        
+        result = await db.execute(query)
+        plan = result.scalar_one_or_none()
+        if not plan:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Plan {request.plan_id} not found"
+            )
+        
+        base_request = PlanGenerateRequest(
+            courses=plan.courses_data or [],
+            completed_courses=plan.completed_courses or [],
+            remaining_semesters=plan.total_semesters,
+            max_courses_per_semester=plan.max_courses_per_semester,
+            priority_courses=plan.priority_courses or [],
+            career_goal=plan.career_goal,
+        )
+        previous_plan = plan.semesters or {}
+    elif request.base_request is not None and request.degree_plan is not None:
+        base_request = request.base_request
+        previous_plan = request.degree_plan
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either plan_id or both base_request and degree_plan"
+        )
+    
+    try:
+        return planner_service.repair_plan(base_request, previous_plan, request.delta)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Plan repair failed: {str(e)}"
+        )
+
+
 @router.post("/generate-demo", response_model=PlanGenerateResponse)
 async def generate_demo_plan():
     """Generate a plan using demo data - useful for testing."""
@@ -11,7 +11,8 @@ from typing import List, Optional, Dict, Any
 from uuid import uuid4
 from datetime import datetime
 
-from app.services.ollama_service import ollama_service
+from app.services.ollama_service import NOTES_CHAR_LIMIT, ollama_service
+from app.services.retrieval_service import retrieval_service
 
 router = APIRouter(prefix="/practice", tags=["Practice & Self-Test"])
 
@@ -39,7 +40,10 @@ class Question(BaseModel):
 class GenerateQuestionsRequest(BaseModel):
     """Request to generate practice or self-test questions."""
     topic_name: str = Field(description="Name of the topic")
-    topic_notes: str = Field(description="Content/notes for the topic")
+    topic_notes: str = Field(default="", description="Content/notes for the topic")
+    document_id: Optional[str] = Field(
+        default=None, description="Uploaded document (from /api/revision/analyze-document) to draw the material from"
+    )
     difficulty: str = Field(default="Medium", description="Easy / Medium / Hard")
     question_type: str = Field(default="mcq", description="mcq / short / long")
     count: int = Field(default=5, ge=1, le=20, description="Number of questions")
@@ -101,9 +105,11 @@ async def generate_questions(request: GenerateQuestionsRequest):
     
     - **mode=practice**: Returns questions WITH answers and explanations.
     - **mode=self-test**: Returns questions WITHOUT answers. Answers stored server-side.
+    - **document_id** (or notes over 4000 characters): the prompt carries the
+      parts of the material most relevant to the topic.
     """
-    if not request.topic_name or not request.topic_notes:
-        raise HTTPException(status_code=400, detail="topic_name and topic_notes are required")
+    if not request.topic_name or not (request.topic_notes or request.document_id):
+        raise HTTPException(status_code=400, detail="topic_name and topic_notes (or document_id) are required")
     
     if request.mode not in ("practice", "self-test"):
         raise HTTPException(status_code=400, detail="mode must be 'practice' or 'self-test'")
@@ -111,13 +117,25 @@ async def generate_questions(request: GenerateQuestionsRequest):
     if request.question_type not in ("mcq", "short", "long"):
         raise HTTPException(status_code=400, detail="question_type must be 'mcq', 'short', or 'long'")
     
+    # Retrieve the relevant parts of the material
+    excerpts = None
+    if request.document_id:
+        if not await retrieval_service.has_document(request.document_id):
+            raise HTTPException(status_code=404, detail="Document not found. Upload it via /api/revision/analyze-document.")
+        excerpts = await retrieval_service.search(request.topic_name, request.document_id)
+        if not excerpts and not request.topic_notes:
+            raise HTTPException(status_code=503, detail="Could not search the document. Is the embedding model available?")
+    elif len(request.topic_notes) > NOTES_CHAR_LIMIT:
+        excerpts = await retrieval_service.rank(request.topic_name, request.topic_notes)
+    
     # Generate questions using AI (always include answers for storage)
     raw_questions = await ollama_service.generate_practice_questions(
         topic=request.topic_name,
         notes=request.topic_notes,
         difficulty=request.difficulty,
         q_type=request.question_type,
-        count=request.count
+        count=request.count,
+        excerpts=excerpts
     )
     
     session_id = str(uuid4())
@@ -7,6 +7,7 @@ from typing import List, Optional
 
 from app.services.document_service import extract_text
 from app.services.ollama_service import ollama_service
+from app.services.retrieval_service import retrieval_service
 
 router = APIRouter(prefix="/revision", tags=["Revision"])
 
@@ -20,6 +21,7 @@ class DocumentAnalysisResponse(BaseModel):
     key_concepts: List[str]
     filename: str
     file_type: str
+    document_id: Optional[str] = None  # Pass to explain-topic / practice for retrieval
 
 
 class TopicExplanationResponse(BaseModel):
@@ -36,6 +38,7 @@ class ExplainTopicRequest(BaseModel):
     """Request schema for explaining a topic."""
     topic: str
     context: Optional[str] = None
+    document_id: Optional[str] = None
 
 
 @router.post("/analyze-document", response_model=DocumentAnalysisResponse)
@@ -53,6 +56,7 @@ async def analyze_document(
     - Personalized revision plan
     - Estimated study hours
     - Key concepts to focus on
+    - document_id: the document is indexed for retrieval (None if retrieval is off)
     """
     # Validate file type
     allowed_extensions = [".pdf", ".pptx", ".ppt"]
@@ -81,6 +85,9 @@ async def analyze_document(
             detail="Could not extract sufficient text from the document. The file may be image-based or empty."
         )
     
+    # Index for retrieval (embedded in the background) while the AI analyzes it
+    document_id = await retrieval_service.add_document(extracted_text, filename)
+    
     # Analyze with AI
     analysis = await ollama_service.analyze_document_for_revision(extracted_text, filename)
     
@@ -91,7 +98,8 @@ async def analyze_document(
         estimated_hours=analysis.get("estimated_hours", 0),
         key_concepts=analysis.get("key_concepts", []),
         filename=filename,
-        file_type=file_type
+        file_type=file_type,
+        document_id=document_id
     )
 
 
@@ -102,6 +110,7 @@ async def explain_topic(request: ExplainTopicRequest):
     
     - **topic**: The topic name to explain
     - **context**: Optional context about the subject area
+    - **document_id**: Optional uploaded document; the explanation draws on its most relevant parts
     
     Returns:
     - Definition
@@ -113,9 +122,18 @@ async def explain_topic(request: ExplainTopicRequest):
     if not request.topic or len(request.topic.strip()) < 2:
         raise HTTPException(status_code=400, detail="Please provide a valid topic name.")
     
+    excerpts = None
+    if request.document_id:
+        if not await retrieval_service.has_document(request.document_id):
+            raise HTTPException(status_code=404, detail="Document not found. Upload it via /api/revision/analyze-document.")
+        excerpts = await retrieval_service.search(
+            f"{request.topic.strip()} {request.context or ''}".strip(), request.document_id
+        )
+    
     explanation = await ollama_service.explain_topic_in_detail(
         topic=request.topic.strip(),
-        context=request.context or ""
+        context=request.context or "",
+        excerpts=excerpts
     )
     
     return TopicExplanationResponse(
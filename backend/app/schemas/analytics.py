@@ -0,0 +1,37 @@
+"""Pydantic schemas for cohort analytics over saved degree plans."""
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+CohortSort = Literal["frequency", "unscheduled_rate", "bottleneck_rate", "delayed_rate", "avg_semester"]
+
+
+class CourseCohortStats(BaseModel):
+    """How one course fares across the saved plans of a cohort."""
+    code: str
+    plans: int = Field(..., description="Plans that contain the course (scheduled or left unscheduled)")
+    frequency: float = Field(..., description="plans / total plans in the cohort")
+    scheduled_plans: int
+    avg_semester: Optional[float] = Field(None, description="Mean semester number the course is placed in")
+    unscheduled_plans: int
+    unscheduled_rate: float = Field(..., description="unscheduled_plans / plans")
+    bottleneck_plans: int = Field(..., description="Plans whose risk factors flag the course as a bottleneck")
+    bottleneck_rate: float = Field(..., description="bottleneck_plans / total plans in the cohort")
+    delayed_plans: int = Field(..., description="Plans containing the course with graduation risk 'Delayed'")
+    delayed_rate: float = Field(..., description="delayed_plans / plans")
+    burnout_risk: Dict[str, int] = Field(default_factory=dict, description="Plans containing the course per burnout level")
+
+
+class CohortAnalyticsResponse(BaseModel):
+    """Course-level bottleneck and delay statistics for a cohort of saved plans."""
+    degree_program: Optional[str] = Field(None, description="Cohort filter (None = all plans)")
+    total_plans: int
+    burnout_risk: Dict[str, int] = Field(default_factory=dict, description="Plans per burnout risk level")
+    graduation_risk: Dict[str, int] = Field(default_factory=dict, description="Plans per graduation risk level")
+    courses: List[CourseCohortStats]
+    sort: CohortSort
+    source: Literal["view", "live", "memory"] = Field(
+        ..., description="Materialized views, a live SQL aggregate, or in-process aggregation"
+    )
+    refreshed_at: Optional[datetime] = Field(None, description="When the materialized views were last refreshed")
@@ -0,0 +1,37 @@
+"""Pydantic schemas for stored, versioned course catalogs."""
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from app.schemas.plan import CourseInput, ValidationIssue
+
+
+class CatalogCreateRequest(BaseModel):
+    """Upload a new version of a named catalog."""
+    courses: List[CourseInput] = Field(..., min_length=1, description="Full course list for this version")
+
+
+class CatalogVersionResponse(BaseModel):
+    """Metadata for one stored catalog version."""
+    catalog_id: str
+    version: int
+    course_count: int
+    content_hash: str
+    source: str
+    created_at: datetime
+    issues: List[ValidationIssue] = Field(default_factory=list, description="Warnings found when the version was validated")
+
+    class Config:
+        from_attributes = True
+
+
+class CatalogVersionDetail(CatalogVersionResponse):
+    """Catalog version including its courses."""
+    courses: List[CourseInput]
+
+
+class CatalogListResponse(BaseModel):
+    """Latest version of every stored catalog."""
+    catalogs: List[CatalogVersionResponse]
+    total: int
@@ -1,8 +1,10 @@
 """Pydantic schemas for Course API."""
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
+from app.schemas.plan import CourseInput
+
 
 class CourseBase(BaseModel):
     """Base course schema with common fields."""
@@ -48,3 +50,91 @@ class CourseListResponse(BaseModel):
 class CourseBulkImport(BaseModel):
     """Schema for bulk importing courses from CSV-like data."""
     courses: List[CourseCreate]
+    on_conflict: Literal["skip", "update"] = Field(
+        default="skip",
+        description="What to do with codes that already exist"
+    )
+
+
+class CourseRowStatus(BaseModel):
+    """Outcome for one row of a bulk import."""
+    code: str
+    status: Literal["created", "updated", "skipped"]
+    reason: Optional[str] = None
+
+
+class CourseBulkImportResponse(CourseListResponse):
+    """Bulk import result: created/updated courses plus per-row status."""
+    results: List[CourseRowStatus]
+    created: int
+    updated: int
+    skipped: int
+
+
+class CourseSearchHit(CourseResponse):
+    """A course matching a search, with its relevance score."""
+    score: float = Field(..., description="Relevance (higher is better; scale depends on the backend)")
+
+
+class CourseSearchResponse(BaseModel):
+    """One page of ranked search results."""
+    query: str
+    mode: str
+    results: List[CourseSearchHit]
+    total: int = Field(..., description="Matches across all pages")
+    limit: int
+    offset: int
+    backend: Literal["postgres", "memory"]
+
+
+class CourseGraphNode(BaseModel):
+    """A course reached by a prerequisite graph query."""
+    code: str
+    name: Optional[str] = Field(default=None, description="None if the code isn't in the courses table")
+    depth: int = Field(..., description="Fewest prerequisite hops from the queried course")
+
+
+class CourseGraphEdge(BaseModel):
+    """course requires prerequisite."""
+    course: str
+    prerequisite: str
+
+
+class CourseGraphResponse(BaseModel):
+    """Prerequisite chain (ancestors) or unlocked courses (descendants) of one course."""
+    code: str
+    direction: Literal["ancestors", "descendants"]
+    max_depth: int
+    nodes: List[CourseGraphNode]
+    edges: List[CourseGraphEdge]
+    depth_limited: bool = Field(..., description="True if the walk stopped at max_depth")
+
+
+class GraphLayoutRequest(BaseModel):
+    """Lay out a client-side course list (the graph page's uploaded courses)."""
+    courses: List[CourseInput] = Field(..., min_length=1)
+    node_width: int = Field(default=180, ge=1, le=1000)
+    node_height: int = Field(default=80, ge=1, le=1000)
+    node_sep: int = Field(default=80, ge=0, le=1000, description="Horizontal gap between nodes")
+    rank_sep: int = Field(default=100, ge=0, le=1000, description="Vertical gap between layers")
+
+
+class GraphLayoutResponse(BaseModel):
+    """
+    Layered prerequisite-graph layout as parallel arrays.
+    
+    nodes[i] is drawn at (x[i], y[i]) (top-left of its box) in layer[i];
+    edges holds (prerequisite index, course index) pairs, flattened.
+    """
+    catalog_hash: str
+    node_width: int
+    node_height: int
+    width: float
+    height: float
+    layers: int
+    crossings: int = Field(..., description="Edge crossings left after minimization")
+    nodes: List[str]
+    x: List[float]
+    y: List[float]
+    layer: List[int]
+    edges: List[int]
@@ -0,0 +1,31 @@
+"""
+Pydantic schemas for background jobs.
+"""
+from datetime import datetime
+from typing import Any, Dict, Literal, Optional
+from pydantic import BaseModel, Field
+
+JobState = Literal["queued", "running", "succeeded", "failed"]
+
+
+class JobSubmitted(BaseModel):
+    """Reply to a job submission (202 Accepted)."""
+    job_id: str = Field(..., description="Job identifier")
+    kind: str = Field(..., description="Job kind, e.g. 'analyze-plan'")
+    status: JobState = Field(..., description="Current job state")
+    status_url: str = Field(..., description="Poll this for the job state and result")
+    events_url: str = Field(..., description="Server-sent events stream of state changes")
+
+
+class JobStatus(BaseModel):
+    """State of a job, with its result once finished."""
+    job_id: str = Field(..., description="Job identifier")
+    kind: str = Field(..., description="Job kind, e.g. 'analyze-plan'")
+    status: JobState = Field(..., description="Current job state")
+    attempts: int = Field(0, description="Times a worker started the job (restarts resume it)")
+    created_at: datetime = Field(..., description="Submission time (UTC)")
+    started_at: Optional[datetime] = Field(None, description="Start of the latest attempt (UTC)")
+    finished_at: Optional[datetime] = Field(None, description="Completion time (UTC)")
+    expires_at: Optional[datetime] = Field(None, description="The result is deleted after this time (UTC)")
+    result: Optional[Dict[str, Any]] = Field(None, description="Response body of the endpoint, once succeeded")
+    error: Optional[str] = Field(None, description="Error message, once failed")
@@ -4,7 +4,7 @@ Pydantic schemas for plan generation.
 Implements the strict output format required by the AI system specification.
 Includes Advanced Intelligence features: Decision Timeline, Confidence Score, Advisor Mode.
 """
-from typing import Dict, List, Optional, Literal, Any
+from typing import Annotated, Dict, List, Optional, Literal, Any
 from pydantic import BaseModel, Field
 
 
@@ -29,7 +29,9 @@ class PlanGenerateRequest(BaseModel):
     
     CRITICAL: All data comes from user. Never auto-fill or assume.
     """
-    courses: List[CourseInput] = Field(..., description="List of courses from user's catalog")
+    courses: List[CourseInput] = Field(default_factory=list, description="List of courses from user's catalog (omit when using catalog_id)")
+    catalog_id: Optional[str] = Field(None, description="Stored catalog to use instead of uploading courses")
+    catalog_version: Optional[int] = Field(None, ge=1, description="Stored catalog version (default: latest)")
     completed_courses: List[str] = Field(default_factory=list, description="Courses already completed")
     remaining_semesters: int = Field(..., ge=1, le=20, description="Semesters remaining until graduation")
     max_courses_per_semester: int = Field(..., ge=1, le=10, description="Maximum courses per semester")
@@ -72,6 +74,15 @@ class RiskAnalysis(BaseModel):
     risk_factors: List[str] = Field(default_factory=list)
 
 
+class ValidationIssue(BaseModel):
+    """Single structured finding from catalog validation."""
+    code: str = Field(..., description="Machine-readable issue code (e.g. 'PREREQUISITE_CYCLE')")
+    severity: Literal["error", "warning"] = Field(..., description="Errors block planning; warnings do not")
+    message: str = Field(..., description="Human-readable description")
+    course: Optional[str] = Field(None, description="Course the issue is attached to, if any")
+    related: List[str] = Field(default_factory=list, description="Other courses involved (e.g. cycle members)")
+
+
 class FailureImpact(BaseModel):
     """Impact of simulated course failures."""
     failed_courses: List[str] = Field(default_factory=list)
@@ -157,6 +168,10 @@ class PlanGenerateResponse(BaseModel):
         default="Valid",
         description="Whether input data passed validation"
     )
+    validation_issues: List[ValidationIssue] = Field(
+        default_factory=list,
+        description="Structured validation findings behind warnings/errors"
+    )
 
 
 class PlanSaveRequest(BaseModel):
@@ -177,11 +192,159 @@ class PlanSaveResponse(BaseModel):
     message: str = "Plan saved successfully"
 
 
+# ==========================================
+# INCREMENTAL PLAN REPAIR SCHEMAS
+# ==========================================
+
+class PlanDelta(BaseModel):
+    """Changes to apply to a previously generated plan."""
+    completed_courses: List[str] = Field(default_factory=list, description="Courses newly marked as completed")
+    failed_courses: List[str] = Field(default_factory=list, description="Previously completed courses that must be retaken")
+    added_courses: List[CourseInput] = Field(default_factory=list, description="Courses added to (or replaced in) the catalog")
+    removed_courses: List[str] = Field(default_factory=list, description="Course codes dropped from the catalog")
+    max_courses_per_semester: Optional[int] = Field(None, ge=1, le=10, description="New maximum courses per semester")
+    remaining_semesters: Optional[int] = Field(None, ge=1, le=20, description="New number of remaining semesters")
+
+
+class PlanRepairRequest(BaseModel):
+    """
+    Request to repair an existing plan instead of regenerating it.
+
+    Either `plan_id` (a saved DegreePlan) or both `base_request` and
+    `degree_plan` must be supplied.
+    """
+    plan_id: Optional[int] = Field(None, description="ID of a saved plan to repair")
+    base_request: Optional[PlanGenerateRequest] = Field(None, description="Request the previous plan was generated from")
+    degree_plan: Optional[Dict[str, List[str]]] = Field(None, description="Previously generated semester schedule")
+    delta: PlanDelta = Field(default_factory=PlanDelta, description="Changes since the previous plan")
+
+
+class CourseMove(BaseModel):
+    """A course whose semester changed during repair."""
+    code: str
+    from_semester: str
+    to_semester: str
+
+
+class PlanDiff(BaseModel):
+    """Difference between the previous and the repaired plan."""
+    repaired_from: Optional[str] = Field(None, description="First semester that was rescheduled (None if nothing changed)")
+    unchanged_semesters: int = Field(default=0, description="Leading semesters reused verbatim")
+    rescheduled_courses: int = Field(default=0, description="Number of courses the scheduler had to place again")
+    moved: List[CourseMove] = Field(default_factory=list)
+    added: List[str] = Field(default_factory=list, description="Courses newly placed in the plan")
+    dropped: List[str] = Field(default_factory=list, description="Courses no longer placed in the plan")
+
+
+class PlanRepairResponse(BaseModel):
+    """Repaired plan together with what changed."""
+    plan: PlanGenerateResponse
+    diff: PlanDiff
+
+
+# ==========================================
+# BATCH / COHORT PLAN GENERATION SCHEMAS
+# ==========================================
+
+class StudentPlanProfile(BaseModel):
+    """Per-student planning inputs; the catalog is shared across the batch."""
+    student_id: str = Field(..., description="Caller-provided identifier echoed back with the result")
+    completed_courses: List[str] = Field(default_factory=list, description="Courses already completed")
+    remaining_semesters: int = Field(..., ge=1, le=20, description="Semesters remaining until graduation")
+    max_courses_per_semester: int = Field(..., ge=1, le=10, description="Maximum courses per semester")
+    priority_courses: List[str] = Field(default_factory=list, description="Courses to prioritize scheduling early")
+    career_goal: Optional[str] = Field(None, description="Optional career goal for alignment analysis")
+    current_gpa: Optional[float] = Field(None, ge=0.0, le=4.0, description="Current GPA for risk assessment")
+    weekly_work_hours: Optional[int] = Field(None, ge=0, description="Hours worked per week (for burnout risk)")
+    failure_simulation: Optional[FailureSimulation] = Field(None, description="What-if failure simulation mode")
+    advisor_mode: bool = Field(default=False, description="Enable formal advisor-style explanations")
+
+
+class BatchPlanRequest(BaseModel):
+    """One shared catalog plus many student profiles."""
+    courses: List[CourseInput] = Field(..., description="Course catalog shared by every student")
+    students: List[StudentPlanProfile] = Field(..., min_length=1, max_length=1000, description="Students to plan for (at most 1000 per batch)")
+
+
+class BatchPlanResult(BaseModel):
+    """One NDJSON line of a batch response."""
+    student_id: str
+    plan: Optional[PlanGenerateResponse] = None
+    error: Optional[str] = None
+
+
+# ==========================================
+# PARAMETER SWEEP SCHEMAS
+# ==========================================
+
+class PlanSweepRequest(BaseModel):
+    """Evaluate a grid of planning parameters against one catalog."""
+    courses: List[CourseInput] = Field(..., min_length=1, description="Course catalog")
+    completed_courses: List[str] = Field(default_factory=list, description="Courses already completed")
+    max_courses_options: List[Annotated[int, Field(ge=1, le=10)]] = Field(..., min_length=1, max_length=10, description="Max courses per semester values to try")
+    semester_options: List[Annotated[int, Field(ge=1, le=20)]] = Field(..., min_length=1, max_length=20, description="Remaining semester values to try")
+    priority_sets: List[List[str]] = Field(default_factory=lambda: [[]], min_length=1, max_length=10, description="Priority course sets to try")
+    current_gpa: Optional[float] = Field(None, ge=0.0, le=4.0, description="Current GPA for risk assessment")
+    weekly_work_hours: Optional[int] = Field(None, ge=0, description="Hours worked per week (for burnout risk)")
+
+
+class PlanSweepResponse(BaseModel):
+    """
+    Compact result matrices indexed as [priority_set][max_courses][semesters],
+    following the order of the request's option lists.
+    """
+    max_courses_options: List[int]
+    semester_options: List[int]
+    priority_sets: List[List[str]]
+    confidence_score: List[List[List[float]]]
+    unscheduled_count: List[List[List[int]]]
+    burnout_risk: List[List[List[Literal["Low", "Medium", "High"]]]]
+    graduation_risk: List[List[List[Literal["On Track", "Delayed"]]]]
+
+
+# ==========================================
+# ALTERNATIVE PLANS (PARETO FRONT) SCHEMAS
+# ==========================================
+
+class PlanAlternativesRequest(PlanGenerateRequest):
+    """Request up to k non-dominated plans instead of a single one."""
+    k: int = Field(default=3, ge=1, le=10, description="Maximum number of alternative plans")
+    time_budget_ms: int = Field(default=500, ge=50, le=10000, description="Search latency budget in milliseconds")
+
+
+class PlanObjectives(BaseModel):
+    """Objective vector used to compare alternative plans."""
+    semesters_used: int = Field(..., description="Semesters with at least one course (lower is better)")
+    max_difficulty: Literal["Light", "Moderate", "Heavy"] = Field(..., description="Hardest semester (lower is better)")
+    priority_lateness: int = Field(..., description="Semesters priority courses sit past their earliest slot (lower is better)")
+    confidence_score: float = Field(..., description="Plan confidence 0-100 (higher is better)")
+    unscheduled_count: int = Field(..., description="Courses left outside the horizon (lower is better)")
+
+
+class PlanAlternative(BaseModel):
+    """One plan on the Pareto front."""
+    strategy: str = Field(..., description="Scheduling strategy that produced this plan")
+    best_for: List[str] = Field(default_factory=list, description="Objectives this plan is best at among the alternatives")
+    objectives: PlanObjectives
+    plan: PlanGenerateResponse
+
+
+class PlanAlternativesResponse(BaseModel):
+    """Non-dominated plans plus search statistics."""
+    alternatives: List[PlanAlternative]
+    candidates_evaluated: int
+    front_size: int
+    budget_exhausted: bool
+    elapsed_ms: float
+
+
 class AIAnalyzeRequest(BaseModel):
     """Request for AI analysis of a plan."""
     degree_plan: Dict[str, List[str]]
     career_goal: Optional[str] = None
     courses: Optional[List[CourseInput]] = None
+    catalog_id: Optional[str] = Field(None, description="Stored catalog to use instead of uploading courses")
+    catalog_version: Optional[int] = Field(None, ge=1, description="Stored catalog version (default: latest)")
     advisor_mode: bool = False
 
 
@@ -214,8 +377,10 @@ class AIExplanation(BaseModel):
 class CareerAdviceRequest(BaseModel):
     """Request for AI career advice."""
     career_goal: str
-    available_courses: List[str]
+    available_courses: List[str] = Field(default_factory=list)
     completed_courses: List[str] = Field(default_factory=list)
+    catalog_id: Optional[str] = Field(None, description="Stored catalog whose courses are the available courses")
+    catalog_version: Optional[int] = Field(None, ge=1, description="Stored catalog version (default: latest)")
 
 
 class CareerAdviceResponse(BaseModel):
@@ -246,7 +411,9 @@ class FailureSimulationRequest(BaseModel):
     degree_plan: Dict[str, List[str]]
     completed_courses: List[str]
     failed_courses: List[str]
-    courses: List[CourseInput]
+    courses: List[CourseInput] = Field(default_factory=list)
+    catalog_id: Optional[str] = Field(None, description="Stored catalog to use instead of uploading courses")
+    catalog_version: Optional[int] = Field(None, ge=1, description="Stored catalog version (default: latest)")
     remaining_semesters: int = 6
     max_courses_per_semester: int = 5
 
@@ -322,6 +489,7 @@ class StudyBuddyRequest(BaseModel):
     planned_tasks: Optional[int] = Field(None, description="Number of tasks scheduled")
     message: Optional[str] = Field(None, description="User chat message")
     history: Optional[List[Dict[str, str]]] = Field(None, description="Chat history [{'role': 'user', 'content': '...'}, ...]")
+    session_id: Optional[str] = Field(None, description="Session from a previous reply; the server keeps the history, so only message is needed")
 
 class StudyBuddyResponse(BaseModel):
     """Structured behavioral support response."""
@@ -329,3 +497,99 @@ class StudyBuddyResponse(BaseModel):
     encouragement: Optional[str] = None
     next_small_action: Optional[str] = None
     chat_response: Optional[str] = Field(None, description="Conversational response")
+    session_id: Optional[str] = Field(None, description="Conversation session to send with the next message", json_schema_extra={"readOnly": True})
+
+
+# ==========================================
+# LLM OUTPUT SCHEMAS (Ollama structured output)
+# ==========================================
+
+class BurnoutAssessment(BaseModel):
+    """AI burnout risk assessment of a semester plan."""
+    risk_level: Literal["Low", "Medium", "High"]
+    assessment: str = Field(..., description="2-3 sentence explanation")
+    recommendations: List[str] = Field(default_factory=list)
+
+
+class GeneratedCourse(BaseModel):
+    """A course in an AI-generated degree curriculum."""
+    code: str
+    name: str
+    credits: int
+    prerequisites: List[str] = Field(default_factory=list)
+    year: int
+
+
+class GeneratedCourseList(BaseModel):
+    """AI-generated degree curriculum."""
+    courses: List[GeneratedCourse]
+
+
+class DocumentTopic(BaseModel):
+    """A topic extracted from study material."""
+    name: str
+    difficulty: Literal["Easy", "Medium", "Hard"]
+    priority: int
+
+
+class DocumentAnalysis(BaseModel):
+    """AI analysis of an uploaded document for revision."""
+    subject: str
+    topics: List[DocumentTopic]
+    revision_plan: str
+    estimated_hours: float
+    key_concepts: List[str] = Field(default_factory=list)
+
+
+class TopicExplanation(BaseModel):
+    """Detailed AI explanation of a single topic."""
+    topic: str
+    definition: str
+    key_points: List[str]
+    example: str
+    common_mistakes: List[str] = Field(default_factory=list)
+    revision_tip: str
+
+
+class PracticeQuestion(BaseModel):
+    """An AI-generated practice question."""
+    text: str
+    options: Optional[List[str]] = Field(None, description="Exactly 4 options for MCQ, omitted otherwise")
+    correct_answer: str
+    explanation: str
+
+
+class PracticeQuestionSet(BaseModel):
+    """AI-generated practice questions (wrapped so the output is a JSON object)."""
+    questions: List[PracticeQuestion]
+
+
+class AnswerFeedback(BaseModel):
+    """AI grading of one submitted answer."""
+    question_id: str
+    score: float
+    max_score: float
+    is_correct: bool
+    feedback: str
+
+
+class AnswerEvaluation(BaseModel):
+    """AI grading of a set of submitted answers."""
+    question_feedback: List[AnswerFeedback]
+    total_score: float
+    max_score: float
+    percentage: float
+    performance_level: Literal["Strong", "Average", "Weak"]
+    next_steps: List[str] = Field(default_factory=list)
+
+
+class BatchedAnswerEvaluation(BaseModel):
+    """AI grading of one request's answers within a grading batch."""
+    request_id: str
+    question_feedback: List[AnswerFeedback]
+    next_steps: List[str] = Field(default_factory=list)
+
+
+class AnswerEvaluationBatch(BaseModel):
+    """AI grading of several requests in one call (see evaluation_batcher)."""
+    results: List[BatchedAnswerEvaluation]
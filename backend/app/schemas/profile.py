@@ -25,6 +25,7 @@ class ProfileRequest(BaseModel):
     message: Optional[str] = Field(None, description="User's chat message")
     history: List[Dict[str, str]] = Field(default_factory=list, description="Chat history")
     auth_action: Literal["signup", "signin"] = Field("signin", description="Authentication action: 'signup' for new users, 'signin' for returning")
+    session_id: Optional[str] = Field(None, description="Session from a previous reply; the server keeps the history, so only message is needed")
 
 class ProfileResponse(BaseModel):
     """
@@ -33,3 +34,4 @@ class ProfileResponse(BaseModel):
     chat_response: str = Field(..., description="Conversational response to the user")
     suggested_updates: Optional[UserProfile] = Field(None, description="Key-value pairs to update in the profile based on the conversation")
     onboarding_complete: bool = Field(False, description="Whether the agent believes onboarding is now finished")
+    session_id: Optional[str] = Field(None, description="Conversation session to send with the next message", json_schema_extra={"readOnly": True})
@@ -0,0 +1,224 @@
+"""
+Batch Planner Service
+
+Generates degree plans for a whole cohort against one shared catalog:
+- The catalog is validated and its graphs compiled once per batch
+- Students are fanned out across a process pool (planning is CPU-bound)
+- Results stream back as NDJSON as soon as each chunk completes
+- Parameter sweeps score a grid of plan settings against the same catalog
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from app.config import get_settings
+from app.schemas.plan import (
+    BatchPlanResult,
+    CourseInput,
+    PlanGenerateRequest,
+    PlanSweepRequest,
+    PlanSweepResponse,
+    StudentPlanProfile,
+)
+from app.services.planner_service import (
+    CompiledCatalog,
+    DegreePlannerService,
+    compile_catalog,
+)
+from app.utils.catalog_validation import validate_catalog
+
+settings = get_settings()
+
+# Enough chunks to balance uneven students across workers,
+# few enough that shipping the catalog to each chunk stays cheap.
+CHUNKS_PER_WORKER = 4
+
+
+def plan_students(catalog: CompiledCatalog, students: List[StudentPlanProfile]) -> List[Dict]:
+    """
+    Worker entry point: plan a chunk of students against a compiled catalog.
+
+    Runs inside a pool process, so it must stay a module-level function.
+    """
+    service = DegreePlannerService()
+    results = []
+
+    for student in students:
+        fields = dict(student)
+        student_id = fields.pop("student_id")
+        try:
+            # The profile was validated by the API layer, the catalog once per batch (catalog.issues)
+            request = PlanGenerateRequest.model_construct(courses=catalog.courses, **fields)
+            plan = service.generate_plan(request, catalog=catalog)
+            result = BatchPlanResult(student_id=student_id, plan=plan)
+        except Exception as e:
+            result = BatchPlanResult(student_id=student_id, error=str(e))
+        results.append(result.model_dump(mode="json"))
+
+    return results
+
+
+def sweep_row(
+    catalog: CompiledCatalog,
+    completed: Set[str],
+    topo_order: List[str],
+    max_per_semester: int,
+    priority_courses: Set[str],
+    semester_options: List[int],
+    current_gpa: Optional[float],
+    weekly_work_hours: Optional[int]
+) -> List[Tuple[float, int, str, str]]:
+    """Worker entry point: score one (max load, priority set) row of a sweep."""
+    return DegreePlannerService().evaluate_sweep_row(
+        catalog=catalog,
+        completed=completed,
+        topo_order=topo_order,
+        max_per_semester=max_per_semester,
+        priority_courses=priority_courses,
+        semester_options=semester_options,
+        current_gpa=current_gpa,
+        weekly_work_hours=weekly_work_hours
+    )
+
+
+class BatchPlannerService:
+    """Fans plan generation out over a persistent process pool."""
+
+    def __init__(self):
+        self.max_workers = settings.planner_workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (called on application shutdown)."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @staticmethod
+    def compile_batch_catalog(courses: List[CourseInput]) -> CompiledCatalog:
+        """
+        Validate a batch's catalog once and compile it.
+
+        The findings are kept on the catalog, so each student's plan only
+        checks that student's own inputs. Raises ValueError if the catalog
+        fails validation (a prerequisite cycle fails the whole batch).
+        """
+        report = validate_catalog(courses)
+        if not report.is_valid:
+            raise ValueError("Cannot plan batch: " + "; ".join(report.errors))
+        catalog = compile_catalog(courses)
+        catalog.issues = report.issues
+        return catalog
+
+    async def stream_plans(
+        self,
+        catalog: CompiledCatalog,
+        students: List[StudentPlanProfile]
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield one NDJSON line per student in completion order.
+
+        `catalog` comes from compile_batch_catalog().
+        The final line is a summary: {"done": true, "students": N, "elapsed_ms": T}.
+        """
+        started = time.perf_counter()
+
+        loop = asyncio.get_running_loop()
+        pool = self.get_pool()
+        chunk_size = max(1, -(-len(students) // (self.max_workers * CHUNKS_PER_WORKER)))
+        futures = [
+            loop.run_in_executor(pool, plan_students, catalog, students[i:i + chunk_size])
+            for i in range(0, len(students), chunk_size)
+        ]
+
+        planned = 0
+        try:
+            for next_chunk in asyncio.as_completed(futures):
+                for result in await next_chunk:
+                    planned += 1
+                    yield (json.dumps(result) + "\n").encode()
+        except BrokenProcessPool:
+            # A worker died; drop the pool so the next batch starts fresh
+            self._pool = None
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+
+        summary = {
+            "done": True,
+            "students": planned,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        yield (json.dumps(summary) + "\n").encode()
+
+    async def sweep(self, request: PlanSweepRequest) -> PlanSweepResponse:
+        """
+        Evaluate every (priority set, max load, semesters) combination.
+
+        The catalog is compiled and topologically sorted once for the whole
+        grid; each (priority set, max load) row is scheduled once and scored
+        for all semester counts, with rows running in parallel.
+        Raises ValueError if the catalog fails validation (as /alternatives).
+        """
+        completed = set(request.completed_courses)
+        report = validate_catalog(
+            request.courses,
+            completed=completed,
+            priority={code for priority_set in request.priority_sets for code in priority_set}
+        )
+        if not report.is_valid:
+            raise ValueError("Cannot sweep plans: " + "; ".join(report.errors))
+
+        catalog = compile_catalog(request.courses)
+        topo_order = DegreePlannerService().topological_order(catalog, completed)
+
+        rows = [
+            (
+                catalog, completed, topo_order, max_per_semester, set(priority_set),
+                request.semester_options, request.current_gpa, request.weekly_work_hours,
+            )
+            for priority_set in request.priority_sets
+            for max_per_semester in request.max_courses_options
+        ]
+
+        if len(rows) == 1 or self.max_workers == 1:
+            # Not worth the process round-trip
+            results = [sweep_row(*row) for row in rows]
+        else:
+            loop = asyncio.get_running_loop()
+            pool = self.get_pool()
+            try:
+                results = await asyncio.gather(*[
+                    loop.run_in_executor(pool, sweep_row, *row) for row in rows
+                ])
+            except BrokenProcessPool:
+                self._pool = None
+                raise
+
+        width = len(request.max_courses_options)
+        grid = [results[i:i + width] for i in range(0, len(results), width)]
+
+        return PlanSweepResponse(
+            max_courses_options=request.max_courses_options,
+            semester_options=request.semester_options,
+            priority_sets=request.priority_sets,
+            confidence_score=[[[cell[0] for cell in row] for row in block] for block in grid],
+            unscheduled_count=[[[cell[1] for cell in row] for row in block] for block in grid],
+            burnout_risk=[[[cell[2] for cell in row] for row in block] for block in grid],
+            graduation_risk=[[[cell[3] for cell in row] for row in block] for block in grid],
+        )
+
+
+# Singleton instance
+batch_planner_service = BatchPlannerService()
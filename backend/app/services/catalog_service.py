@@ -0,0 +1,259 @@
+"""
+Catalog Service
+
+Named, versioned course catalogs stored server-side so plan and AI requests
+can send (catalog_id, version) instead of the full course list:
+- Each version is validated once when it is stored
+- Versions are immutable, so compiled copies are cached with plain LRU
+  eviction and never need invalidation
+- Re-uploading identical courses returns the existing version
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from app.config import get_settings
+from app.models.catalog import CatalogVersion
+from app.models.course import Course
+from app.schemas.plan import CourseInput, ValidationIssue
+from app.services.planner_service import CompiledCatalog, compile_catalog
+from app.utils.catalog_validation import validate_catalog
+
+settings = get_settings()
+
+
+@dataclass
+class LoadedCatalog:
+    """A stored catalog version, validated and compiled in memory."""
+    catalog_id: str
+    version: int
+    content_hash: str
+    source: str
+    created_at: datetime
+    compiled: CompiledCatalog
+    course_dicts: List[Dict[str, Any]]  # pre-serialized for AI prompts
+
+    @property
+    def courses(self) -> List[CourseInput]:
+        return self.compiled.courses
+
+
+class CatalogService:
+    """Stores catalog versions and serves compiled copies from an LRU cache."""
+
+    def __init__(self, max_cached: int = settings.catalog_cache_size):
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[Tuple[str, int], LoadedCatalog]" = OrderedDict()
+
+    @staticmethod
+    def content_hash(courses: List[CourseInput]) -> str:
+        """Stable hash of a course list (used to de-duplicate uploads)."""
+        payload = json.dumps([c.model_dump() for c in courses], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def _compile(courses: List[CourseInput]) -> Tuple[CompiledCatalog, List[ValidationIssue]]:
+        """
+        Validate a catalog on its own and compile it.
+
+        Duplicates and prerequisite cycles are rejected: a stored catalog
+        must be plannable for any student.
+        """
+        report = validate_catalog(courses, duplicate_severity="error")
+        if not report.is_valid:
+            raise ValueError("; ".join(report.errors))
+        compiled = compile_catalog(courses)
+        compiled.issues = report.issues
+        return compiled, report.issues
+
+    @staticmethod
+    def _loaded(row: CatalogVersion, compiled: CompiledCatalog) -> LoadedCatalog:
+        return LoadedCatalog(
+            catalog_id=row.catalog_id,
+            version=row.version,
+            content_hash=row.content_hash,
+            source=row.source,
+            created_at=row.created_at,
+            compiled=compiled,
+            course_dicts=row.courses
+        )
+
+    def _remember(self, loaded: LoadedCatalog) -> LoadedCatalog:
+        key = (loaded.catalog_id, loaded.version)
+        self._cache[key] = loaded
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return loaded
+
+    async def _latest_version(self, db: AsyncSession, catalog_id: str) -> Optional[int]:
+        result = await db.execute(
+            select(func.max(CatalogVersion.version)).where(CatalogVersion.catalog_id == catalog_id)
+        )
+        return result.scalar_one_or_none()
+
+    async def _owner(self, db: AsyncSession, catalog_id: str) -> Optional[int]:
+        """user_id of the catalog's first version (None for catalogs stored anonymously)."""
+        result = await db.execute(
+            select(CatalogVersion.user_id)
+            .where(CatalogVersion.catalog_id == catalog_id)
+            .order_by(CatalogVersion.version)
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def create_version(
+        self,
+        db: AsyncSession,
+        catalog_id: str,
+        courses: List[CourseInput],
+        user_id: int,
+        source: str = "upload"
+    ) -> Tuple[CatalogVersion, List[ValidationIssue], bool]:
+        """
+        Store courses as the next version of catalog_id.
+
+        Returns (version row, validation warnings, created). If the courses
+        match the latest version exactly, that version is returned instead.
+        Raises ValueError if the catalog fails validation and PermissionError
+        if its first version was stored by another user.
+        """
+        owner = await self._owner(db, catalog_id)
+        if owner is not None and owner != user_id:
+            raise PermissionError(f"Catalog {catalog_id} belongs to another user")
+
+        compiled, issues = self._compile(courses)
+        digest = self.content_hash(courses)
+
+        latest = await self._latest_version(db, catalog_id)
+        if latest is not None:
+            result = await db.execute(
+                select(CatalogVersion)
+                .options(defer(CatalogVersion.courses))
+                .where(CatalogVersion.catalog_id == catalog_id, CatalogVersion.version == latest)
+            )
+            current = result.scalar_one()
+            if current.content_hash == digest:
+                return current, issues, False
+
+        row = CatalogVersion(
+            catalog_id=catalog_id,
+            version=(latest or 0) + 1,
+            user_id=user_id,
+            courses=[c.model_dump() for c in courses],
+            course_count=len(courses),
+            content_hash=digest,
+            source=source,
+        )
+        db.add(row)
+        await db.flush()
+        await db.refresh(row)
+
+        self._remember(self._loaded(row, compiled))
+        return row, issues, True
+
+    async def snapshot_courses_table(
+        self,
+        db: AsyncSession,
+        catalog_id: str,
+        user_id: int
+    ) -> Tuple[CatalogVersion, List[ValidationIssue], bool]:
+        """Store the current contents of the courses table as a catalog version."""
+        result = await db.execute(select(Course).order_by(Course.code))
+        courses = [
+            CourseInput(code=c.code, name=c.name, credits=c.credits, prerequisites=c.prerequisites or [])
+            for c in result.scalars().all()
+        ]
+        if not courses:
+            raise ValueError("The courses table is empty")
+        return await self.create_version(db, catalog_id, courses, user_id=user_id, source="courses_table")
+
+    async def get(
+        self,
+        db: AsyncSession,
+        catalog_id: str,
+        version: Optional[int] = None
+    ) -> Optional[LoadedCatalog]:
+        """Return a compiled catalog version (latest if version is None), or None."""
+        if version is None:
+            version = await self._latest_version(db, catalog_id)
+            if version is None:
+                return None
+
+        key = (catalog_id, version)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        result = await db.execute(
+            select(CatalogVersion).where(
+                CatalogVersion.catalog_id == catalog_id,
+                CatalogVersion.version == version
+            )
+        )
+        row = result.scalar_one_or_none()
+        if row is None:
+            return None
+
+        courses = [CourseInput.model_validate(c) for c in row.courses]
+        compiled, _ = self._compile(courses)
+        return self._remember(self._loaded(row, compiled))
+
+    async def resolve(
+        self,
+        db: AsyncSession,
+        catalog_id: Optional[str],
+        version: Optional[int] = None
+    ) -> Optional[LoadedCatalog]:
+        """
+        Resolve a request's catalog reference.
+
+        Returns None when no catalog_id was given; raises 404 if it doesn't exist.
+        """
+        if not catalog_id:
+            return None
+        loaded = await self.get(db, catalog_id, version)
+        if loaded is None:
+            label = f"{catalog_id}@{version}" if version else catalog_id
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Catalog {label} not found"
+            )
+        return loaded
+
+    async def list_latest(self, db: AsyncSession) -> List[CatalogVersion]:
+        """Latest version of every catalog (without course payloads)."""
+        latest = (
+            select(CatalogVersion.catalog_id, func.max(CatalogVersion.version).label("version"))
+            .group_by(CatalogVersion.catalog_id)
+            .subquery()
+        )
+        result = await db.execute(
+            select(CatalogVersion)
+            .options(defer(CatalogVersion.courses))
+            .join(latest, (CatalogVersion.catalog_id == latest.c.catalog_id) & (CatalogVersion.version == latest.c.version))
+            .order_by(CatalogVersion.catalog_id)
+        )
+        return list(result.scalars().all())
+
+    async def list_versions(self, db: AsyncSession, catalog_id: str) -> List[CatalogVersion]:
+        """All versions of one catalog, newest first (without course payloads)."""
+        result = await db.execute(
+            select(CatalogVersion)
+            .options(defer(CatalogVersion.courses))
+            .where(CatalogVersion.catalog_id == catalog_id)
+            .order_by(CatalogVersion.version.desc())
+        )
+        return list(result.scalars().all())
+
+
+# Singleton instance
+catalog_service = CatalogService()
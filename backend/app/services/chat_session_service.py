@@ -0,0 +1,280 @@
+"""
+Chat Session Service
+
+Server-side conversation sessions for the Study Buddy and profile chats:
+- The server keeps the transcript, so each turn only sends the new message
+- Prompts are built as a stable prefix (header + summary + transcript so far)
+  that only ever grows at the end; with the model kept loaded, Ollama's
+  prompt cache then re-evaluates just the last exchange instead of the whole
+  conversation
+- Rolling memory: once a transcript passes the summary trigger, its older
+  turns are folded into a running summary by a background worker that only
+  calls Ollama while no request is using it. Prompts carry the summary plus
+  the recent turns, so their size stays bounded without forgetting the start
+- Summaries of signed-in users are stored per user and chat kind
+  (chat_memories), so a new session picks up where the last one left off
+- Transcripts over the hard token cap (summaries falling behind, or no
+  summarizer running) drop their oldest turns down to half the cap
+- Idle sessions expire, and the least recently used go once the store is full
+
+Sessions are per worker and in memory; an unknown id just starts a new session.
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.user import ChatMemory
+from app.utils.token_counter import estimate_tokens
+
+settings = get_settings()
+
+# (summary so far, turns to fold in) -> new summary, or None on failure
+Summarizer = Callable[[str, List[Tuple[str, str]]], Awaitable[Optional[str]]]
+
+
+def _turn_tokens(role: str, content: str) -> int:
+    return estimate_tokens(f"{role.upper()}: {content}\n")
+
+
+@dataclass
+class ChatSession:
+    """One conversation: a fixed header, a summary of older turns, and the recent transcript."""
+    id: str
+    kind: str
+    owner: Optional[int] = None
+    header: str = ""
+    summary: str = ""
+    summarized_turns: int = 0
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    tokens: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+    summarizing: bool = False
+    # Turns of one session run one at a time, so the transcript stays in order
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def add_turn(self, role: str, content: str) -> None:
+        self.turns.append((role, content))
+        self.tokens += _turn_tokens(role, content)
+
+    def transcript(self) -> str:
+        return "".join(f"{role.upper()}: {content}\n" for role, content in self.turns)
+
+    def compact(self, max_tokens: int) -> int:
+        """Drop the oldest turns once over max_tokens, down to half of it; returns turns dropped."""
+        if self.tokens <= max_tokens:
+            return 0
+        dropped = 0
+        while self.turns and self.tokens > max_tokens // 2:
+            role, content = self.turns.pop(0)
+            self.tokens -= _turn_tokens(role, content)
+            dropped += 1
+        return dropped
+
+    def older_turns(self, keep_tokens: int) -> List[Tuple[str, str]]:
+        """The oldest turns, leaving at most keep_tokens of recent ones (and at least one turn)."""
+        tokens = self.tokens
+        count = 0
+        while count < len(self.turns) - 1 and tokens > keep_tokens:
+            tokens -= _turn_tokens(*self.turns[count])
+            count += 1
+        return self.turns[:count]
+
+    def fold(self, older: List[Tuple[str, str]], summary: str) -> None:
+        """Replace the `older` turns at the start of the transcript with summary."""
+        # Hard-cap compaction may have dropped some of them in the meantime
+        for skip in range(len(older) + 1):
+            remaining = older[skip:]
+            if self.turns[:len(remaining)] == remaining:
+                break
+        del self.turns[:len(remaining)]
+        self.tokens = sum(_turn_tokens(role, content) for role, content in self.turns)
+        self.summary = summary
+        self.summarized_turns += len(older)
+
+
+class ChatSessionService:
+    """In-memory LRU store of chat sessions with idle expiry and a background summarizer."""
+
+    def __init__(
+        self,
+        max_sessions: int = settings.chat_session_max,
+        idle_seconds: float = settings.chat_session_idle_seconds,
+        max_tokens: int = settings.chat_session_max_tokens,
+        summary_tokens: int = settings.chat_summary_trigger_tokens
+    ):
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._summarize: Optional[Summarizer] = None
+        self._queue: Optional["asyncio.Queue[ChatSession]"] = None
+        self._summarizer_task: Optional[asyncio.Task] = None
+        self.stats = {
+            "created": 0, "resumed": 0, "evicted": 0, "expired": 0, "compacted": 0,
+            "summarized": 0, "summary_failures": 0, "memories_loaded": 0,
+        }
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.idle_seconds
+        # Oldest-used first, so stop at the first session still in use
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_used >= cutoff:
+                break
+            self._sessions.popitem(last=False)
+            self.stats["expired"] += 1
+
+    def get(self, session_id: Optional[str], kind: str, owner: Optional[int] = None) -> Optional[ChatSession]:
+        """A live session of this kind and owner, or None."""
+        self._expire()
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None or session.kind != kind or session.owner != owner:
+            return None
+        session.last_used = time.monotonic()
+        self._sessions.move_to_end(session.id)
+        return session
+
+    def create(
+        self,
+        kind: str,
+        owner: Optional[int] = None,
+        header: str = "",
+        history: Optional[List[Dict[str, str]]] = None,
+        memory: Optional[ChatMemory] = None
+    ) -> ChatSession:
+        """New session, seeded with the user's stored memory and the client's history (first turn only)."""
+        session = ChatSession(id=uuid.uuid4().hex, kind=kind, owner=owner, header=header)
+        if memory is not None:
+            session.summary = memory.summary or ""
+            session.summarized_turns = memory.summarized_turns or 0
+        for msg in history or []:
+            session.add_turn(msg.get("role", "user"), msg.get("content", ""))
+        self.after_turn(session)
+        self._sessions[session.id] = session
+        self.stats["created"] += 1
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats["evicted"] += 1
+        return session
+
+    async def open(
+        self,
+        session_id: Optional[str],
+        kind: str,
+        owner: Optional[int] = None,
+        header: str = "",
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> ChatSession:
+        """Resume session_id, or start a new session (with the owner's stored memory)."""
+        session = self.get(session_id, kind, owner)
+        if session is not None:
+            self.stats["resumed"] += 1
+            return session
+        memory = await self._load_memory(owner, kind) if owner is not None else None
+        return self.create(kind, owner, header, history, memory)
+
+    def after_turn(self, session: ChatSession) -> None:
+        """Queue summarization past the trigger; drop turns past the hard cap."""
+        if session.tokens > self.summary_tokens and not session.summarizing and self._queue is not None:
+            session.summarizing = True
+            self._queue.put_nowait(session)
+        if session.compact(self.max_tokens):
+            self.stats["compacted"] += 1
+
+    def close(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def info(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "summary_queue": self._queue.qsize() if self._queue is not None else 0,
+            **self.stats,
+        }
+
+    # ============================================
+    # ROLLING MEMORY
+    # ============================================
+
+    async def _load_memory(self, owner: int, kind: str) -> Optional[ChatMemory]:
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(ChatMemory).where(ChatMemory.user_id == owner, ChatMemory.kind == kind)
+                )
+                memory = result.scalar_one_or_none()
+        except Exception as e:
+            print(f"Chat memory load error: {e}")
+            return None
+        if memory is not None:
+            self.stats["memories_loaded"] += 1
+        return memory
+
+    async def _save_memory(self, session: ChatSession) -> None:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ChatMemory).where(ChatMemory.user_id == session.owner, ChatMemory.kind == session.kind)
+            )
+            memory = result.scalar_one_or_none()
+            if memory is None:
+                memory = ChatMemory(user_id=session.owner, kind=session.kind)
+                db.add(memory)
+            memory.summary = session.summary
+            memory.summarized_turns = session.summarized_turns
+            await db.commit()
+
+    async def _summarize_session(self, session: ChatSession) -> None:
+        # Recent turns stay verbatim (up to half the trigger); the rest is folded in
+        older = session.older_turns(self.summary_tokens // 2)
+        if not older:
+            return
+        summary = await self._summarize(session.summary, older)
+        if not summary:
+            self.stats["summary_failures"] += 1
+            return
+        async with session.lock:
+            session.fold(older, summary)
+        self.stats["summarized"] += 1
+        if session.owner is not None:
+            await self._save_memory(session)
+
+    async def _summarize_loop(self) -> None:
+        while True:
+            session = await self._queue.get()
+            try:
+                await self._summarize_session(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["summary_failures"] += 1
+                print(f"Chat summary error: {e}")
+            finally:
+                session.summarizing = False
+
+    def start_summarizer(self, summarize: Summarizer) -> None:
+        """Summarize long transcripts in the background with `summarize`."""
+        self._summarize = summarize
+        if self._summarizer_task is None:
+            self._queue = asyncio.Queue()
+            self._summarizer_task = asyncio.create_task(self._summarize_loop())
+
+    async def stop_summarizer(self) -> None:
+        if self._summarizer_task is not None:
+            self._summarizer_task.cancel()
+            try:
+                await self._summarizer_task
+            except asyncio.CancelledError:
+                pass
+            self._summarizer_task = None
+            self._queue = None
+
+
+# Singleton instance
+chat_session_service = ChatSessionService()
@@ -0,0 +1,186 @@
+"""
+Circuit Breaker
+
+Fast-fail guard around the LLM backend:
+- closed: calls go through; each outcome (failed, slow or fine) is kept for
+  a rolling window of seconds
+- open: once enough calls in the window failed or ran slower than the slow
+  threshold, calls are refused at once, so callers return their canned
+  fallback in milliseconds instead of holding a worker for a timeout
+- half-open: after the open period a few trial calls go through; a
+  success closes the breaker, a failure opens it again
+- A background probe checks the backend while the breaker is open and
+  closes it as soon as the backend answers again
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+settings = get_settings()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Error-rate and latency driven circuit breaker."""
+
+    def __init__(
+        self,
+        name: str,
+        window_seconds: float = settings.llm_breaker_window_seconds,
+        min_calls: int = settings.llm_breaker_min_calls,
+        failure_rate: float = settings.llm_breaker_failure_rate,
+        slow_call_seconds: float = settings.llm_breaker_slow_call_seconds,
+        open_seconds: float = settings.llm_breaker_open_seconds,
+        half_open_calls: int = settings.llm_breaker_half_open_calls
+    ):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.changed_at = time.monotonic()
+        self.reason = ""
+        self._outcomes: Deque[Tuple[float, bool, bool]] = deque()  # (time, failed, slow)
+        self._trials = 0  # Half-open trial calls in flight
+        self._probe_task: Optional[asyncio.Task] = None
+        self.stats = {"opened": 0, "closed": 0, "short_circuited": 0, "probes": 0, "probe_failures": 0}
+
+    def _set_state(self, state: str, reason: str = "") -> None:
+        if state == self.state:
+            return
+        print(f"LLM circuit breaker '{self.name}': {self.state} -> {state}{f' ({reason})' if reason else ''}")
+        self.state = state
+        self.changed_at = time.monotonic()
+        self.reason = reason
+        self._trials = 0
+        if state == OPEN:
+            self.stats["opened"] += 1
+        elif state == CLOSED:
+            self.stats["closed"] += 1
+            self._outcomes.clear()
+
+    def _prune(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend now (counts refused calls)."""
+        if self.state == OPEN and time.monotonic() - self.changed_at >= self.open_seconds:
+            self._set_state(HALF_OPEN, "open period over")
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._trials < self.half_open_calls:
+            self._trials += 1
+            return True
+        self.stats["short_circuited"] += 1
+        return False
+
+    def record(self, ok: bool, seconds: float) -> None:
+        """Outcome of a call that allow() let through."""
+        now = time.monotonic()
+        slow = seconds >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            self._trials = max(0, self._trials - 1)
+            if ok and not slow:
+                self._set_state(CLOSED, "trial call succeeded")
+            else:
+                self._set_state(OPEN, f"trial call {'failed' if not ok else f'took {seconds:.0f}s'}")
+            return
+        if self.state == OPEN:
+            return  # A call from before the breaker opened
+        self._outcomes.append((now, not ok, slow))
+        self._prune(now)
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failed = sum(1 for _, f, _ in self._outcomes if f)
+        slow_calls = sum(1 for _, f, s in self._outcomes if s and not f)
+        if failed / calls >= self.failure_rate:
+            self._set_state(OPEN, f"{failed}/{calls} calls failed in {self.window_seconds:g}s")
+        elif (failed + slow_calls) / calls >= self.failure_rate:
+            self._set_state(OPEN, f"{failed + slow_calls}/{calls} calls failed or took over {self.slow_call_seconds:g}s")
+
+    # ============================================
+    # BACKGROUND PROBE
+    # ============================================
+
+    async def probe_once(self, probe: Callable[[], Awaitable[bool]]) -> bool:
+        """Run probe; if the backend is back, close the breaker."""
+        self.stats["probes"] += 1
+        try:
+            ok = await probe()
+        except Exception:
+            ok = False
+        if ok:
+            self._set_state(CLOSED, "probe succeeded")
+        else:
+            self.stats["probe_failures"] += 1
+        return ok
+
+    async def _probe_loop(self, probe: Callable[[], Awaitable[bool]], interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            if self.state != CLOSED:
+                try:
+                    await self.probe_once(probe)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"LLM circuit breaker probe error: {e}")
+
+    def start_probe(
+        self,
+        probe: Callable[[], Awaitable[bool]],
+        interval: float = settings.llm_breaker_probe_seconds
+    ) -> None:
+        """Probe the backend on a schedule while the breaker is not closed (0 disables it)."""
+        if interval > 0 and self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe_loop(probe, interval))
+
+    async def stop_probe(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def info(self) -> Dict:
+        now = time.monotonic()
+        self._prune(now)
+        calls = len(self._outcomes)
+        failed = sum(1 for _, f, _ in self._outcomes if f)
+        slow = sum(1 for _, f, s in self._outcomes if s and not f)
+        info = {
+            "name": self.name,
+            "state": self.state,
+            "reason": self.reason,
+            "seconds_in_state": round(now - self.changed_at, 1),
+            "window": {
+                "seconds": self.window_seconds,
+                "calls": calls,
+                "failure_rate": round(failed / calls, 3) if calls else 0.0,
+                "slow_rate": round(slow / calls, 3) if calls else 0.0,
+            },
+            "thresholds": {
+                "min_calls": self.min_calls,
+                "failure_rate": self.failure_rate,
+                "slow_call_seconds": self.slow_call_seconds,
+                "open_seconds": self.open_seconds,
+                "half_open_calls": self.half_open_calls,
+            },
+            **self.stats,
+        }
+        if self.state == OPEN:
+            info["half_open_in_seconds"] = round(max(0.0, self.open_seconds - (now - self.changed_at)), 1)
+        return info
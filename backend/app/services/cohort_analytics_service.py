@@ -0,0 +1,349 @@
+"""
+Cohort Analytics Service
+
+Course-level statistics across every saved DegreePlan, for department admins:
+- frequency: share of plans that contain a course
+- average semester placement
+- unscheduled rate (in the plan's course list, but neither scheduled nor completed)
+- bottleneck rate (flagged in the plan's risk factors)
+- graduation delay and burnout risk distribution
+
+On Postgres the aggregation runs in SQL over the JSONB columns. Alembic
+revision 0002 stores its result in two materialized views, refreshed in the
+background every cohort_analytics_refresh_seconds, so reads only touch a
+few rows per course. Without the views the same SQL runs live; other
+databases aggregate the plans in Python.
+"""
+import asyncio
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, engine
+from app.models.plan import DegreePlan
+from app.schemas.analytics import CohortAnalyticsResponse, CohortSort, CourseCohortStats
+
+settings = get_settings()
+
+COURSE_STATS_VIEW = "plan_course_stats"
+RISK_STATS_VIEW = "plan_risk_stats"
+
+# Only one worker refreshes at a time (pg_try_advisory_xact_lock key)
+REFRESH_LOCK_KEY = 0x0DE6_2EE1
+
+BURNOUT_LEVELS = ("Low", "Medium", "High")
+UNKNOWN_RISK = "Unknown"
+
+# The risk factor written by DegreePlannerService._assess_risks
+BOTTLENECK_FACTOR = re.compile(r"^Bottleneck courses \(many dependents\): (.+)$")
+
+# One row per (degree program, course). Must match revision 0002.
+COURSE_STATS_SQL = r"""
+SELECT
+    coalesce(p.degree_program, '') AS degree_program,
+    pc.code AS course_code,
+    count(*) FILTER (WHERE pc.scheduled OR pc.unscheduled) AS plans,
+    count(*) FILTER (WHERE pc.scheduled) AS scheduled_plans,
+    coalesce(sum(pc.semester), 0) AS semester_sum,
+    count(pc.semester) AS semester_count,
+    count(*) FILTER (WHERE pc.unscheduled) AS unscheduled_plans,
+    count(*) FILTER (WHERE pc.bottleneck) AS bottleneck_plans,
+    count(*) FILTER (WHERE (pc.scheduled OR pc.unscheduled) AND p.risk_analysis ->> 'graduation_risk' = 'Delayed') AS delayed_plans,
+    count(*) FILTER (WHERE (pc.scheduled OR pc.unscheduled) AND p.risk_analysis ->> 'burnout_risk' = 'Low') AS burnout_low,
+    count(*) FILTER (WHERE (pc.scheduled OR pc.unscheduled) AND p.risk_analysis ->> 'burnout_risk' = 'Medium') AS burnout_medium,
+    count(*) FILTER (WHERE (pc.scheduled OR pc.unscheduled) AND p.risk_analysis ->> 'burnout_risk' = 'High') AS burnout_high
+FROM degree_plans p
+-- Grouped per plan, so the outer aggregate needs no join or sort over all plan courses
+CROSS JOIN LATERAL (
+    -- Unscheduled: in the plan's course list, but neither scheduled nor completed
+    SELECT code, min(semester) AS semester, bool_or(scheduled) AS scheduled,
+           bool_or(listed) AND NOT bool_or(scheduled) AND NOT bool_or(completed) AS unscheduled,
+           bool_or(bottleneck) AS bottleneck
+    FROM (
+        SELECT c.code, substring(s.key FROM '(\d+)$')::int AS semester,
+               true AS scheduled, false AS listed, false AS completed, false AS bottleneck
+        FROM jsonb_each(CASE WHEN jsonb_typeof(p.semesters) = 'object' THEN p.semesters ELSE '{}' END) s
+        CROSS JOIN LATERAL jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(s.value) = 'array' THEN s.value ELSE '[]' END
+        ) c(code)
+        UNION ALL
+        SELECT d.course ->> 'code', NULL, false, true, false, false
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof(p.courses_data) = 'array' THEN p.courses_data ELSE '[]' END
+        ) d(course)
+        UNION ALL
+        SELECT c.code, NULL, false, false, true, false
+        FROM jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(p.completed_courses) = 'array' THEN p.completed_courses ELSE '[]' END
+        ) c(code)
+        UNION ALL
+        SELECT trim(b.code), NULL, false, false, false, true
+        FROM jsonb_array_elements_text(
+            CASE WHEN jsonb_typeof(p.risk_analysis -> 'risk_factors') = 'array'
+                 THEN p.risk_analysis -> 'risk_factors' ELSE '[]' END
+        ) f(factor)
+        CROSS JOIN LATERAL regexp_split_to_table(
+            substring(f.factor FROM '^Bottleneck courses \(many dependents\): (.+)$'), ','
+        ) b(code)
+    ) flags
+    WHERE code <> ''
+    GROUP BY code
+) pc
+GROUP BY 1, 2
+"""
+
+# One row per (degree program, burnout risk, graduation risk). Must match revision 0002.
+RISK_STATS_SQL = """
+SELECT
+    coalesce(degree_program, '') AS degree_program,
+    coalesce(risk_analysis ->> 'burnout_risk', 'Unknown') AS burnout_risk,
+    coalesce(risk_analysis ->> 'graduation_risk', 'Unknown') AS graduation_risk,
+    count(*) AS plans,
+    now() AS refreshed_at
+FROM degree_plans
+GROUP BY 1, 2, 3
+"""
+
+COUNTERS = (
+    "plans", "scheduled_plans", "semester_sum", "semester_count", "unscheduled_plans",
+    "bottleneck_plans", "delayed_plans", "burnout_low", "burnout_medium", "burnout_high",
+)
+
+
+def _semester_number(key: str) -> Optional[int]:
+    match = re.search(r"(\d+)$", str(key))
+    return int(match.group(1)) if match else None
+
+
+def _plan_course_rows(plan: DegreePlan) -> Iterable[Dict[str, Any]]:
+    """In-Python equivalent of COURSE_STATS_SQL for one plan."""
+    semesters = plan.semesters if isinstance(plan.semesters, dict) else {}
+    completed = set(plan.completed_courses) if isinstance(plan.completed_courses, list) else set()
+    courses_data = plan.courses_data if isinstance(plan.courses_data, list) else []
+    risk = plan.risk_analysis if isinstance(plan.risk_analysis, dict) else {}
+    factors = risk.get("risk_factors") if isinstance(risk.get("risk_factors"), list) else []
+    burnout = risk.get("burnout_risk") or UNKNOWN_RISK
+    delayed = risk.get("graduation_risk") == "Delayed"
+
+    placement: Dict[str, Optional[int]] = {}
+    for key, codes in semesters.items():
+        number = _semester_number(key)
+        for code in codes if isinstance(codes, list) else []:
+            code = str(code)
+            current = placement.get(code)
+            # Earliest numbered semester, like min() over NULLs
+            if current is None or (number is not None and number < current):
+                placement[code] = number
+
+    unscheduled = {
+        course["code"] for course in courses_data
+        if isinstance(course, dict) and course.get("code")
+        and course["code"] not in completed and course["code"] not in placement
+    }
+    bottlenecks = set()
+    for factor in factors:
+        match = BOTTLENECK_FACTOR.match(str(factor))
+        if match:
+            bottlenecks.update(code.strip() for code in match.group(1).split(","))
+
+    for code in (set(placement) | unscheduled | bottlenecks) - {""}:
+        present = code in placement or code in unscheduled
+        semester = placement.get(code)
+        yield {
+            "course_code": code,
+            "plans": int(present),
+            "scheduled_plans": int(code in placement),
+            "semester_sum": semester or 0,
+            "semester_count": int(semester is not None),
+            "unscheduled_plans": int(code in unscheduled),
+            "bottleneck_plans": int(code in bottlenecks),
+            "delayed_plans": int(present and delayed),
+            "burnout_low": int(present and burnout == "Low"),
+            "burnout_medium": int(present and burnout == "Medium"),
+            "burnout_high": int(present and burnout == "High"),
+        }
+
+
+class CohortAnalyticsService:
+    """Aggregates saved plans into per-course cohort statistics."""
+
+    def __init__(self):
+        self._views_exist: Optional[bool] = None
+        self._refresher_task: Optional[asyncio.Task] = None
+
+    async def _views_available(self, db: AsyncSession) -> bool:
+        """Materialized views from revision 0002 present? Checked once per process."""
+        if self._views_exist is None:
+            result = await db.execute(text(f"SELECT to_regclass('{COURSE_STATS_VIEW}') IS NOT NULL"))
+            self._views_exist = bool(result.scalar_one())
+        return self._views_exist
+
+    async def get_cohort(
+        self,
+        db: AsyncSession,
+        degree_program: Optional[str] = None,
+        sort: CohortSort = "frequency",
+        limit: int = 50,
+        min_plans: int = 1
+    ) -> CohortAnalyticsResponse:
+        """Per-course statistics for one degree program's plans (or all plans)."""
+        refreshed_at = None
+        if engine.dialect.name == "postgresql":
+            if await self._views_available(db):
+                course_source, risk_source, source = COURSE_STATS_VIEW, RISK_STATS_VIEW, "view"
+            else:
+                course_source, risk_source, source = f"({COURSE_STATS_SQL}) AS stats", f"({RISK_STATS_SQL}) AS risks", "live"
+            course_rows, risk_rows = await self._query(db, course_source, risk_source, degree_program)
+            if source == "view":
+                refreshed_at = max((row["refreshed_at"] for row in risk_rows), default=None)
+        else:
+            course_rows, risk_rows = await self._aggregate_in_memory(db, degree_program)
+            source = "memory"
+
+        burnout: Dict[str, int] = defaultdict(int)
+        graduation: Dict[str, int] = defaultdict(int)
+        for row in risk_rows:
+            burnout[row["burnout_risk"]] += row["plans"]
+            graduation[row["graduation_risk"]] += row["plans"]
+        total_plans = sum(burnout.values())
+
+        courses = [
+            self._course_stats(row, total_plans) for row in course_rows
+            if max(row["plans"], row["bottleneck_plans"]) >= min_plans
+        ]
+        if sort == "avg_semester":
+            courses.sort(key=lambda c: (c.avg_semester is None, c.avg_semester or 0, c.code))
+        else:
+            courses.sort(key=lambda c: (-getattr(c, sort), -c.plans, c.code))
+
+        return CohortAnalyticsResponse(
+            degree_program=degree_program,
+            total_plans=total_plans,
+            burnout_risk=dict(burnout),
+            graduation_risk=dict(graduation),
+            courses=courses[:limit],
+            sort=sort,
+            source=source,
+            refreshed_at=refreshed_at,
+        )
+
+    @staticmethod
+    def _course_stats(row: Dict[str, Any], total_plans: int) -> CourseCohortStats:
+        plans = row["plans"]
+        return CourseCohortStats(
+            code=row["course_code"],
+            plans=plans,
+            frequency=round(plans / total_plans, 4) if total_plans else 0.0,
+            scheduled_plans=row["scheduled_plans"],
+            avg_semester=round(row["semester_sum"] / row["semester_count"], 2) if row["semester_count"] else None,
+            unscheduled_plans=row["unscheduled_plans"],
+            unscheduled_rate=round(row["unscheduled_plans"] / plans, 4) if plans else 0.0,
+            bottleneck_plans=row["bottleneck_plans"],
+            bottleneck_rate=round(row["bottleneck_plans"] / total_plans, 4) if total_plans else 0.0,
+            delayed_plans=row["delayed_plans"],
+            delayed_rate=round(row["delayed_plans"] / plans, 4) if plans else 0.0,
+            burnout_risk={level: row[f"burnout_{level.lower()}"] for level in BURNOUT_LEVELS},
+        )
+
+    @staticmethod
+    async def _query(
+        db: AsyncSession,
+        course_source: str,
+        risk_source: str,
+        degree_program: Optional[str]
+    ):
+        # Programs are summed here, so the views hold one row per program and course
+        where = "WHERE degree_program = :program" if degree_program is not None else ""
+        params = {"program": degree_program} if degree_program is not None else {}
+        sums = ", ".join(f"sum({name})::bigint AS {name}" for name in COUNTERS)
+        course_result = await db.execute(
+            text(f"SELECT course_code, {sums} FROM {course_source} {where} GROUP BY course_code"), params
+        )
+        risk_result = await db.execute(
+            text(f"SELECT burnout_risk, graduation_risk, sum(plans)::bigint AS plans, max(refreshed_at) AS refreshed_at "
+                 f"FROM {risk_source} {where} GROUP BY burnout_risk, graduation_risk"), params
+        )
+        return [dict(row) for row in course_result.mappings()], [dict(row) for row in risk_result.mappings()]
+
+    @staticmethod
+    async def _aggregate_in_memory(db: AsyncSession, degree_program: Optional[str]):
+        query = select(DegreePlan)
+        if degree_program is not None:
+            query = query.where(DegreePlan.degree_program == degree_program) if degree_program else \
+                query.where((DegreePlan.degree_program.is_(None)) | (DegreePlan.degree_program == ""))
+        result = await db.execute(query)
+
+        courses: Dict[str, Dict[str, Any]] = {}
+        risks: Dict[tuple, int] = defaultdict(int)
+        for plan in result.scalars().all():
+            risk = plan.risk_analysis if isinstance(plan.risk_analysis, dict) else {}
+            risks[(risk.get("burnout_risk") or UNKNOWN_RISK, risk.get("graduation_risk") or UNKNOWN_RISK)] += 1
+            for row in _plan_course_rows(plan):
+                totals = courses.setdefault(row["course_code"], {"course_code": row["course_code"], **{c: 0 for c in COUNTERS}})
+                for counter in COUNTERS:
+                    totals[counter] += row[counter]
+
+        risk_rows = [
+            {"burnout_risk": burnout, "graduation_risk": graduation, "plans": plans}
+            for (burnout, graduation), plans in risks.items()
+        ]
+        return list(courses.values()), risk_rows
+
+    # ==========================================
+    # MATERIALIZED VIEW REFRESH
+    # ==========================================
+
+    async def refresh(self) -> bool:
+        """
+        Refresh both views unless another worker is already doing it.
+
+        CONCURRENTLY keeps the views readable during the refresh (it needs
+        the unique indexes created by revision 0002).
+        """
+        async with AsyncSessionLocal() as db:
+            if not await self._views_available(db):
+                return False
+            locked = (await db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY})).scalar_one()
+            if not locked:
+                return False
+            for view in (COURSE_STATS_VIEW, RISK_STATS_VIEW):
+                await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+            await db.commit()
+            return True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.cohort_analytics_refresh_seconds)
+            started = datetime.utcnow()
+            try:
+                if await self.refresh():
+                    elapsed = (datetime.utcnow() - started).total_seconds()
+                    print(f"Cohort analytics views refreshed in {elapsed:.1f}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cohort analytics refresh error: {e}")
+
+    def start_refresher(self) -> None:
+        """Refresh the views on a schedule (Postgres only; 0 seconds disables it)."""
+        if engine.dialect.name == "postgresql" and settings.cohort_analytics_refresh_seconds > 0 \
+                and self._refresher_task is None:
+            self._refresher_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_refresher(self) -> None:
+        if self._refresher_task is not None:
+            self._refresher_task.cancel()
+            try:
+                await self._refresher_task
+            except asyncio.CancelledError:
+                pass
+            self._refresher_task = None
+
+
+# Singleton instance
+cohort_analytics_service = CohortAnalyticsService()
@@ -0,0 +1,156 @@
+"""
+Course Cache Service
+
+In-memory copy of the courses table for the read endpoints:
+- The catalog is serialized to JSON bytes once per change, not per request
+- Content-hash ETags, so clients can revalidate with If-None-Match (304)
+- Write routes invalidate on write and again once their transaction commits
+- Other workers hear about writes through Postgres LISTEN/NOTIFY (the NOTIFY
+  is sent in the writer's transaction, so it is delivered on commit)
+"""
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import asyncpg
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import engine
+from app.models.course import Course
+from app.schemas.course import CourseResponse
+
+settings = get_settings()
+
+NOTIFY_CHANNEL = "course_catalog_changed"
+RECONNECT_DELAY_SECONDS = 5
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag from response bytes (identical across workers)."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+@dataclass
+class CatalogSnapshot:
+    """One serialized version of the courses table."""
+    version: int
+    body: bytes  # CourseListResponse JSON
+    etag: str
+    courses: Dict[str, Tuple[bytes, str]]  # code -> (CourseResponse JSON, ETag)
+
+
+class CourseCacheService:
+    """Serves the courses table from memory until a write invalidates it."""
+
+    def __init__(self):
+        self.version = 0
+        self.listening = False
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def uses_notify(self) -> bool:
+        return engine.dialect.name == "postgresql"
+
+    def invalidate_local(self, *_) -> None:
+        """Drop this worker's snapshot (also used as an after_commit hook)."""
+        self.version += 1
+        self._snapshot = None
+
+    async def invalidate(self, db: AsyncSession) -> None:
+        """
+        Invalidate after writing courses in db (call before it commits).
+
+        Readers may reload the not-yet-committed state in between, so the
+        snapshot is dropped again when the session commits.
+        """
+        self.invalidate_local()
+        event.listen(db.sync_session, "after_commit", self.invalidate_local, once=True)
+        if self.uses_notify:
+            await db.execute(select(func.pg_notify(NOTIFY_CHANNEL, str(os.getpid()))))
+
+    async def get(self, db: AsyncSession) -> CatalogSnapshot:
+        """Current snapshot, loading it from the database if needed."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+
+        async with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            version = self.version
+            snapshot = await self._load(db, version)
+            # Without a live listener other workers' writes would go unnoticed
+            trusted = self.listening or not self.uses_notify
+            if trusted and version == self.version:
+                self._snapshot = snapshot
+            return snapshot
+
+    @staticmethod
+    async def _load(db: AsyncSession, version: int) -> CatalogSnapshot:
+        result = await db.execute(select(Course).order_by(Course.code))
+        parts = []
+        courses = {}
+        for course in result.scalars().all():
+            body = CourseResponse.model_validate(course).model_dump_json().encode()
+            parts.append(body)
+            courses[course.code] = (body, make_etag(body))
+
+        # Same bytes CourseListResponse.model_dump_json() would produce
+        body = b'{"courses":[' + b",".join(parts) + b'],"total":' + str(len(parts)).encode() + b"}"
+        return CatalogSnapshot(version=version, body=body, etag=make_etag(body), courses=courses)
+
+    # ==========================================
+    # CROSS-WORKER INVALIDATION (LISTEN/NOTIFY)
+    # ==========================================
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        if payload != str(os.getpid()):  # our own writes already invalidated on commit
+            self.invalidate_local()
+
+    async def _listen(self) -> None:
+        """Hold a LISTEN connection open, reconnecting if it drops."""
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(settings.database_url)
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                # Anything may have changed while we weren't listening
+                self.invalidate_local()
+                self.listening = True
+                await closed.wait()
+                print("Course cache listener disconnected, reconnecting...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Course cache listener error: {e}")
+            finally:
+                self.listening = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    def start_listener(self) -> None:
+        """Start listening for other workers' writes (Postgres only)."""
+        if self.uses_notify and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen())
+
+    async def stop_listener(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+
+# Singleton instance
+course_cache_service = CourseCacheService()
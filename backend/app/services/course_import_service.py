@@ -0,0 +1,436 @@
+"""
+Course Import Service
+
+Bulk course ingestion in a handful of round trips instead of one SELECT +
+one refresh per course:
+- Chunked INSERT ... ON CONFLICT (code) DO NOTHING / DO UPDATE ... RETURNING
+- COPY into a temp table + a single INSERT ... SELECT for very large imports
+- Per-row created / updated / skipped status, in request order
+- Streaming CSV / XLSX file import: rows are parsed, normalized and
+  upserted batch by batch, with NDJSON progress and row-level errors
+"""
+import asyncio
+import csv
+import io
+import json
+import re
+import time
+from datetime import datetime
+from itertools import islice
+from typing import IO, Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Sequence, Tuple
+
+from openpyxl import load_workbook
+from pydantic import ValidationError
+
+from sqlalchemy import Column, Integer, JSON, MetaData, String, Table, Text, cast, literal_column, or_, select, text
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.course import Course
+from app.schemas.course import CourseCreate, CourseRowStatus
+from app.services.course_cache_service import course_cache_service
+from app.services.prerequisite_graph_service import prerequisite_graph_service
+
+settings = get_settings()
+
+# Columns written by an import (id is generated)
+IMPORT_COLUMNS = ["code", "name", "credits", "prerequisites", "semester_offered", "difficulty_weight", "description"]
+UPDATABLE_COLUMNS = IMPORT_COLUMNS[1:]
+
+# Session-local staging table for the COPY path (kept out of Base.metadata)
+_staging = Table(
+    "course_import_staging",
+    MetaData(),
+    Column("position", Integer),
+    Column("code", String(20)),
+    Column("name", String(200)),
+    Column("credits", Integer),
+    Column("prerequisites", JSON),
+    Column("semester_offered", String(20)),
+    Column("difficulty_weight", Integer),
+    Column("description", Text),
+)
+
+STAGING_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS course_import_staging (
+    position integer,
+    code varchar(20),
+    name varchar(200),
+    credits integer,
+    prerequisites json,
+    semester_offered varchar(20),
+    difficulty_weight integer,
+    description text
+) ON COMMIT DROP
+"""
+
+
+# File header (lowercased, spaces -> _) -> course column
+HEADER_ALIASES = {
+    "code": "code", "course_code": "code", "course_id": "code", "course": "code",
+    "name": "name", "course_name": "name", "title": "name",
+    "credits": "credits", "credit": "credits", "credit_hours": "credits",
+    "prerequisites": "prerequisites", "prerequisite": "prerequisites", "prereqs": "prerequisites",
+    "semester_offered": "semester_offered", "semester": "semester_offered", "offered": "semester_offered",
+    "difficulty": "difficulty_weight", "difficulty_weight": "difficulty_weight",
+    "description": "description",
+}
+REQUIRED_HEADERS = ("code", "name")
+
+# Text difficulty labels -> difficulty_weight (1-5)
+DIFFICULTY_LABELS = {"easy": 1, "light": 1, "medium": 3, "moderate": 3, "hard": 5, "heavy": 5}
+SEMESTER_LABELS = {"fall": "Fall", "spring": "Spring", "both": "Both"}
+
+# Prerequisite lists may be separated by ; | or ,
+PREREQUISITE_SEPARATORS = re.compile(r"[;|,]")
+
+# Row errors streamed before the rest are only counted
+MAX_ERROR_LINES = 1000
+
+
+def normalize_code(value: Any) -> str:
+    """Course code as stored: no whitespace, uppercase ("cs 101" -> "CS101")."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # spreadsheets turn numeric codes into floats
+    return re.sub(r"\s+", "", str(value)).upper()
+
+
+def parse_prerequisites(value: Any, code: str = "") -> List[str]:
+    """Split a prerequisite cell into normalized, de-duplicated codes."""
+    if value is None:
+        return []
+    prerequisites = []
+    for part in PREREQUISITE_SEPARATORS.split(str(value)):
+        prereq = normalize_code(part)
+        if prereq and prereq != code and prereq not in prerequisites:
+            prerequisites.append(prereq)
+    return prerequisites
+
+
+def course_from_row(row: Dict[str, Any]) -> CourseCreate:
+    """
+    Build a course from one file row (keys are course columns).
+
+    Raises ValueError with a readable message if the row is invalid.
+    """
+    code = normalize_code(row.get("code") or "")
+    data = {"code": code, "name": str(row.get("name") or "").strip()}
+
+    if row.get("credits") not in (None, ""):
+        data["credits"] = row["credits"]
+    data["prerequisites"] = parse_prerequisites(row.get("prerequisites"), code)
+
+    semester = str(row.get("semester_offered") or "").strip()
+    if semester:
+        if len(semester) > 20:
+            raise ValueError("semester_offered: at most 20 characters")
+        data["semester_offered"] = SEMESTER_LABELS.get(semester.lower(), semester)
+
+    difficulty = row.get("difficulty_weight")
+    if isinstance(difficulty, str):
+        difficulty = difficulty.strip()
+        difficulty = DIFFICULTY_LABELS.get(difficulty.lower(), difficulty)
+    if difficulty not in (None, ""):
+        data["difficulty_weight"] = difficulty
+
+    description = str(row.get("description") or "").strip()
+    if description:
+        data["description"] = description
+
+    try:
+        return CourseCreate(**data)
+    except ValidationError as e:
+        raise ValueError("; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}" for err in e.errors()
+        ))
+
+
+def _map_header(header: Sequence[Any]) -> List[Optional[str]]:
+    """Course column for each file column (None for columns we don't import)."""
+    columns = [
+        HEADER_ALIASES.get(re.sub(r"\s+", "_", str(h or "").strip().lower()))
+        for h in header
+    ]
+    missing = [name for name in REQUIRED_HEADERS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    return columns
+
+
+def _rows(columns: List[Optional[str]], values: Iterator[Sequence[Any]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (1-based file row number, row dict), skipping blank rows."""
+    for row_number, row in enumerate(values, start=2):
+        if not any(v not in (None, "") and str(v).strip() for v in row):
+            continue
+        yield row_number, {
+            column: value for column, value in zip(columns, row)
+            if column is not None
+        }
+
+
+def read_course_file(file: IO[bytes], filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Open a CSV or XLSX course file for row-by-row reading.
+
+    The header is read (and validated) immediately; rows are only read as
+    the returned iterator is consumed, so memory stays flat regardless of
+    file size. Raises ValueError for unsupported files or missing columns.
+    """
+    lower_filename = filename.lower()
+    if lower_filename.endswith(".csv"):
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        values = csv.reader(text)
+    elif lower_filename.endswith(".xlsx"):
+        try:
+            workbook = load_workbook(file, read_only=True, data_only=True)
+        except Exception as e:
+            raise ValueError(f"Failed to open XLSX file: {e}")
+        values = workbook.active.iter_rows(values_only=True)
+    else:
+        raise ValueError(f"Unsupported file type: {filename}. Only CSV and XLSX are supported.")
+
+    try:
+        header = next(values)
+    except StopIteration:
+        raise ValueError("The file is empty")
+    except UnicodeDecodeError:
+        raise ValueError("CSV files must be UTF-8 encoded")
+    return _rows(_map_header(header), values)
+
+
+def _line(payload: Dict[str, Any]) -> bytes:
+    return (json.dumps(payload) + "\n").encode()
+
+
+class CourseImportService:
+    """Upserts courses in chunks (or via COPY) and reports per-row status."""
+
+    def __init__(self):
+        self.chunk_size = settings.course_import_chunk_size
+        self.copy_threshold = settings.course_import_copy_threshold
+
+    @staticmethod
+    def _prepare(courses: Sequence[CourseCreate]) -> Tuple[List[Dict], Dict[int, str]]:
+        """
+        Normalize codes and drop repeats within the request.
+
+        Returns (rows to write, {input index: code} for dropped repeats).
+        The first occurrence of a code wins.
+        """
+        rows = []
+        repeats = {}
+        seen = set()
+        for index, course in enumerate(courses):
+            code = course.code.strip().upper()
+            if code in seen:
+                repeats[index] = code
+                continue
+            seen.add(code)
+            rows.append({
+                "code": code,
+                "name": course.name,
+                "credits": course.credits,
+                "prerequisites": course.prerequisites,
+                "semester_offered": course.semester_offered,
+                "difficulty_weight": course.difficulty_weight,
+                "description": course.description,
+            })
+        return rows, repeats
+
+    @staticmethod
+    def _on_conflict(stmt, on_conflict: str):
+        """Attach the ON CONFLICT clause; updates only touch rows that changed."""
+        if on_conflict == "skip":
+            return stmt.on_conflict_do_nothing(index_elements=[Course.code])
+
+        excluded = stmt.excluded
+        changed = or_(*[
+            # json has no equality operator, compare as jsonb
+            cast(getattr(Course, col), JSONB).is_distinct_from(cast(excluded[col], JSONB))
+            if col == "prerequisites"
+            else getattr(Course, col).is_distinct_from(excluded[col])
+            for col in UPDATABLE_COLUMNS
+        ])
+        return stmt.on_conflict_do_update(
+            index_elements=[Course.code],
+            set_={col: excluded[col] for col in UPDATABLE_COLUMNS},
+            where=changed
+        )
+
+    async def _execute(self, db: AsyncSession, stmt, on_conflict: str) -> List[Tuple[Course, bool]]:
+        # xmax = 0 only for freshly inserted rows; skipped rows aren't returned at all
+        stmt = self._on_conflict(stmt, on_conflict).returning(Course, literal_column("xmax = 0"))
+        result = await db.execute(stmt, execution_options={"populate_existing": True})
+        return [(course, inserted) for course, inserted in result.all()]
+
+    async def _upsert_values(self, db: AsyncSession, rows: List[Dict], on_conflict: str) -> List[Tuple[Course, bool]]:
+        """One multi-row INSERT ... ON CONFLICT ... RETURNING per chunk."""
+        created_at = datetime.utcnow()
+        returned = []
+        for start in range(0, len(rows), self.chunk_size):
+            chunk = [dict(row, created_at=created_at) for row in rows[start:start + self.chunk_size]]
+            returned.extend(await self._execute(db, pg_insert(Course).values(chunk), on_conflict))
+        return returned
+
+    async def _upsert_copy(self, db: AsyncSession, rows: List[Dict], on_conflict: str) -> List[Tuple[Course, bool]]:
+        """COPY rows into a temp table, then one INSERT ... SELECT ... ON CONFLICT."""
+        # DDL goes through the session so it runs inside the open transaction
+        await db.execute(text(STAGING_DDL))
+        await db.execute(text("TRUNCATE course_import_staging"))
+
+        connection = await db.connection()
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection  # asyncpg connection
+        await driver.copy_records_to_table(
+            "course_import_staging",
+            records=[
+                (position, row["code"], row["name"], row["credits"], json.dumps(row["prerequisites"]),
+                 row["semester_offered"], row["difficulty_weight"], row["description"])
+                for position, row in enumerate(rows)
+            ],
+            columns=["position"] + IMPORT_COLUMNS,
+        )
+
+        source = select(
+            *[_staging.c[col] for col in IMPORT_COLUMNS],
+            literal_column("timezone('utc', now())")
+        ).order_by(_staging.c.position)
+        stmt = pg_insert(Course).from_select(IMPORT_COLUMNS + ["created_at"], source)
+        return await self._execute(db, stmt, on_conflict)
+
+    async def upsert_courses(
+        self,
+        db: AsyncSession,
+        courses: Sequence[CourseCreate],
+        on_conflict: Literal["skip", "update"] = "skip",
+        use_copy: Optional[bool] = None
+    ) -> Tuple[List[Course], List[CourseRowStatus]]:
+        """
+        Insert courses, skipping or updating codes that already exist.
+
+        Returns (created/updated courses, per-row status in request order).
+        The prerequisite edges of written courses are synced as well.
+        COPY is used when use_copy is True, or by default above
+        course_import_copy_threshold rows.
+        """
+        rows, repeats = self._prepare(courses)
+        if use_copy is None:
+            use_copy = len(rows) >= self.copy_threshold
+
+        if not rows:
+            returned = []
+        elif use_copy:
+            returned = await self._upsert_copy(db, rows, on_conflict)
+        else:
+            returned = await self._upsert_values(db, rows, on_conflict)
+
+        await prerequisite_graph_service.sync(db, [course for course, _ in returned])
+        outcome = {course.code: "created" if inserted else "updated" for course, inserted in returned}
+
+        results = []
+        for index, course in enumerate(courses):
+            if index in repeats:
+                results.append(CourseRowStatus(code=repeats[index], status="skipped", reason="Duplicate code in request"))
+                continue
+            code = course.code.strip().upper()
+            status = outcome.get(code)
+            if status:
+                results.append(CourseRowStatus(code=code, status=status))
+            elif on_conflict == "skip":
+                results.append(CourseRowStatus(code=code, status="skipped", reason="Already exists"))
+            else:
+                results.append(CourseRowStatus(code=code, status="skipped", reason="Unchanged"))
+
+        return [course for course, _ in returned], results
+
+    async def _missing_prerequisites(self, db: AsyncSession, codes: List[str]) -> List[str]:
+        """Codes from the list that are not in the courses table."""
+        found = set()
+        for start in range(0, len(codes), self.chunk_size):
+            chunk = codes[start:start + self.chunk_size]
+            result = await db.execute(select(Course.code).where(Course.code.in_(chunk)))
+            found.update(result.scalars().all())
+        return [code for code in codes if code not in found]
+
+    async def stream_file_import(
+        self,
+        rows: Iterator[Tuple[int, Dict[str, Any]]],
+        on_conflict: Literal["skip", "update"] = "skip"
+    ) -> AsyncIterator[bytes]:
+        """
+        Import rows from read_course_file, yielding NDJSON lines.
+
+        Lines are {"row", "code", "error"} for rejected rows and duplicate
+        codes (the first MAX_ERROR_LINES only), {"progress": {...}} after
+        each batch, and a final {"done": true, ...} summary. Each batch is committed as it
+        lands, so a failure late in a large file keeps the earlier batches.
+        Uses its own session: the request's session is closed before a
+        streaming response body runs.
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        counts = {"rows": 0, "created": 0, "updated": 0, "skipped": 0, "errors": 0}
+        first_seen: Dict[str, int] = {}
+        referenced = set()
+        reported = 0
+
+        async with AsyncSessionLocal() as db:
+            while True:
+                # File reads (possibly from a disk-spooled upload) stay off the event loop
+                raw = await loop.run_in_executor(None, lambda: list(islice(rows, self.chunk_size)))
+                if not raw:
+                    break
+
+                batch = []
+                rejected = []
+                for row_number, row in raw:
+                    counts["rows"] += 1
+                    try:
+                        course = course_from_row(row)
+                    except ValueError as e:
+                        counts["errors"] += 1
+                        rejected.append({"row": row_number, "code": normalize_code(row.get("code") or "") or None, "error": str(e)})
+                        continue
+                    if course.code in first_seen:
+                        counts["skipped"] += 1
+                        rejected.append({"row": row_number, "code": course.code, "error": f"Duplicate code (first seen on row {first_seen[course.code]})"})
+                        continue
+                    first_seen[course.code] = row_number
+                    referenced.update(course.prerequisites)
+                    batch.append(course)
+
+                for payload in rejected[:max(0, MAX_ERROR_LINES - reported)]:
+                    yield _line(payload)
+                reported += len(rejected)
+
+                try:
+                    # COPY beats multi-row VALUES even at batch size
+                    written, results = await self.upsert_courses(db, batch, on_conflict=on_conflict, use_copy=True)
+                    if written:
+                        await course_cache_service.invalidate(db)
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    yield _line({"done": False, "error": f"Import failed: {e}", **counts})
+                    return
+
+                for result in results:
+                    counts[result.status] += 1
+                yield _line({"progress": dict(counts)})
+
+            missing = await self._missing_prerequisites(
+                db, sorted(code for code in referenced if code not in first_seen)
+            )
+
+        yield _line({
+            "done": True,
+            **counts,
+            "unknown_prerequisites": missing,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+
+
+# Singleton instance
+course_import_service = CourseImportService()
@@ -0,0 +1,300 @@
+"""
+Course Search Service
+
+Ranked, paginated course search over code, name and description:
+- prefix: code prefix ("CS2") and word prefixes in name/description ("algo")
+- fuzzy: typo-tolerant trigram matching on code and name ("algoritms")
+- fulltext: stemmed full-text match on name and description
+- auto (default): any of the above
+
+Uses pg_trgm / tsvector GIN indexes (see migrate_course_search.py) when the
+pg_trgm extension is installed, otherwise an in-memory trigram index built
+from the courses table (SQLite in tests, or before the migration has run).
+"""
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Set, Tuple
+
+from sqlalchemy import Float, case, func, literal, literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.models.course import Course
+from app.schemas.course import CourseResponse, CourseSearchHit, CourseSearchResponse
+from app.services.course_cache_service import course_cache_service
+from app.services.course_import_service import normalize_code
+
+SearchMode = Literal["auto", "prefix", "fuzzy", "fulltext"]
+
+# Must match the expression indexed by migrate_course_search.py
+SEARCH_DOCUMENT = "to_tsvector('english', code || ' ' || name || ' ' || coalesce(description, ''))"
+
+# pg_trgm's default word_similarity threshold (0.6) misses common typos
+WORD_SIMILARITY_THRESHOLD = 0.4
+SIMILARITY_THRESHOLD = 0.3
+
+# Score components shared by both backends
+EXACT_CODE_SCORE = 3.0
+CODE_PREFIX_SCORE = 2.0
+
+
+def _tokens(query: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", query.lower())
+
+
+def trigrams(value: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word padded with two leading and one trailing space."""
+    grams = set()
+    for word in _tokens(value):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    """Shared trigrams over all trigrams (pg_trgm similarity())."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class _IndexedCourse:
+    course: CourseResponse
+    code_grams: Set[str]
+    word_grams: List[Set[str]]  # per word of the name
+    words: Set[str]  # name + description tokens
+
+
+class MemoryCourseIndex:
+    """Trigram / token index over a snapshot of the courses table."""
+
+    def __init__(self, courses: List[CourseResponse], version: int):
+        self.version = version
+        self.entries: List[_IndexedCourse] = []
+        self.by_trigram: Dict[str, Set[int]] = {}
+        self.by_word: Dict[str, Set[int]] = {}
+        for position, course in enumerate(courses):
+            entry = _IndexedCourse(
+                course=course,
+                code_grams=trigrams(course.code),
+                word_grams=[trigrams(word) for word in _tokens(course.name)],
+                words=set(_tokens(f"{course.name} {course.description or ''}")),
+            )
+            self.entries.append(entry)
+            for gram in entry.code_grams.union(*entry.word_grams):
+                self.by_trigram.setdefault(gram, set()).add(position)
+            for word in entry.words:
+                self.by_word.setdefault(word, set()).add(position)
+        # Sorted keys for prefix lookups
+        self.codes = sorted((entry.course.code, position) for position, entry in enumerate(self.entries))
+        self.vocabulary = sorted(self.by_word)
+
+    def _fuzzy_score(self, entry: _IndexedCourse, query_grams: Set[str], word_grams: List[Set[str]]) -> float:
+        code_score = similarity(query_grams, entry.code_grams)
+        # Approximates word_similarity(): best match of each query word within the name
+        if word_grams and entry.word_grams:
+            name_score = sum(
+                max(similarity(grams, candidate) for candidate in entry.word_grams)
+                for grams in word_grams
+            ) / len(word_grams)
+        else:
+            name_score = 0.0
+        return max(code_score, name_score)
+
+    def _prefix_candidates(self, code: str, tokens: List[str]) -> Set[int]:
+        """Courses whose code starts with code, or with a word starting with every token."""
+        candidates = set()
+        if code:
+            start = bisect_left(self.codes, (code,))
+            for course_code, position in self.codes[start:]:
+                if not course_code.startswith(code):
+                    break
+                candidates.add(position)
+        word_matches = None
+        for token in tokens:
+            positions = set()
+            for word in self.vocabulary[bisect_left(self.vocabulary, token):]:
+                if not word.startswith(token):
+                    break
+                positions.update(self.by_word[word])
+            word_matches = positions if word_matches is None else word_matches & positions
+        return candidates | (word_matches or set())
+
+    def _fulltext_candidates(self, tokens: List[str]) -> Set[int]:
+        """Courses whose name or description contains every token."""
+        if not tokens:
+            return set()
+        return set.intersection(*(self.by_word.get(token, set()) for token in tokens))
+
+    def _fuzzy_candidates(self, query_grams: Set[str]) -> Set[int]:
+        """Courses sharing at least one trigram with the query (code or name)."""
+        candidates = set()
+        for gram in query_grams:
+            candidates.update(self.by_trigram.get(gram, ()))
+        return candidates
+
+    def search(self, query: str, mode: SearchMode) -> List[Tuple[float, CourseResponse]]:
+        code = normalize_code(query)
+        tokens = _tokens(query)
+        query_grams = trigrams(query)
+        word_grams = [trigrams(token) for token in tokens]
+
+        candidates = set()
+        if mode in ("auto", "prefix"):
+            candidates |= self._prefix_candidates(code, tokens)
+        if mode in ("auto", "fulltext"):
+            candidates |= self._fulltext_candidates(tokens)
+        if mode in ("auto", "fuzzy"):
+            candidates |= self._fuzzy_candidates(query_grams)
+
+        hits = []
+        for position in candidates:
+            entry = self.entries[position]
+            course_code = entry.course.code
+            code_score = (
+                EXACT_CODE_SCORE if course_code == code
+                else CODE_PREFIX_SCORE if code and course_code.startswith(code)
+                else 0.0
+            )
+            matched_prefix = tokens and all(
+                any(word.startswith(token) for word in entry.words) for token in tokens
+            )
+            matched_fulltext = tokens and all(token in entry.words for token in tokens)
+            fuzzy = self._fuzzy_score(entry, query_grams, word_grams)
+
+            matches = {
+                "prefix": code_score > 0 or matched_prefix,
+                "fulltext": matched_fulltext,
+                "fuzzy": fuzzy >= WORD_SIMILARITY_THRESHOLD,
+            }
+            if not (any(matches.values()) if mode == "auto" else matches[mode]):
+                continue
+
+            text_score = 0.1 if matched_fulltext else 0.05 if matched_prefix else 0.0
+            hits.append((code_score + text_score + fuzzy, entry.course))
+
+        hits.sort(key=lambda hit: (-hit[0], hit[1].code))
+        return hits
+
+
+class CourseSearchService:
+    """Searches courses through Postgres indexes, or in memory as a fallback."""
+
+    def __init__(self):
+        self._use_postgres: Optional[bool] = None
+        self._memory_index: Optional[MemoryCourseIndex] = None
+
+    async def _postgres_available(self, db: AsyncSession) -> bool:
+        """pg_trgm installed? Checked once per process."""
+        if self._use_postgres is None:
+            if engine.dialect.name != "postgresql":
+                self._use_postgres = False
+            else:
+                result = await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+                self._use_postgres = result.scalar_one_or_none() is not None
+        return self._use_postgres
+
+    async def search(
+        self,
+        db: AsyncSession,
+        query: str,
+        mode: SearchMode = "auto",
+        limit: int = 20,
+        offset: int = 0
+    ) -> CourseSearchResponse:
+        """Ranked page of courses matching query."""
+        if await self._postgres_available(db):
+            hits, total = await self._search_postgres(db, query, mode, limit, offset)
+            backend = "postgres"
+        else:
+            hits, total = await self._search_memory(db, query, mode, limit, offset)
+            backend = "memory"
+
+        return CourseSearchResponse(
+            query=query,
+            mode=mode,
+            results=[CourseSearchHit(**course.model_dump(), score=round(score, 4)) for score, course in hits],
+            total=total,
+            limit=limit,
+            offset=offset,
+            backend=backend,
+        )
+
+    async def _search_postgres(
+        self,
+        db: AsyncSession,
+        query: str,
+        mode: SearchMode,
+        limit: int,
+        offset: int
+    ) -> Tuple[List[Tuple[float, CourseResponse]], int]:
+        code = normalize_code(query)
+        tokens = _tokens(query)
+        document = literal_column(SEARCH_DOCUMENT)
+        # Tokens are [a-z0-9]+ so they are safe to splice into tsquery syntax
+        prefix_query = func.to_tsquery(literal_column("'english'"), " & ".join(f"{t}:*" for t in tokens))
+        full_query = func.to_tsquery(literal_column("'english'"), " & ".join(tokens))
+
+        code_prefix = Course.code.startswith(code, autoescape=True)
+        conditions = {
+            "prefix": [code_prefix, document.op("@@")(prefix_query)] if tokens else [code_prefix],
+            "fulltext": [document.op("@@")(full_query)] if tokens else [],
+            "fuzzy": [Course.code.op("%")(code), literal(query).op("<%")(Course.name)],
+        }
+        if mode == "auto":
+            matches = conditions["prefix"] + conditions["fulltext"] + conditions["fuzzy"]
+        else:
+            matches = conditions[mode]
+        if not matches:
+            return [], 0
+
+        score = (
+            case((Course.code == code, EXACT_CODE_SCORE), (code_prefix, CODE_PREFIX_SCORE), else_=0.0)
+            + (func.ts_rank(document, prefix_query) if tokens else literal(0.0))
+            + func.greatest(func.similarity(Course.code, code), func.word_similarity(query, Course.name))
+        ).cast(Float).label("score")
+
+        await db.execute(
+            text("SELECT set_config('pg_trgm.word_similarity_threshold', :w, true), "
+                 "set_config('pg_trgm.similarity_threshold', :s, true)"),
+            {"w": str(WORD_SIMILARITY_THRESHOLD), "s": str(SIMILARITY_THRESHOLD)}
+        )
+        result = await db.execute(
+            select(Course, score, func.count().over().label("total"))
+            .where(or_(*matches))
+            .order_by(score.desc(), Course.code)
+            .limit(limit)
+            .offset(offset)
+        )
+        rows = result.all()
+        if not rows:
+            # count(*) OVER () is only available on a non-empty page
+            if offset == 0:
+                return [], 0
+            total = (await db.execute(select(func.count()).select_from(Course).where(or_(*matches)))).scalar_one()
+            return [], total
+        return [(row.score, CourseResponse.model_validate(row.Course)) for row in rows], rows[0].total
+
+    async def _search_memory(
+        self,
+        db: AsyncSession,
+        query: str,
+        mode: SearchMode,
+        limit: int,
+        offset: int
+    ) -> Tuple[List[Tuple[float, CourseResponse]], int]:
+        # Rebuilt whenever a course write bumps the cache version
+        version = course_cache_service.version
+        if self._memory_index is None or self._memory_index.version != version:
+            result = await db.execute(select(Course).order_by(Course.code))
+            courses = [CourseResponse.model_validate(c) for c in result.scalars().all()]
+            self._memory_index = MemoryCourseIndex(courses, version)
+
+        hits = self._memory_index.search(query, mode)
+        return hits[offset:offset + limit], len(hits)
+
+
+# Singleton instance
+course_search_service = CourseSearchService()
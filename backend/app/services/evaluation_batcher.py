@@ -0,0 +1,150 @@
+"""
+Evaluation Batcher
+
+Micro-batching of concurrent answer grading (/api/practice/evaluate):
+- Grading requests that arrive within window_seconds of each other are
+  graded by one LLM call: the prompt carries the scoring rules once and
+  each request's answers under its own ID, and the parsed reply is handed
+  back to each waiting request
+- A batch is sent before the window closes once it holds max_batch
+  requests, or when one more request would push the prompt or the expected
+  reply past the token budget (num_ctx / num_predict of the batch profile)
+- A request still alone when the window closes is graded on its own
+
+With window_seconds = 0 every request is graded on its own at once.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import get_settings
+from app.utils.token_counter import estimate_tokens
+
+settings = get_settings()
+
+# Reply tokens expected per graded answer (score, verdict, one-line feedback)
+# and per request (its ID and next steps); used for the num_predict budget
+FEEDBACK_TOKENS_PER_ANSWER = 60
+REPLY_TOKENS_PER_REQUEST = 50
+
+
+@dataclass
+class GradingRequest:
+    """One /api/practice/evaluate submission waiting to be graded."""
+    topic: str
+    question_type: str
+    answers: List[Dict]
+    body: str  # The request's part of a batch prompt (topic, type, answers)
+    prompt_tokens: int = 0
+    reply_tokens: int = 0
+    queued_at: float = 0.0
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self.prompt_tokens = estimate_tokens(self.body)
+        self.reply_tokens = len(self.answers) * FEEDBACK_TOKENS_PER_ANSWER + REPLY_TOKENS_PER_REQUEST
+
+
+# Grades a batch; one result (or None on failure) per request, in order
+BatchGrader = Callable[[List[GradingRequest]], Awaitable[List[Optional[Dict]]]]
+
+
+class EvaluationBatcher:
+    """Collects concurrent grading requests into shared LLM calls."""
+
+    def __init__(
+        self,
+        grade: BatchGrader,
+        max_prompt_tokens: int,
+        max_reply_tokens: int,
+        window_seconds: float = settings.grading_batch_window_seconds,
+        max_batch: int = settings.grading_batch_max_requests
+    ):
+        self.grade_batch = grade
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_reply_tokens = max_reply_tokens
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._pending: List[GradingRequest] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._wait_seconds = 0.0
+        self.stats = {
+            "requests": 0,
+            "calls": 0,
+            "batched_requests": 0,  # Requests graded together with others
+            "largest_batch": 0,
+            "flushed_on_window": 0,
+            "flushed_on_size": 0,
+            "flushed_on_tokens": 0,
+        }
+
+    def _fits(self, batch: List[GradingRequest]) -> bool:
+        return (
+            sum(r.prompt_tokens for r in batch) <= self.max_prompt_tokens
+            and sum(r.reply_tokens for r in batch) <= self.max_reply_tokens
+        )
+
+    async def grade(self, request: GradingRequest) -> Optional[Dict]:
+        """Grade request, together with whatever arrives within the window."""
+        self.stats["requests"] += 1
+        if self.window_seconds <= 0:
+            self.stats["calls"] += 1
+            return (await self.grade_batch([request]))[0]
+
+        loop = asyncio.get_running_loop()
+        request.future = loop.create_future()
+        request.queued_at = time.perf_counter()
+        if self._pending and not self._fits(self._pending + [request]):
+            self._flush("tokens")
+        self._pending.append(request)
+        if len(self._pending) >= self.max_batch:
+            self._flush("size")
+        elif not self._fits(self._pending):
+            self._flush("tokens")  # Too large to share a call with anything
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush, "window")
+        return await request.future
+
+    def _flush(self, reason: str) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        now = time.perf_counter()
+        self._wait_seconds += sum(now - r.queued_at for r in batch)
+        self.stats["calls"] += 1
+        self.stats[f"flushed_on_{reason}"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        if len(batch) > 1:
+            self.stats["batched_requests"] += len(batch)
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[GradingRequest]) -> None:
+        try:
+            results = await self.grade_batch(batch)
+        except Exception as e:
+            print(f"Grading batch of {len(batch)} failed: {e}")
+            results = [None] * len(batch)
+        for request, result in zip(batch, results):
+            if not request.future.done():  # The client may have gone away
+                request.future.set_result(result)
+
+    def info(self) -> Dict:
+        calls = self.stats["calls"]
+        queued = self.stats["requests"] if self.window_seconds > 0 else 0
+        return {
+            "window_seconds": self.window_seconds,
+            "max_batch": self.max_batch,
+            "max_prompt_tokens": self.max_prompt_tokens,
+            "max_reply_tokens": self.max_reply_tokens,
+            "pending": len(self._pending),
+            "requests_per_call": round(self.stats["requests"] / calls, 2) if calls else 0.0,
+            "avg_wait_ms": round(self._wait_seconds / queued * 1000, 1) if queued else 0.0,
+            **self.stats,
+        }
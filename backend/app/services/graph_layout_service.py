@@ -0,0 +1,333 @@
+"""
+Graph Layout Service
+
+Layered (Sugiyama-style) layout of the prerequisite DAG, computed once per
+catalog and cached, so the graph page only has to draw it:
+1. Break cycles (DFS back edges are laid out reversed)
+2. Assign layers by longest path from courses with no prerequisites
+3. Split edges spanning several layers with dummy nodes
+4. Minimize crossings with alternating barycenter sweeps (best kept)
+5. Assign x coordinates by pulling nodes toward their neighbours
+Layouts are keyed by a hash of the graph structure and layout settings.
+"""
+import hashlib
+import json
+import struct
+import sys
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from app.config import get_settings
+from app.schemas.course import GraphLayoutResponse
+from app.services.planner_service import CompiledCatalog
+
+settings = get_settings()
+
+# Binary payload: magic, version, then little-endian counts and arrays
+BINARY_MAGIC = b"DPGL"
+BINARY_VERSION = 1
+
+# Barycenter sweeps (down + up = 2)
+CROSSING_SWEEPS = 8
+
+
+@dataclass
+class GraphLayout:
+    """A computed layout plus its pre-serialized payloads."""
+    catalog_hash: str
+    json_body: bytes
+    binary_body: bytes
+
+
+def _count_crossings(edges: List[Tuple[int, int]]) -> int:
+    """Crossings between two adjacent layers: inversions of target positions."""
+    if len(edges) < 2:
+        return 0
+    edges.sort()
+    size = max(target for _, target in edges) + 1
+    tree = [0] * (size + 1)  # Fenwick tree over target positions
+    crossings = 0
+    for seen, (_, target) in enumerate(edges):
+        # Earlier edges whose target is strictly right of this one
+        i = target + 1
+        not_greater = 0
+        while i > 0:
+            not_greater += tree[i]
+            i -= i & -i
+        crossings += seen - not_greater
+        i = target + 1
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+    return crossings
+
+
+class GraphLayoutService:
+    """Computes and caches layered prerequisite-graph layouts."""
+
+    def __init__(self, max_cached: int = settings.graph_layout_cache_size):
+        self.max_cached = max_cached
+        self._cache: "OrderedDict[str, GraphLayout]" = OrderedDict()
+
+    @staticmethod
+    def graph_edges(catalog: CompiledCatalog) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """Course codes and (prerequisite, course) edges between courses in the catalog."""
+        codes = sorted(catalog.course_map)
+        edges = sorted(
+            (prereq, course)
+            for prereq, dependents in catalog.prereq_graph.items()
+            if prereq in catalog.course_map
+            for course in dependents
+            if course != prereq
+        )
+        return codes, edges
+
+    @staticmethod
+    def catalog_hash(codes: List[str], edges: List[Tuple[str, str]], params: Tuple) -> str:
+        payload = json.dumps([codes, edges, list(params)], separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_layout(
+        self,
+        catalog: CompiledCatalog,
+        node_width: int = 180,
+        node_height: int = 80,
+        node_sep: int = 80,
+        rank_sep: int = 100
+    ) -> GraphLayout:
+        """Layout for a catalog, from cache when the graph hasn't changed."""
+        codes, edges = self.graph_edges(catalog)
+        params = (node_width, node_height, node_sep, rank_sep)
+        digest = self.catalog_hash(codes, edges, params)
+
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            return self._cache[digest]
+
+        response = self.compute(codes, edges, *params)
+        response.catalog_hash = digest
+        layout = GraphLayout(
+            catalog_hash=digest,
+            json_body=response.model_dump_json().encode(),
+            binary_body=self.to_binary(response),
+        )
+        self._cache[digest] = layout
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+        return layout
+
+    # ==========================================
+    # LAYOUT
+    # ==========================================
+
+    @staticmethod
+    def _acyclic_edges(n: int, edges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Reverse DFS back edges so the graph can be layered."""
+        out: List[List[int]] = [[] for _ in range(n)]
+        for u, v in edges:
+            out[u].append(v)
+
+        state = [0] * n  # 0 = unvisited, 1 = on stack, 2 = done
+        back = set()
+        for root in range(n):
+            if state[root]:
+                continue
+            state[root] = 1
+            stack = [(root, iter(out[root]))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if state[child] == 1:
+                        back.add((node, child))
+                    elif state[child] == 0:
+                        state[child] = 1
+                        stack.append((child, iter(out[child])))
+                        break
+                else:
+                    state[node] = 2
+                    stack.pop()
+        return [(v, u) if (u, v) in back else (u, v) for u, v in edges]
+
+    @staticmethod
+    def _longest_path_layers(n: int, edges: List[Tuple[int, int]]) -> List[int]:
+        out: List[List[int]] = [[] for _ in range(n)]
+        in_degree = [0] * n
+        for u, v in edges:
+            out[u].append(v)
+            in_degree[v] += 1
+
+        layer = [0] * n
+        queue = [node for node in range(n) if in_degree[node] == 0]
+        for node in queue:  # queue grows while iterating (Kahn's algorithm)
+            for child in out[node]:
+                layer[child] = max(layer[child], layer[node] + 1)
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    queue.append(child)
+        return layer
+
+    def _minimize_crossings(
+        self,
+        layers: List[List[int]],
+        up: List[List[int]],
+        down: List[List[int]]
+    ) -> Tuple[List[List[int]], int]:
+        """Barycenter heuristic, alternating downward and upward sweeps."""
+
+        def positions(order: List[List[int]]) -> Dict[int, int]:
+            return {node: i for layer in order for i, node in enumerate(layer)}
+
+        def crossings(order: List[List[int]]) -> int:
+            pos = positions(order)
+            return sum(
+                _count_crossings([(pos[u], pos[v]) for u in order[l] for v in down[u]])
+                for l in range(len(order) - 1)
+            )
+
+        order = [list(layer) for layer in layers]
+        best, best_crossings = [list(layer) for layer in order], crossings(order)
+
+        for sweep in range(CROSSING_SWEEPS):
+            if best_crossings == 0:
+                break
+            downward = sweep % 2 == 0
+            indices = range(1, len(order)) if downward else range(len(order) - 2, -1, -1)
+            for l in indices:
+                fixed = order[l - 1] if downward else order[l + 1]
+                fixed_pos = {node: i for i, node in enumerate(fixed)}
+                neighbours = up if downward else down
+
+                def barycenter(item: Tuple[int, int]) -> float:
+                    i, node = item
+                    linked = [fixed_pos[m] for m in neighbours[node]]
+                    return sum(linked) / len(linked) if linked else i
+
+                order[l] = [node for _, node in sorted(enumerate(order[l]), key=barycenter)]
+
+            total = crossings(order)
+            if total < best_crossings:
+                best, best_crossings = [list(layer) for layer in order], total
+
+        return best, best_crossings
+
+    @staticmethod
+    def _assign_x(
+        order: List[List[int]],
+        up: List[List[int]],
+        down: List[List[int]],
+        widths: List[float],
+        node_sep: float
+    ) -> List[float]:
+        """Keep each layer's order and spacing, pulling nodes toward their neighbours."""
+        x = [0.0] * len(widths)
+        for layer in order:
+            cursor = 0.0
+            for node in layer:
+                x[node] = cursor + widths[node] / 2
+                cursor += widths[node] + node_sep
+
+        def place(layer: List[int], neighbours: List[List[int]]) -> None:
+            left_edge = None
+            for node in layer:
+                linked = neighbours[node]
+                target = sum(x[m] for m in linked) / len(linked) if linked else x[node]
+                if left_edge is not None:
+                    target = max(target, left_edge + node_sep + widths[node] / 2)
+                x[node] = target
+                left_edge = target + widths[node] / 2
+
+        for l in range(1, len(order)):
+            place(order[l], up)
+        for l in range(len(order) - 2, -1, -1):
+            place(order[l], down)
+
+        left = min((x[node] - widths[node] / 2 for node in range(len(x))), default=0.0)
+        return [value - left for value in x]
+
+    def compute(
+        self,
+        codes: List[str],
+        edges: List[Tuple[str, str]],
+        node_width: int,
+        node_height: int,
+        node_sep: int,
+        rank_sep: int
+    ) -> GraphLayoutResponse:
+        """Lay out the graph; x/y are top-left corners of node boxes."""
+        index = {code: i for i, code in enumerate(codes)}
+        n = len(codes)
+        edge_index = [(index[u], index[v]) for u, v in edges]
+
+        acyclic = self._acyclic_edges(n, edge_index)
+        layer = self._longest_path_layers(n, acyclic)
+
+        # Proper layering: chain dummy nodes through skipped layers
+        up: List[List[int]] = [[] for _ in range(n)]
+        down: List[List[int]] = [[] for _ in range(n)]
+        for u, v in acyclic:
+            previous = u
+            for dummy_layer in range(layer[u] + 1, layer[v]):
+                dummy = len(layer)
+                layer.append(dummy_layer)
+                up.append([previous])
+                down.append([])
+                down[previous].append(dummy)
+                previous = dummy
+            down[previous].append(v)
+            up[v].append(previous)
+
+        layer_count = max(layer, default=-1) + 1
+        layers: List[List[int]] = [[] for _ in range(layer_count)]
+        for node in range(len(layer)):  # real nodes first, in code order
+            layers[layer[node]].append(node)
+
+        order, crossings = self._minimize_crossings(layers, up, down)
+        widths = [float(node_width)] * n + [0.0] * (len(layer) - n)
+        x = self._assign_x(order, up, down, widths, node_sep)
+
+        xs = [round(x[i] - node_width / 2, 1) for i in range(n)]
+        ys = [float(layer[i] * (node_height + rank_sep)) for i in range(n)]
+        return GraphLayoutResponse(
+            catalog_hash="",
+            node_width=node_width,
+            node_height=node_height,
+            width=round(max((xi + node_width for xi in xs), default=0.0), 1),
+            height=float(layer_count * (node_height + rank_sep) - rank_sep) if n else 0.0,
+            layers=layer_count,
+            crossings=crossings,
+            nodes=codes,
+            x=xs,
+            y=ys,
+            layer=layer[:n],
+            edges=[i for pair in edge_index for i in pair],
+        )
+
+    @staticmethod
+    def to_binary(layout: GraphLayoutResponse) -> bytes:
+        """
+        Typed-array payload (little-endian):
+        magic "DPGL", u8 version, 3 pad bytes, u32 node count, u32 edge count,
+        f32 width, f32 height, f32[n] x, f32[n] y, u32[n] layer,
+        u32[2 * edges] edge endpoints, then newline-separated UTF-8 codes.
+        Every array starts on a 4-byte boundary, so it can be wrapped with
+        Float32Array / Uint32Array directly.
+        """
+        xs, ys = array("f", layout.x), array("f", layout.y)
+        layers, edges = array("I", layout.layer), array("I", layout.edges)
+        if sys.byteorder == "big":
+            for values in (xs, ys, layers, edges):
+                values.byteswap()
+        header = struct.pack(
+            "<4sB3xIIff", BINARY_MAGIC, BINARY_VERSION,
+            len(layout.nodes), len(layout.edges) // 2, layout.width, layout.height
+        )
+        return b"".join([
+            header, xs.tobytes(), ys.tobytes(), layers.tobytes(), edges.tobytes(),
+            "\n".join(layout.nodes).encode(),
+        ])
+
+
+# Singleton instance
+graph_layout_service = GraphLayoutService()
@@ -0,0 +1,358 @@
+"""
+Job Queue Service
+
+Persistent queue for long-running AI requests, kept in the jobs table:
+- Submitting stores the request and returns at once; in-process workers
+  (settings.job_workers per API worker) run the job and store its result
+- Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+  of API workers / hosts share one queue without a broker (SQLite, for
+  local development, claims with a conditional UPDATE instead)
+- Running jobs send a heartbeat; jobs whose worker died (crash, restart) go
+  back to the queue once the heartbeat is stale, and run again from the start
+  (up to job_max_attempts). A worker that is shut down requeues its job
+- Finished jobs keep their result for job_result_ttl_seconds, then a reaper
+  deletes them
+- Optional webhook: the finished job's state is POSTed to its callback_url.
+  Only hosts in job_webhook_allowed_hosts, or else only public addresses,
+  are accepted; the host is resolved again before each delivery, and
+  redirects are not followed
+"""
+import asyncio
+import ipaddress
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal, engine
+from app.models.job import Job
+
+settings = get_settings()
+
+# (request body, db session) -> response body
+JobHandler = Callable[[Dict[str, Any], AsyncSession], Awaitable[Dict[str, Any]]]
+
+FINISHED = ("succeeded", "failed")
+
+CLAIM_SQL = text("""
+UPDATE jobs
+SET status = 'running', attempts = attempts + 1, started_at = :now, heartbeat_at = :now
+WHERE id = (
+    SELECT id FROM jobs
+    WHERE status = 'queued'
+    ORDER BY created_at
+    FOR UPDATE SKIP LOCKED
+    LIMIT 1
+)
+RETURNING id
+""")
+
+
+async def check_callback_url(url: str) -> None:
+    """
+    Raise ValueError unless url is an http(s) URL the worker may POST to.
+
+    With job_webhook_allowed_hosts set only those hosts are accepted;
+    otherwise every address the host resolves to must be public (no
+    loopback, private, link-local, reserved or multicast targets).
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("callback_url must be an http(s) URL")
+    host = parts.hostname.lower()
+    allowed = {h.lower() for h in settings.job_webhook_allowed_hosts}
+    if allowed:
+        if host not in allowed:
+            raise ValueError(f"callback_url host {host} is not in JOB_WEBHOOK_ALLOWED_HOSTS")
+        return
+
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except (socket.gaierror, ValueError):
+        raise ValueError(f"callback_url host {host} does not resolve")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError("callback_url must not point to a loopback, private or link-local address")
+
+
+class JobQueueService:
+    """Postgres-backed job queue with in-process workers."""
+
+    def __init__(self):
+        self.handlers: Dict[str, JobHandler] = {}
+        self._wakeup = asyncio.Event()
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._worker_tasks: List[asyncio.Task] = []
+        self._running: Dict[asyncio.Task, str] = {}  # Worker -> job it is running
+        self._stopping = asyncio.Event()
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "requeued": 0, "purged": 0, "webhooks_failed": 0}
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self.handlers[kind] = handler
+
+    # ============================================
+    # SUBMIT / READ
+    # ============================================
+
+    async def submit(
+        self,
+        db: AsyncSession,
+        kind: str,
+        payload: Dict[str, Any],
+        user_id: Optional[int] = None,
+        callback_url: Optional[str] = None
+    ) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind '{kind}'")
+        if callback_url:
+            if user_id is None:
+                raise PermissionError("Sign in to use a callback_url")
+            await check_callback_url(callback_url)
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status="queued",
+            user_id=user_id,
+            payload=payload,
+            callback_url=callback_url,
+            created_at=datetime.utcnow()
+        )
+        db.add(job)
+        await db.commit()
+        self.stats["submitted"] += 1
+        self._wakeup.set()
+        return job
+
+    async def get(self, db: AsyncSession, job_id: str) -> Optional[Job]:
+        """The job, or None if unknown or its result has expired."""
+        job = await db.get(Job, job_id, populate_existing=True)
+        if job is None or (job.expires_at is not None and job.expires_at <= datetime.utcnow()):
+            return None
+        return job
+
+    async def wait_for_change(self, job_id: str, timeout: float) -> bool:
+        """Wait until this process updates the job (True) or timeout passes (False)."""
+        event = self._changed.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _notify(self, job_id: str) -> None:
+        event = self._changed.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    # ============================================
+    # WORKERS
+    # ============================================
+
+    async def _claim(self) -> Optional[str]:
+        """Mark the oldest queued job running; its id, or None when the queue is empty."""
+        now = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            if engine.dialect.name == "postgresql":
+                job_id = (await db.execute(CLAIM_SQL, {"now": now})).scalar_one_or_none()
+            else:
+                job_id = (await db.execute(
+                    select(Job.id).where(Job.status == "queued").order_by(Job.created_at).limit(1)
+                )).scalar_one_or_none()
+                if job_id is not None:
+                    claimed = await db.execute(
+                        update(Job)
+                        .where(Job.id == job_id, Job.status == "queued")
+                        .values(status="running", attempts=Job.attempts + 1, started_at=now, heartbeat_at=now)
+                    )
+                    if claimed.rowcount != 1:
+                        job_id = None  # Another worker was first
+            await db.commit()
+        if job_id is not None:
+            self._notify(job_id)
+        return job_id
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.job_heartbeat_seconds)
+            async with AsyncSessionLocal() as db:
+                await db.execute(
+                    update(Job).where(Job.id == job_id, Job.status == "running").values(heartbeat_at=datetime.utcnow())
+                )
+                await db.commit()
+
+    async def _finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        status = "failed" if error is not None else "succeeded"
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Job).where(Job.id == job_id).values(
+                    status=status,
+                    result=result,
+                    error=error,
+                    finished_at=now,
+                    expires_at=now + timedelta(seconds=settings.job_result_ttl_seconds)
+                )
+            )
+            await db.commit()
+            job = await db.get(Job, job_id)
+        self.stats[status] += 1
+        self._notify(job_id)
+        if job is not None and job.callback_url:
+            await self._send_webhook(job)
+
+    async def _requeue(self, job_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Job).where(Job.id == job_id, Job.status == "running").values(status="queued"))
+            await db.commit()
+        self.stats["requeued"] += 1
+        self._notify(job_id)
+
+    async def _send_webhook(self, job: Job) -> None:
+        body = {"job_id": job.id, "kind": job.kind, "status": job.status, "result": job.result, "error": job.error}
+        try:
+            # The host may resolve elsewhere now than when the job was submitted
+            await check_callback_url(job.callback_url)
+            async with httpx.AsyncClient(timeout=10.0, follow_redirects=False) as client:
+                response = await client.post(job.callback_url, json=body)
+                response.raise_for_status()
+        except Exception as e:
+            self.stats["webhooks_failed"] += 1
+            print(f"Job {job.id} webhook to {job.callback_url} failed: {e}")
+
+    async def _run(self, job_id: str) -> None:
+        async with AsyncSessionLocal() as db:
+            job = await db.get(Job, job_id)
+            kind, payload = job.kind, job.payload
+        handler = self.handlers.get(kind)
+        if handler is None:
+            await self._finish(job_id, error=f"Unknown job kind '{kind}'")
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await handler(payload, db)
+                await db.commit()
+        except asyncio.CancelledError:
+            # Shutting down: hand the job to the next worker instead of waiting out the stale timeout
+            await asyncio.shield(self._requeue(job_id))
+            raise
+        except HTTPException as e:
+            await self._finish(job_id, error=str(e.detail))
+        except Exception as e:
+            await self._finish(job_id, error=str(e) or type(e).__name__)
+        else:
+            await self._finish(job_id, result=result)
+        finally:
+            heartbeat.cancel()
+
+    async def _worker_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job queue claim error: {e}")
+                job_id = None
+            if self._stopping.is_set():
+                if job_id is not None:
+                    await self._requeue(job_id)  # Claimed while shutting down
+                return
+            if job_id is None:
+                self._wakeup.clear()
+                try:
+                    # Submissions in this process wake the workers; others are picked up by polling
+                    await asyncio.wait_for(self._wakeup.wait(), settings.job_poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            task = asyncio.current_task()
+            self._running[task] = job_id
+            try:
+                await self._run(job_id)
+            finally:
+                self._running.pop(task, None)
+
+    # ============================================
+    # RESUME / EXPIRY
+    # ============================================
+
+    async def requeue_stale(self) -> int:
+        """Put running jobs whose worker stopped sending heartbeats back in the queue (or fail them)."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds)
+        async with AsyncSessionLocal() as db:
+            stale = (await db.execute(
+                select(Job.id, Job.attempts).where(Job.status == "running", Job.heartbeat_at < cutoff)
+            )).all()
+        for job_id, attempts in stale:
+            if attempts >= settings.job_max_attempts:
+                await self._finish(job_id, error=f"Worker stopped during each of {attempts} attempts")
+            else:
+                print(f"Resuming job {job_id} (worker stopped during attempt {attempts})")
+                await self._requeue(job_id)
+        if stale:
+            self._wakeup.set()
+        return len(stale)
+
+    async def purge_expired(self) -> int:
+        async with AsyncSessionLocal() as db:
+            deleted = await db.execute(delete(Job).where(Job.expires_at < datetime.utcnow()))
+            await db.commit()
+        self.stats["purged"] += deleted.rowcount
+        return deleted.rowcount
+
+    async def _reaper_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.requeue_stale()
+                await self.purge_expired()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job queue reaper error: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), settings.job_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start_workers(self, workers: int = settings.job_workers) -> None:
+        """Run `workers` job workers and the stale-job / expiry reaper (0 disables them)."""
+        if workers > 0 and not self._worker_tasks:
+            self._stopping.clear()
+            self._worker_tasks = [asyncio.create_task(self._worker_loop()) for _ in range(workers)]
+            self._worker_tasks.append(asyncio.create_task(self._reaper_loop()))
+
+    async def stop_workers(self) -> None:
+        """
+        Stop the workers: idle ones finish their current claim and exit,
+        running jobs are cancelled and go back to the queue.
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        for task in list(self._running):
+            task.cancel()
+        for task in self._worker_tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._worker_tasks = []
+
+    def info(self) -> Dict:
+        return {"workers": max(0, len(self._worker_tasks) - 1), "kinds": sorted(self.handlers), **self.stats}
+
+
+# Singleton instance
+job_queue_service = JobQueueService()
@@ -0,0 +1,253 @@
+"""
+Ollama Backend Pool
+
+Spreads Ollama calls over several inference hosts:
+- Routing: least outstanding requests (scaled by weight), or weighted random
+- Per-backend model availability from /api/tags; a backend without the
+  requested model is only used when no backend has it
+- Active health checks (OllamaService.check_connection) take unreachable
+  backends out and put them back once they answer again
+- Passive ejection: consecutive failed calls eject a backend for a while,
+  after which it is re-admitted automatically
+- Sticky routing: calls made inside pool.sticky(key) go to the backend the
+  key used before (chat sessions keep their prompt cache on one host)
+
+With a single backend (the default, settings.ollama_base_url) every call
+simply goes there.
+"""
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from app.config import get_settings
+
+settings = get_settings()
+
+_sticky_key: ContextVar[Optional[str]] = ContextVar("ollama_sticky_key", default=None)
+
+ROUTING_MODES = ("least_outstanding", "weighted")
+
+
+def model_tag(model: str) -> str:
+    """Model name as /api/tags lists it ("llama3" -> "llama3:latest")."""
+    return model if ":" in model else f"{model}:latest"
+
+
+@dataclass
+class OllamaBackend:
+    """One Ollama host and its routing state."""
+    url: str
+    weight: float = 1.0
+    models: Optional[Set[str]] = None  # None until the first health check
+    healthy: bool = True  # Last health check passed
+    ejected_until: float = 0.0
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    requests: int = 0
+    failures: int = 0
+    ejections: int = 0
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.ejected_until
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or model_tag(model) in self.models
+
+    def info(self, now: float) -> Dict:
+        return {
+            "url": self.url,
+            "weight": self.weight,
+            "available": self.available(now),
+            "healthy": self.healthy,
+            "ejected_for_seconds": round(max(0.0, self.ejected_until - now), 1),
+            "models": sorted(self.models) if self.models is not None else None,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+        }
+
+
+@dataclass
+class BackendLease:
+    """A backend picked for one call; the call marks it failed on backend errors."""
+    backend: OllamaBackend
+    failed: bool = False
+
+    @property
+    def url(self) -> str:
+        return self.backend.url
+
+    def fail(self) -> None:
+        self.failed = True
+
+
+class OllamaPool:
+    """Routes Ollama calls over a set of backends."""
+
+    def __init__(
+        self,
+        urls: List[str],
+        weights: Optional[Dict[str, float]] = None,
+        routing: str = settings.ollama_routing,
+        eject_after: int = settings.ollama_eject_after_failures,
+        eject_seconds: float = settings.ollama_eject_seconds,
+        max_sticky: int = settings.chat_session_max
+    ):
+        if routing not in ROUTING_MODES:
+            raise ValueError(f"Unknown Ollama routing '{routing}' (expected one of {', '.join(ROUTING_MODES)})")
+        self.routing = routing
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_sticky = max_sticky
+        self.backends: List[OllamaBackend] = []
+        self.set_backends(urls, weights)
+        self._sticky: "OrderedDict[str, str]" = OrderedDict()
+        self._health_task: Optional[asyncio.Task] = None
+
+    def set_backends(self, urls: List[str], weights: Optional[Dict[str, float]] = None) -> None:
+        if not urls:
+            raise ValueError("The Ollama pool needs at least one backend URL")
+        weights = weights or {}
+        self.backends = [
+            OllamaBackend(url=url.rstrip("/"), weight=float(weights.get(url, 1.0)))
+            for url in dict.fromkeys(urls)
+        ]
+
+    def backend(self, url: str) -> Optional[OllamaBackend]:
+        url = url.rstrip("/")
+        return next((b for b in self.backends if b.url == url), None)
+
+    # ============================================
+    # ROUTING
+    # ============================================
+
+    def _candidates(self, model: str) -> List[OllamaBackend]:
+        now = time.monotonic()
+        available = [b for b in self.backends if b.available(now)]
+        with_model = [b for b in available if b.serves(model)]
+        if with_model:
+            return with_model
+        if available:
+            return available
+        # Everything is out: try whichever comes back first rather than not at all
+        return [min(self.backends, key=lambda b: (b.healthy is False, b.ejected_until))]
+
+    def _choose(self, candidates: List[OllamaBackend]) -> OllamaBackend:
+        if len(candidates) == 1:
+            return candidates[0]
+        if self.routing == "weighted":
+            return random.choices(candidates, weights=[b.weight for b in candidates])[0]
+        return min(candidates, key=lambda b: ((b.outstanding + 1) / b.weight, b.requests / b.weight))
+
+    def pick(self, model: str) -> OllamaBackend:
+        """Backend for the next call to model (the sticky one, if set and still usable)."""
+        candidates = self._candidates(model)
+        key = _sticky_key.get()
+        if key is None:
+            return self._choose(candidates)
+        url = self._sticky.get(key)
+        backend = next((b for b in candidates if b.url == url), None)
+        if backend is None:
+            backend = self._choose(candidates)
+            self._sticky[key] = backend.url
+        self._sticky.move_to_end(key)
+        while len(self._sticky) > self.max_sticky:
+            self._sticky.popitem(last=False)
+        return backend
+
+    @contextmanager
+    def sticky(self, key: Optional[str]):
+        """Route the calls made inside this block like earlier calls with the same key."""
+        token = _sticky_key.set(key)
+        try:
+            yield
+        finally:
+            _sticky_key.reset(token)
+
+    @asynccontextmanager
+    async def lease(self, model: str):
+        """Pick a backend for one call; errors raised inside count against it."""
+        lease = BackendLease(self.pick(model))
+        backend = lease.backend
+        backend.outstanding += 1
+        backend.requests += 1
+        try:
+            yield lease
+        except Exception:
+            lease.fail()
+            raise
+        finally:
+            backend.outstanding -= 1
+            self._record(backend, lease.failed)
+
+    def _record(self, backend: OllamaBackend, failed: bool) -> None:
+        if not failed:
+            backend.consecutive_failures = 0
+            return
+        backend.failures += 1
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.eject_after and len(self.backends) > 1:
+            backend.consecutive_failures = 0
+            backend.ejected_until = time.monotonic() + self.eject_seconds
+            backend.ejections += 1
+            print(f"Ollama backend {backend.url} ejected for {self.eject_seconds:g}s after {self.eject_after} failures")
+
+    # ============================================
+    # HEALTH CHECKS
+    # ============================================
+
+    def update_models(self, url: str, models: List[str]) -> None:
+        backend = self.backend(url)
+        if backend is not None:
+            backend.models = {model_tag(m) for m in models if m}
+
+    async def check_health(self, check: Callable[[str], Awaitable[bool]]) -> None:
+        """Run `check` against every backend and mark it healthy or not."""
+        results = await asyncio.gather(*(check(b.url) for b in self.backends), return_exceptions=True)
+        for backend, ok in zip(self.backends, results):
+            ok = ok is True
+            if ok != backend.healthy:
+                print(f"Ollama backend {backend.url} {'back up' if ok else 'failed its health check'}")
+            backend.healthy = ok
+
+    async def _health_loop(self, check: Callable[[str], Awaitable[bool]], interval: float) -> None:
+        while True:
+            try:
+                await self.check_health(check)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Ollama health check error: {e}")
+            await asyncio.sleep(interval)
+
+    def start_health_checks(
+        self,
+        check: Callable[[str], Awaitable[bool]],
+        interval: float = settings.ollama_health_check_seconds
+    ) -> None:
+        """Check every backend on a schedule (0 seconds disables it)."""
+        if interval > 0 and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop(check, interval))
+
+    async def stop_health_checks(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+    def info(self) -> Dict:
+        now = time.monotonic()
+        return {
+            "routing": self.routing,
+            "sticky_sessions": len(self._sticky),
+            "backends": [b.info(now) for b in self.backends],
+        }
@@ -10,9 +10,10 @@ Implements the deterministic academic decision engine with:
 - Career alignment analysis
 - ADVANCED INTELLIGENCE: Decision Timeline, Confidence Score, Advisor Mode
 """
-from typing import List, Dict, Set, Optional, Tuple, Literal
+import time
+from typing import Callable, List, Dict, Set, Optional, Tuple, Literal
 from collections import defaultdict, deque
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from app.schemas.plan import (
     CourseInput, 
@@ -20,8 +21,18 @@ from app.schemas.plan import (
     PlanGenerateResponse,
     RiskAnalysis,
     DecisionEvent,
-    ConfidenceBreakdown
+    ConfidenceBreakdown,
+    PlanDelta,
+    PlanDiff,
+    CourseMove,
+    PlanRepairResponse,
+    PlanAlternativesRequest,
+    PlanObjectives,
+    PlanAlternative,
+    PlanAlternativesResponse,
+    ValidationIssue
 )
+from app.utils.catalog_validation import validate_catalog
 
 
 @dataclass
@@ -30,6 +41,48 @@ class ValidationResult:
     is_valid: bool
     warnings: List[str]
     errors: List[str]
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+
+@dataclass
+class CompiledCatalog:
+    """
+    Prerequisite graphs for one catalog, built once and shared read-only.
+    
+    Lets batch, sweep and repair requests plan many students against the
+    same catalog without rebuilding the graphs for each of them.
+    """
+    courses: List[CourseInput]
+    course_map: Dict[str, CourseInput]
+    prereq_graph: Dict[str, Set[str]]  # prereq -> dependents
+    reverse_graph: Dict[str, Set[str]]  # course -> prereqs
+    issues: Optional[List[ValidationIssue]] = None  # catalog-level findings, if already validated
+
+
+# Ordering used to compare semester difficulty labels
+DIFFICULTY_RANK = {"Light": 1, "Moderate": 2, "Heavy": 3}
+
+
+def compile_catalog(courses: List[CourseInput]) -> CompiledCatalog:
+    """Build the course map and prerequisite graphs for a catalog."""
+    course_map: Dict[str, CourseInput] = {}
+    prereq_graph: Dict[str, Set[str]] = defaultdict(set)
+    reverse_graph: Dict[str, Set[str]] = defaultdict(set)
+    
+    for course in courses:
+        course_map[course.code] = course
+        for prereq in course.prerequisites:
+            # prereq -> course (course depends on prereq)
+            prereq_graph[prereq].add(course.code)
+            # course -> prereq (for reverse lookup)
+            reverse_graph[course.code].add(prereq)
+    
+    return CompiledCatalog(
+        courses=list(courses),
+        course_map=course_map,
+        prereq_graph=dict(prereq_graph),
+        reverse_graph=dict(reverse_graph)
+    )
 
 
 class DegreePlannerService:
@@ -46,10 +99,17 @@ class DegreePlannerService:
         self.reverse_graph: Dict[str, Set[str]] = defaultdict(set)  # course -> prereqs
         self.decision_timeline: List[DecisionEvent] = []  # Track decisions
     
-    def generate_plan(self, request: PlanGenerateRequest) -> PlanGenerateResponse:
+    def generate_plan(
+        self,
+        request: PlanGenerateRequest,
+        catalog: Optional[CompiledCatalog] = None
+    ) -> PlanGenerateResponse:
         """
         Generate an optimized degree plan using strict topological resolution.
         
+        Pass a pre-compiled `catalog` (built from request.courses) to skip
+        rebuilding the prerequisite graphs.
+        
         Algorithm:
         1. Validate all input data
         2. Build prerequisite graphs
@@ -64,7 +124,7 @@ class DegreePlannerService:
         self.decision_timeline = []
         
         # Step 1: Validate input data
-        validation = self._validate_input(request)
+        validation = self._validate_input(request, catalog)
         warnings = validation.warnings.copy()
         
         if not validation.is_valid:
@@ -85,11 +145,15 @@ class DegreePlannerService:
                 warnings=validation.errors,
                 unscheduled_courses=[],
                 data_status="Demo",
-                validation_status="Invalid"
+                validation_status="Invalid",
+                validation_issues=validation.issues
             )
         
         # Step 2: Build graphs
-        self._build_graphs(request.courses)
+        if catalog is not None:
+            self._use_catalog(catalog)
+        else:
+            self._build_graphs(request.courses)
         
         # Step 3: Handle failure simulation
         completed = set(request.completed_courses)
@@ -124,6 +188,32 @@ class DegreePlannerService:
             priority_courses=set(request.priority_courses)
         )
         
+        response = self._build_response(
+            request=request,
+            semester_plan=semester_plan,
+            unscheduled=unscheduled,
+            completed=completed,
+            warnings=warnings,
+            failure_impact=failure_impact
+        )
+        response.validation_issues = validation.issues
+        return response
+    
+    def _build_response(
+        self,
+        request: PlanGenerateRequest,
+        semester_plan: Dict[str, List[str]],
+        unscheduled: List[str],
+        completed: Set[str],
+        warnings: List[str],
+        failure_impact: Optional[Dict] = None
+    ) -> PlanGenerateResponse:
+        """
+        Score a scheduled plan and assemble the response.
+        
+        Shared by full generation and incremental repair so both report
+        difficulty, risk, confidence and explanations identically.
+        """
         # Step 6: Calculate semester difficulties
         semester_difficulty = self._calculate_difficulties(semester_plan, request.courses)
         
@@ -196,66 +286,593 @@ class DegreePlannerService:
             data_status="Demo",  # Will be set by caller based on actual data source
             validation_status="Valid"
         )
-    
-    def _validate_input(self, request: PlanGenerateRequest) -> ValidationResult:
+
+    # ==========================================
+    # INCREMENTAL PLAN REPAIR
+    # ==========================================
+
+    def repair_plan(
+        self,
+        request: PlanGenerateRequest,
+        previous_plan: Dict[str, List[str]],
+        delta: PlanDelta
+    ) -> PlanRepairResponse:
+        """
+        Repair a previously generated plan after a small change.
+
+        The result equals generate_plan on the changed request, as long as
+        previous_plan is what generate_plan returned for `request`: every
+        semester before the first one the delta can influence is kept, and
+        only the later ones are scheduled again. Validation, the graphs, the
+        topological order and the scoring still cover the whole catalog;
+        what repair saves is replaying the scheduler over the kept semesters.
+
+        Algorithm:
+        1. Apply the delta to the original request
+        2. Find the first semester the delta can influence
+        3. Keep every earlier semester verbatim
+        4. Re-run scheduling for the remaining semesters only
+        5. Score the combined plan and diff it against the previous one
+        """
+        self.decision_timeline = []
+
+        # Step 1: Apply the delta
+        removed = set(delta.removed_courses)
+        failed = set(delta.failed_courses)
+        replaced = {c.code for c in delta.added_courses}
+        courses = [c for c in request.courses if c.code not in removed and c.code not in replaced]
+        courses.extend(delta.added_courses)
+        completed_list = [
+            code for code in dict.fromkeys([*request.completed_courses, *delta.completed_courses])
+            if code not in failed and code not in removed
+        ]
+        repaired_request = request.model_copy(update={
+            "courses": courses,
+            "completed_courses": completed_list,
+            "max_courses_per_semester": delta.max_courses_per_semester or request.max_courses_per_semester,
+            "remaining_semesters": delta.remaining_semesters or request.remaining_semesters,
+            "failure_simulation": None,
+        })
+
+        validation = self._validate_input(repaired_request)
+        if not validation.is_valid:
+            return PlanRepairResponse(plan=self.generate_plan(repaired_request), diff=PlanDiff())
+        warnings = validation.warnings.copy()
+
+        self._build_graphs(courses)
+        completed = set(completed_list)
+        total_semesters = repaired_request.remaining_semesters
+
+        # Step 2: First semester whose greedy choice can differ
+        placement, loads = self._index_plan(previous_plan)
+        start = self._find_repair_start(placement, loads, request, delta, completed)
+        start = min(start, total_semesters + 1)
+
+        # Step 3: Reuse the untouched prefix
+        prefix: Dict[str, List[str]] = {}
+        for position, (key, codes) in enumerate(previous_plan.items(), start=1):
+            index = self._semester_index(key, position)
+            if index < start:
+                prefix[f"semester_{index}"] = [
+                    code for code in codes
+                    if code in self.course_map and code not in completed
+                ]
+        done = completed.union(*prefix.values())
+
+        # Step 4: Reschedule the suffix in the order a fresh generation would use
+        topo_order = [code for code in self._topological_sort(courses, completed) if code not in done]
+        suffix, unscheduled = self._schedule_courses(
+            topo_order=topo_order,
+            completed=done,
+            total_semesters=total_semesters,
+            max_per_semester=repaired_request.max_courses_per_semester,
+            priority_courses=set(repaired_request.priority_courses),
+            first_semester=start
+        )
+        semester_plan = {**prefix, **suffix}
+
+        self.decision_timeline.insert(0, DecisionEvent(
+            semester="Pre-Planning",
+            decision=f"Repaired plan from Semester {start}",
+            reason=f"{len(prefix)} earlier semesters are unaffected by the requested changes",
+            risk_mitigated="Keeps already-planned semesters stable",
+            trade_off=""
+        ))
+
+        failure_impact = None
+        if failed:
+            failure_impact = self._calculate_failure_impact(failed, completed, courses)
+            warnings.append(f"Failed courses must be retaken: {', '.join(sorted(failed))}.")
+
+        plan = self._build_response(
+            request=repaired_request,
+            semester_plan=semester_plan,
+            unscheduled=unscheduled,
+            completed=completed,
+            warnings=warnings,
+            failure_impact=failure_impact
+        )
+
+        # Step 5: Diff the rescheduled suffix against the previous plan
+        new_placement, _ = self._index_plan(suffix)
+        old_suffix = {code: sem for code, sem in placement.items() if sem >= start}
+        diff = PlanDiff(
+            repaired_from=f"semester_{start}" if start <= total_semesters else None,
+            unchanged_semesters=len(prefix),
+            rescheduled_courses=len(topo_order),
+            moved=[
+                CourseMove(code=code, from_semester=f"semester_{sem}", to_semester=f"semester_{new_placement[code]}")
+                for code, sem in old_suffix.items()
+                if code in new_placement and new_placement[code] != sem
+            ],
+            added=[code for code in new_placement if code not in old_suffix],
+            dropped=[code for code in old_suffix if code not in new_placement],
+        )
+
+        return PlanRepairResponse(plan=plan, diff=diff)
+
+    def _index_plan(self, degree_plan: Dict[str, List[str]]) -> Tuple[Dict[str, int], Dict[int, int]]:
+        """Map each course to its semester number and each semester to its load."""
+        placement: Dict[str, int] = {}
+        loads: Dict[int, int] = {}
+        for position, (key, codes) in enumerate(degree_plan.items(), start=1):
+            index = self._semester_index(key, position)
+            loads[index] = len(codes)
+            for code in codes:
+                placement[code] = index
+        return placement, loads
+
+    @staticmethod
+    def _semester_index(key: str, position: int) -> int:
+        """Parse the number out of a 'semester_N' key, falling back to its position."""
+        suffix = key.rsplit("_", 1)[-1]
+        return int(suffix) if suffix.isdigit() else position
+
+    def _find_repair_start(
+        self,
+        placement: Dict[str, int],
+        loads: Dict[int, int],
+        request: PlanGenerateRequest,
+        delta: PlanDelta,
+        completed: Set[str]
+    ) -> int:
+        """
+        Find the earliest semester where the greedy scheduler could choose differently.
+
+        Only the courses named in the delta, their direct dependents and their
+        direct prerequisites are inspected; the previous catalog is scanned
+        once for the old versions of removed and replaced courses.
+        """
+        last = max(loads, default=0)
+        candidates = [last + 1]
+
+        def earliest_eligible(code: str) -> Optional[int]:
+            course = self.course_map.get(code)
+            if not course:
+                return None
+            latest = 0
+            for prereq in course.prerequisites:
+                if prereq in completed or prereq not in self.course_map:
+                    continue
+                if prereq not in placement:
+                    return None
+                latest = max(latest, placement[prereq])
+            return latest + 1
+
+        # Courses that no longer need a slot free their semester and may unlock dependents earlier
+        for code in set(delta.completed_courses) | set(delta.removed_courses):
+            if code in placement:
+                candidates.append(placement[code])
+            for dependent in self.prereq_graph.get(code, set()):
+                if dependent in completed:
+                    continue
+                eligible = earliest_eligible(dependent)
+                if eligible is not None and eligible < placement.get(dependent, last + 1):
+                    candidates.append(eligible)
+
+        # Courses that now need a slot push back everything that depends on them
+        for code in set(delta.failed_courses) | {c.code for c in delta.added_courses}:
+            eligible = earliest_eligible(code)
+            if eligible is not None:
+                candidates.append(eligible)
+            if code in placement:
+                candidates.append(placement[code])
+            for dependent in self.prereq_graph.get(code, set()):
+                if dependent in placement:
+                    candidates.append(placement[dependent])
+
+        # Prerequisites whose dependents changed get a new rank key and enqueue
+        # their dependents in a new order: a higher key can win a slot from the
+        # semester the course became eligible, a lower one can lose its own slot
+        removed = set(delta.removed_courses)
+        added = {c.code for c in delta.added_courses}
+        lost: Dict[str, Set[str]] = defaultdict(set)
+        gained: Dict[str, Set[str]] = defaultdict(set)
+        for course in request.courses:
+            if course.code in removed or course.code in added:
+                for prereq in course.prerequisites:
+                    lost[prereq].add(course.code)
+        for course in delta.added_courses:
+            for prereq in course.prerequisites:
+                gained[prereq].add(course.code)
+        for code in lost.keys() | gained.keys():
+            if code in completed or code not in self.course_map:
+                continue
+            if code in placement:
+                candidates.append(placement[code])
+            if len(gained[code] - lost[code]) > len(lost[code] - gained[code]):
+                eligible = earliest_eligible(code)
+                if eligible is not None:
+                    candidates.append(eligible)
+
+        # A lower cap first bites at an overfull semester; a higher one at a full semester
+        old_max = request.max_courses_per_semester
+        new_max = delta.max_courses_per_semester
+        if new_max and new_max != old_max:
+            threshold = new_max + 1 if new_max < old_max else old_max
+            candidates.extend(index for index, load in loads.items() if load >= threshold)
+
+        new_total = delta.remaining_semesters
+        if new_total and new_total != request.remaining_semesters:
+            candidates.append(min(new_total, request.remaining_semesters) + 1)
+
+        return max(1, min(candidates))
+
+    # ==========================================
+    # PARAMETER SWEEP
+    # ==========================================
+
+    def topological_order(self, catalog: CompiledCatalog, completed: Set[str]) -> List[str]:
+        """Course order for a catalog and completed set, reusable across plans."""
+        self._use_catalog(catalog)
+        return self._topological_sort(catalog.courses, completed)
+
+    def evaluate_sweep_row(
+        self,
+        catalog: CompiledCatalog,
+        completed: Set[str],
+        topo_order: List[str],
+        max_per_semester: int,
+        priority_courses: Set[str],
+        semester_options: List[int],
+        current_gpa: Optional[float] = None,
+        weekly_work_hours: Optional[int] = None
+    ) -> List[Tuple[float, int, str, str]]:
+        """
+        Score one (max load, priority set) row of a sweep for every semester count.
+
+        The scheduler fills semesters greedily without looking ahead, so the
+        plan for N semesters is a prefix of the plan for max(semester_options).
+        It is scheduled once and truncated per option.
+
+        Returns (confidence, unscheduled count, burnout risk, graduation risk)
+        per entry of semester_options.
+        """
+        self.decision_timeline = []
+        self._use_catalog(catalog)
+
+        full_plan, unscheduled = self._schedule_courses(
+            topo_order=topo_order,
+            completed=completed,
+            total_semesters=max(semester_options),
+            max_per_semester=max_per_semester,
+            priority_courses=priority_courses
+        )
+        full_difficulty = self._calculate_difficulties(full_plan, catalog.courses)
+        keys = list(full_plan)
+
+        cells = []
+        for semesters in semester_options:
+            kept = keys[:semesters]
+            semester_plan = {key: full_plan[key] for key in kept}
+            semester_difficulty = {key: full_difficulty[key] for key in kept}
+            cut = unscheduled + [code for key in keys[semesters:] for code in full_plan[key]]
+
+            risk_analysis = self._assess_risks(
+                semester_plan=semester_plan,
+                semester_difficulty=semester_difficulty,
+                unscheduled=cut,
+                total_courses=len(catalog.courses),
+                completed_count=len(completed),
+                weekly_work_hours=weekly_work_hours,
+                current_gpa=current_gpa
+            )
+            confidence_score, _ = self._calculate_confidence_score(
+                semester_plan=semester_plan,
+                semester_difficulty=semester_difficulty,
+                unscheduled=cut,
+                total_courses=len(catalog.courses),
+                completed_count=len(completed),
+                risk_analysis=risk_analysis
+            )
+            cells.append((confidence_score, len(cut), risk_analysis.burnout_risk, risk_analysis.graduation_risk))
+
+        return cells
+
+    # ==========================================
+    # ALTERNATIVE PLANS (PARETO FRONT)
+    # ==========================================
+
+    def generate_alternatives(
+        self,
+        request: PlanAlternativesRequest,
+        catalog: Optional[CompiledCatalog] = None
+    ) -> PlanAlternativesResponse:
+        """
+        Generate up to k non-dominated plans with their objective vectors.
+
+        Candidates vary the course ordering strategy and the per-semester cap
+        (up to the requested maximum). The graphs, topological order, chain
+        lengths and earliest slots are computed once and shared by every
+        candidate; the search stops when the time budget runs out.
+
+        Objectives: fewest unscheduled courses, fewest semesters, lightest
+        hardest semester, earliest priority courses, highest confidence.
+
+        Raises ValueError if the request fails validation.
+        """
+        started = time.perf_counter()
+        deadline = started + request.time_budget_ms / 1000
+
+        validation = self._validate_input(request, catalog)
+        if not validation.is_valid:
+            raise ValueError("Cannot generate plans: " + "; ".join(validation.errors))
+
+        if catalog is not None:
+            self._use_catalog(catalog)
+        else:
+            self._build_graphs(request.courses)
+
+        completed = set(request.completed_courses)
+        if request.failure_simulation and request.failure_simulation.enabled:
+            completed -= set(request.failure_simulation.failed_courses)
+
+        # Shared search state
+        topo_order = self._topological_sort(request.courses, completed)
+        priority_courses = set(request.priority_courses)
+        earliest = self._earliest_semesters(topo_order, completed)
+        chain = self._chain_lengths(topo_order)
+
+        def level(code: str) -> int:
+            for char in code:
+                if char.isdigit():
+                    return int(char)
+            return 0
+
+        def dependents(code: str) -> int:
+            return len(self.prereq_graph.get(code, set()))
+
+        strategies = {
+            "balanced": lambda c: (c in priority_courses, dependents(c), -level(c)),
+            "critical_path": lambda c: (chain[c], c in priority_courses, dependents(c), -level(c)),
+            "priority_first": lambda c: (c in priority_courses, chain[c], dependents(c), -level(c)),
+        }
+
+        candidates = []
+        seen_plans = set()
+        budget_exhausted = False
+        for max_per_semester in range(request.max_courses_per_semester, 0, -1):
+            for name, rank_key in strategies.items():
+                if candidates and time.perf_counter() > deadline:
+                    budget_exhausted = True
+                    break
+
+                self.decision_timeline = []
+                semester_plan, unscheduled = self._schedule_courses(
+                    topo_order=topo_order,
+                    completed=completed,
+                    total_semesters=request.remaining_semesters,
+                    max_per_semester=max_per_semester,
+                    priority_courses=priority_courses,
+                    rank_key=rank_key
+                )
+
+                fingerprint = tuple(tuple(codes) for codes in semester_plan.values())
+                if fingerprint in seen_plans:
+                    continue
+                seen_plans.add(fingerprint)
+
+                objectives = self._plan_objectives(
+                    request, semester_plan, unscheduled, completed, priority_courses, earliest
+                )
+                candidates.append({
+                    "strategy": f"{name}, max {max_per_semester}/semester",
+                    "plan": semester_plan,
+                    "unscheduled": unscheduled,
+                    "timeline": self.decision_timeline,
+                    "objectives": objectives,
+                })
+            if budget_exhausted:
+                break
+
+        front = self._pareto_front(candidates)
+        chosen = self._select_alternatives(front, request.k)
+
+        alternatives = []
+        for candidate in chosen:
+            self.decision_timeline = candidate["timeline"]
+            plan = self._build_response(
+                request=request,
+                semester_plan=candidate["plan"],
+                unscheduled=candidate["unscheduled"],
+                completed=completed,
+                warnings=validation.warnings.copy()
+            )
+            alternatives.append(PlanAlternative(
+                strategy=candidate["strategy"],
+                best_for=self._best_for(candidate, chosen),
+                objectives=candidate["objectives"],
+                plan=plan
+            ))
+
+        return PlanAlternativesResponse(
+            alternatives=alternatives,
+            candidates_evaluated=len(candidates),
+            front_size=len(front),
+            budget_exhausted=budget_exhausted,
+            elapsed_ms=round((time.perf_counter() - started) * 1000, 1)
+        )
+
+    def _earliest_semesters(self, topo_order: List[str], completed: Set[str]) -> Dict[str, int]:
+        """Earliest semester each pending course could run with an unlimited load."""
+        earliest: Dict[str, int] = {}
+        for code in topo_order:
+            earliest[code] = 1 + max(
+                (earliest.get(prereq, 0) for prereq in self.reverse_graph.get(code, set())
+                 if prereq not in completed),
+                default=0
+            )
+        return earliest
+
+    def _chain_lengths(self, topo_order: List[str]) -> Dict[str, int]:
+        """Length of the longest pending prerequisite chain starting at each course."""
+        chain: Dict[str, int] = {}
+        for code in reversed(topo_order):
+            chain[code] = 1 + max(
+                (chain.get(dependent, 0) for dependent in self.prereq_graph.get(code, set())),
+                default=0
+            )
+        return chain
+
+    def _plan_objectives(
+        self,
+        request: PlanGenerateRequest,
+        semester_plan: Dict[str, List[str]],
+        unscheduled: List[str],
+        completed: Set[str],
+        priority_courses: Set[str],
+        earliest: Dict[str, int]
+    ) -> PlanObjectives:
+        """Score one candidate schedule on every objective."""
+        semester_difficulty = self._calculate_difficulties(semester_plan, request.courses)
+        risk_analysis = self._assess_risks(
+            semester_plan=semester_plan,
+            semester_difficulty=semester_difficulty,
+            unscheduled=unscheduled,
+            total_courses=len(request.courses),
+            completed_count=len(completed),
+            weekly_work_hours=request.weekly_work_hours,
+            current_gpa=request.current_gpa
+        )
+        confidence_score, _ = self._calculate_confidence_score(
+            semester_plan=semester_plan,
+            semester_difficulty=semester_difficulty,
+            unscheduled=unscheduled,
+            total_courses=len(request.courses),
+            completed_count=len(completed),
+            risk_analysis=risk_analysis
+        )
+
+        placement = {
+            code: index
+            for index, codes in enumerate(semester_plan.values(), start=1)
+            for code in codes
+        }
+        # Unscheduled priority courses count as landing just past the horizon
+        priority_lateness = sum(
+            placement.get(code, request.remaining_semesters + 1) - earliest[code]
+            for code in priority_courses
+            if code in earliest
+        )
+
+        return PlanObjectives(
+            semesters_used=len(semester_plan),
+            max_difficulty=max(semester_difficulty.values(), key=DIFFICULTY_RANK.get, default="Light"),
+            priority_lateness=priority_lateness,
+            confidence_score=confidence_score,
+            unscheduled_count=len(unscheduled)
+        )
+
+    @staticmethod
+    def _objective_vector(objectives: PlanObjectives) -> Tuple:
+        """Objectives as a tuple where lower is better in every position."""
+        return (
+            objectives.unscheduled_count,
+            objectives.semesters_used,
+            DIFFICULTY_RANK[objectives.max_difficulty],
+            objectives.priority_lateness,
+            -objectives.confidence_score,
+        )
+
+    def _pareto_front(self, candidates: List[Dict]) -> List[Dict]:
+        """Keep candidates no other candidate is at least as good as on every objective."""
+        vectors = [self._objective_vector(c["objectives"]) for c in candidates]
+        front = []
+        for i, vector in enumerate(vectors):
+            dominated = any(
+                other != vector and all(o <= v for o, v in zip(other, vector))
+                for j, other in enumerate(vectors) if j != i
+            )
+            # Identical vectors: keep only the first candidate
+            duplicate = vector in vectors[:i]
+            if not dominated and not duplicate:
+                front.append(candidates[i])
+        return front
+
+    def _select_alternatives(self, front: List[Dict], k: int) -> List[Dict]:
+        """Pick k plans: the best plan per objective first, then by confidence."""
+        chosen: List[Dict] = []
+        by_confidence = sorted(front, key=lambda c: -c["objectives"].confidence_score)
+        for position in range(1, 5):
+            best = min(by_confidence, key=lambda c: self._objective_vector(c["objectives"])[position])
+            if best not in chosen:
+                chosen.append(best)
+        for candidate in by_confidence:
+            if candidate not in chosen:
+                chosen.append(candidate)
+        return chosen[:k]
+
+    def _best_for(self, candidate: Dict, chosen: List[Dict]) -> List[str]:
+        """Objectives on which this candidate ties for best among the chosen plans."""
+        labels = ["most_complete", "fastest_graduation", "lowest_difficulty", "priority_earliest", "highest_confidence"]
+        vector = self._objective_vector(candidate["objectives"])
+        vectors = [self._objective_vector(c["objectives"]) for c in chosen]
+        return [
+            label for position, label in enumerate(labels)
+            if vector[position] == min(v[position] for v in vectors)
+        ]
+
+    def _validate_input(
+        self,
+        request: PlanGenerateRequest,
+        catalog: Optional[CompiledCatalog] = None
+    ) -> ValidationResult:
         """
         Validate all input data strictly.
         
         CRITICAL: Never auto-fill or guess missing data.
+        Prerequisite cycles are errors: they could never be scheduled.
+        A stored catalog's findings are reused instead of re-checking it.
         """
-        errors = []
-        warnings = []
-        
-        if not request.courses:
-            errors.append("No courses provided. Please upload your course data.")
-            return ValidationResult(is_valid=False, warnings=warnings, errors=errors)
+        completed = set(request.completed_courses)
+        if request.failure_simulation and request.failure_simulation.enabled:
+            completed -= set(request.failure_simulation.failed_courses)
         
-        # Check for duplicate course codes
-        codes = [c.code for c in request.courses]
-        duplicates = [code for code in codes if codes.count(code) > 1]
-        if duplicates:
-            warnings.append(f"Duplicate course codes detected: {set(duplicates)}")
+        report = validate_catalog(
+            request.courses,
+            completed=completed,
+            priority=request.priority_courses,
+            remaining_semesters=request.remaining_semesters,
+            max_per_semester=request.max_courses_per_semester,
+            known_issues=catalog.issues if catalog is not None else None
+        )
         
-        # Validate prerequisites reference existing courses
-        valid_codes = set(codes)
-        for course in request.courses:
-            for prereq in course.prerequisites:
-                if prereq not in valid_codes:
-                    # Check if it's in completed courses
-                    if prereq not in request.completed_courses:
-                        warnings.append(f"Course {course.code} has prerequisite {prereq} not found in catalog.")
-        
-        # Validate completed courses exist
-        for completed in request.completed_courses:
-            if completed not in valid_codes:
-                warnings.append(f"Completed course {completed} not found in course catalog.")
-        
-        # Validate priority courses exist
-        for priority in request.priority_courses:
-            if priority not in valid_codes:
-                warnings.append(f"Priority course {priority} not found in course catalog.")
-        
-        # Check if plan is feasible
-        remaining_courses = len([c for c in request.courses if c.code not in request.completed_courses])
-        max_possible = request.remaining_semesters * request.max_courses_per_semester
-        if remaining_courses > max_possible:
-            warnings.append(f"⚠️ {remaining_courses} courses remaining but only {max_possible} slots available ({request.remaining_semesters} semesters × {request.max_courses_per_semester} courses).")
-        
-        return ValidationResult(is_valid=True, warnings=warnings, errors=errors)
+        return ValidationResult(
+            is_valid=report.is_valid,
+            warnings=report.warnings,
+            errors=report.errors,
+            issues=report.issues
+        )
     
     def _build_graphs(self, courses: List[CourseInput]) -> None:
         """Build prerequisite dependency graphs."""
-        self.course_map.clear()
-        self.prereq_graph.clear()
-        self.reverse_graph.clear()
-        
-        for course in courses:
-            self.course_map[course.code] = course
-            for prereq in course.prerequisites:
-                # prereq -> course (course depends on prereq)
-                self.prereq_graph[prereq].add(course.code)
-                # course -> prereq (for reverse lookup)
-                self.reverse_graph[course.code].add(prereq)
+        self._use_catalog(compile_catalog(courses))
+    
+    def _use_catalog(self, catalog: CompiledCatalog) -> None:
+        """Point the service at pre-built graphs (shared, never mutated)."""
+        self.course_map = catalog.course_map
+        self.prereq_graph = catalog.prereq_graph
+        self.reverse_graph = catalog.reverse_graph
     
     def _topological_sort(
         self, 
@@ -302,17 +919,24 @@ class DegreePlannerService:
         completed: Set[str],
         total_semesters: int,
         max_per_semester: int,
-        priority_courses: Set[str]
+        priority_courses: Set[str],
+        first_semester: int = 1,
+        rank_key: Optional[Callable[[str], Tuple]] = None
     ) -> Tuple[Dict[str, List[str]], List[str]]:
         """
         Schedule courses into semesters respecting constraints.
         Tracks decision timeline for transparency.
+        
+        first_semester lets plan repair replay only the affected suffix;
+        earlier semesters must already be folded into `completed`.
+        rank_key overrides the default (priority, dependents, level) ordering
+        of eligible courses; higher keys are scheduled first.
         """
         semester_plan: Dict[str, List[str]] = {}
         scheduled = set()
         remaining_topo = list(topo_order)
         
-        for semester in range(1, total_semesters + 1):
+        for semester in range(first_semester, total_semesters + 1):
             if not remaining_topo:
                 break
             
@@ -329,7 +953,9 @@ class DegreePlannerService:
                     for prereq in course.prerequisites
                 )
                 
-                if prereqs_satisfied:
+                if prereqs_satisfied and rank_key is not None:
+                    eligible.append((code, rank_key(code)))
+                elif prereqs_satisfied:
                     # Calculate priority score
                     is_priority = 1 if code in priority_courses else 0
                     num_dependents = len(self.prereq_graph.get(code, set()))
@@ -0,0 +1,117 @@
+"""
+Prerequisite Graph Service
+
+Keeps the course_prerequisites edge table in sync with Course.prerequisites
+and answers graph questions in the database:
+- ancestors: the full prerequisite chain of a course
+- descendants: every course a course (transitively) unlocks
+Each query is one recursive CTE with a depth limit.
+"""
+from typing import Dict, Iterable, List, Literal
+
+from sqlalchemy import delete, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.models.course import Course, CoursePrerequisite
+from app.schemas.course import CourseGraphEdge, CourseGraphNode, CourseGraphResponse
+
+Direction = Literal["ancestors", "descendants"]
+
+
+def _edges(code: str, prerequisites: Iterable[str]) -> List[Dict[str, str]]:
+    seen = set()
+    edges = []
+    for prereq in prerequisites or []:
+        prereq = prereq.strip().upper()
+        if prereq and prereq != code and prereq not in seen:
+            seen.add(prereq)
+            edges.append({"course_code": code, "prerequisite_code": prereq})
+    return edges
+
+
+class PrerequisiteGraphService:
+    """Edge-table maintenance and recursive prerequisite queries."""
+
+    async def sync(self, db: AsyncSession, courses: Iterable[Course]) -> None:
+        """Replace the stored edges of these courses with their current prerequisites."""
+        courses = list(courses)
+        if not courses:
+            return
+        codes = [c.code for c in courses]
+        await db.execute(delete(CoursePrerequisite).where(CoursePrerequisite.course_code.in_(codes)))
+
+        rows = [edge for c in courses for edge in _edges(c.code, c.prerequisites)]
+        if not rows:
+            return
+        if engine.dialect.name == "postgresql":
+            # Parameter count is capped at 32767 per statement
+            for start in range(0, len(rows), 10000):
+                await db.execute(pg_insert(CoursePrerequisite).values(rows[start:start + 10000]).on_conflict_do_nothing())
+        else:
+            await db.execute(CoursePrerequisite.__table__.insert(), rows)
+
+    async def remove(self, db: AsyncSession, code: str) -> None:
+        """Drop a deleted course's edges (explicitly, for databases without FK cascades)."""
+        await db.execute(delete(CoursePrerequisite).where(CoursePrerequisite.course_code == code))
+
+    async def walk(
+        self,
+        db: AsyncSession,
+        code: str,
+        direction: Direction,
+        max_depth: int = 10
+    ) -> CourseGraphResponse:
+        """
+        Ancestors or descendants of a course, up to max_depth hops.
+
+        The CTE recurses one level past max_depth only to find out whether
+        the limit cut anything off; those rows aren't returned.
+        """
+        edges = CoursePrerequisite
+        if direction == "ancestors":
+            near, far = edges.course_code, edges.prerequisite_code
+        else:
+            near, far = edges.prerequisite_code, edges.course_code
+
+        walk = (
+            select(edges.course_code, edges.prerequisite_code, far.label("reached"), literal(1).label("depth"))
+            .where(near == code)
+            .cte("walk", recursive=True)
+        )
+        walk = walk.union(
+            select(edges.course_code, edges.prerequisite_code, far, walk.c.depth + 1)
+            .join(walk, near == walk.c.reached)
+            .where(walk.c.depth <= max_depth)
+        )
+        result = await db.execute(
+            select(walk.c.course_code, walk.c.prerequisite_code, walk.c.reached, walk.c.depth, Course.name)
+            .outerjoin(Course, Course.code == walk.c.reached)
+        )
+
+        nodes: Dict[str, CourseGraphNode] = {}
+        found_edges = set()
+        depth_limited = False
+        for course_code, prerequisite_code, reached, depth, name in result.all():
+            if depth > max_depth:
+                depth_limited = True
+                continue
+            found_edges.add((course_code, prerequisite_code))
+            node = nodes.get(reached)
+            if node is None or depth < node.depth:
+                nodes[reached] = CourseGraphNode(code=reached, name=name, depth=depth)
+        nodes.pop(code, None)  # only reachable from itself through a cycle
+
+        return CourseGraphResponse(
+            code=code,
+            direction=direction,
+            max_depth=max_depth,
+            nodes=sorted(nodes.values(), key=lambda n: (n.depth, n.code)),
+            edges=[CourseGraphEdge(course=c, prerequisite=p) for c, p in sorted(found_edges)],
+            depth_limited=depth_limited,
+        )
+
+
+# Singleton instance
+prerequisite_graph_service = PrerequisiteGraphService()
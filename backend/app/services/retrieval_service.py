@@ -0,0 +1,191 @@
+"""
+Retrieval Service
+
+Relevant parts of a student's own material for AI prompts:
+- Uploaded documents (/api/revision/analyze-document) are split into
+  overlapping chunks of about retrieval_chunk_tokens, embedded with the
+  local Ollama embeddings endpoint and added to the vector index in the
+  background; a document is identified by a hash of its text, so uploading
+  it again embeds nothing
+- Explanations and practice questions for a document carry the top-k
+  chunks closest to the topic instead of the topic name alone or the
+  first 4000 characters of the notes
+- Long pasted notes (no stored document) are chunked and ranked on the fly
+- Index backends: "numpy" (memory-mapped files, see vector_index) or
+  "pgvector" (Postgres document_chunks table)
+
+When retrieval is unavailable (NumPy not installed, pgvector table
+missing, embedding model not pulled, Ollama down) callers get None and
+build their prompts as before.
+"""
+import asyncio
+import hashlib
+import math
+from typing import Dict, List, Optional, Union
+
+from app.config import get_settings
+from app.services.ollama_service import ollama_service
+from app.services.vector_index import NumpyVectorIndex, PgVectorIndex, np
+from app.utils.token_counter import chunk_text
+
+settings = get_settings()
+
+RETRIEVAL_BACKENDS = ("numpy", "pgvector")
+
+# Chunks per /api/embed call
+EMBED_BATCH = 32
+
+
+def document_id_for(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class RetrievalService:
+    """Chunks, embeds and searches uploaded study material."""
+
+    def __init__(self, backend: str = settings.retrieval_backend):
+        if backend not in RETRIEVAL_BACKENDS:
+            raise ValueError(f"Unknown retrieval backend '{backend}' (expected one of {', '.join(RETRIEVAL_BACKENDS)})")
+        self.backend = backend
+        self.index: Optional[Union[NumpyVectorIndex, PgVectorIndex]] = None
+        self._opened = False
+        self._open_lock = asyncio.Lock()
+        self._indexing: Dict[str, asyncio.Task] = {}
+        self.stats = {"documents_indexed": 0, "chunks_indexed": 0, "searches": 0, "embedding_failures": 0}
+
+    async def _get_index(self) -> Optional[Union[NumpyVectorIndex, PgVectorIndex]]:
+        """The vector index, opened on first use; None if the backend is unavailable."""
+        async with self._open_lock:
+            if self._opened:
+                return self.index
+            model = ollama_service.embedding_model
+            try:
+                if self.backend == "pgvector":
+                    if await PgVectorIndex.available():
+                        self.index = PgVectorIndex(model)
+                    else:
+                        print("Retrieval off: no document_chunks table (run alembic upgrade head on Postgres)")
+                elif np is None:
+                    print("Retrieval off: NumPy is not installed (pip install numpy)")
+                else:
+                    self.index = NumpyVectorIndex(settings.retrieval_index_dir, model)
+            except Exception as e:
+                print(f"Retrieval index could not be opened (retrying on next use): {e}")
+                return None
+            self._opened = True
+            return self.index
+
+    async def _embed(self, texts: List[str]) -> Optional[List[List[float]]]:
+        vectors = []
+        for start in range(0, len(texts), EMBED_BATCH):
+            batch = await ollama_service.embed(texts[start:start + EMBED_BATCH])
+            if batch is None:
+                self.stats["embedding_failures"] += 1
+                return None
+            vectors.extend(batch)
+        return vectors
+
+    def _chunks(self, text: str) -> List[str]:
+        return chunk_text(text, settings.retrieval_chunk_tokens, settings.retrieval_chunk_overlap_tokens)
+
+    # ============================================
+    # INDEXING
+    # ============================================
+
+    async def add_document(self, text: str, filename: str) -> Optional[str]:
+        """
+        Queue a document for indexing; its document_id, or None if retrieval is off.
+
+        Embedding runs in the background: searches for the document wait
+        for it to finish.
+        """
+        index = await self._get_index()
+        if index is None:
+            return None
+        document_id = document_id_for(text)
+        if document_id in self._indexing or await index.has(document_id):
+            return document_id
+        task = asyncio.create_task(self._index_document(index, document_id, text, filename))
+        self._indexing[document_id] = task
+        task.add_done_callback(lambda _: self._indexing.pop(document_id, None))
+        return document_id
+
+    async def _index_document(self, index, document_id: str, text: str, filename: str) -> bool:
+        chunks = self._chunks(text)
+        if not chunks:
+            return False
+        vectors = await self._embed(chunks)
+        if vectors is None:
+            print(f"Retrieval: could not embed '{filename}' ({len(chunks)} chunks); not indexed")
+            return False
+        try:
+            await index.add(document_id, filename, chunks, vectors)
+        except Exception as e:
+            print(f"Retrieval: indexing '{filename}' failed: {e}")
+            return False
+        self.stats["documents_indexed"] += 1
+        self.stats["chunks_indexed"] += len(chunks)
+        print(f"Retrieval: indexed '{filename}' as {document_id} ({len(chunks)} chunks)")
+        return True
+
+    async def has_document(self, document_id: str) -> bool:
+        """Whether the document is indexed (waits for indexing still in progress)."""
+        index = await self._get_index()
+        if index is None:
+            return False
+        pending = self._indexing.get(document_id)
+        if pending is not None:
+            await asyncio.shield(pending)
+        return await index.has(document_id)
+
+    # ============================================
+    # SEARCH
+    # ============================================
+
+    async def search(self, query: str, document_id: str, k: int = settings.retrieval_top_k) -> Optional[List[str]]:
+        """The k chunks of an indexed document closest to query (in document order), or None."""
+        index = await self._get_index()
+        if index is None:
+            return None
+        vectors = await self._embed([query])
+        if vectors is None:
+            return None
+        self.stats["searches"] += 1
+        try:
+            return await index.search(vectors[0], [document_id], k)
+        except Exception as e:
+            print(f"Retrieval: search failed: {e}")
+            return None
+
+    async def rank(self, query: str, text: str, k: int = settings.retrieval_top_k) -> Optional[List[str]]:
+        """The k chunks of text (not stored) closest to query, in text order, or None."""
+        chunks = self._chunks(text)
+        if len(chunks) <= k:
+            return chunks
+        vectors = await self._embed([query] + chunks)
+        if vectors is None:
+            return None
+        self.stats["searches"] += 1
+        scores = [_cosine(vectors[0], vector) for vector in vectors[1:]]
+        best = sorted(range(len(chunks)), key=lambda i: -scores[i])[:k]
+        return [chunks[i] for i in sorted(best)]
+
+    async def info(self) -> Dict:
+        index = await self._get_index()
+        info = {"backend": self.backend, "available": index is not None, "indexing": len(self._indexing), **self.stats}
+        if index is not None:
+            try:
+                info["index"] = await index.info()
+            except Exception as e:
+                info["index"] = {"error": str(e)}
+        return info
+
+
+# Singleton instance
+retrieval_service = RetrievalService()
@@ -0,0 +1,214 @@
+"""
+Structured (JSON) output helpers for OllamaService.
+
+- ollama_format: Ollama `format` JSON schema built from a Pydantic response model
+- JsonStreamParser: finds where the top-level JSON value ends in a token
+  stream, so generation can be stopped right there
+- repair_truncated_json: closes a value cut off by num_predict at the last
+  complete member, keeping everything generated so far
+- missing_keys: which required fields a (repaired) reply still lacks, so
+  a retry only has to ask for those
+"""
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+# Schema keywords that only document the model; the grammar doesn't need them
+_DROPPED_KEYWORDS = {"title", "description", "default", "examples"}
+
+
+def _simplify(node: Any, defs: Dict[str, Any], keep_null: bool = True) -> Any:
+    """Inline $refs and drop documentation keywords."""
+    if isinstance(node, list):
+        return [_simplify(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    if "$ref" in node:
+        return _simplify(defs[node["$ref"].split("/")[-1]], defs, keep_null)
+
+    if "anyOf" in node and not keep_null:
+        options = [option for option in node["anyOf"] if option.get("type") != "null"]
+        if len(options) == 1:
+            return _simplify(options[0], defs)
+
+    return {
+        key: _simplify(value, defs) if key != "properties" else {
+            name: _simplify(prop, defs) for name, prop in value.items()
+        }
+        for key, value in node.items()
+        if key not in _DROPPED_KEYWORDS and key != "$defs"
+    }
+
+
+@lru_cache(maxsize=64)
+def _cached_format(
+    model: Type[BaseModel],
+    fields: Optional[Tuple[str, ...]],
+    nullable: Tuple[str, ...]
+) -> str:
+    schema = model.model_json_schema()
+    defs = schema.get("$defs", {})
+    names = list(fields) if fields is not None else [
+        # readOnly fields are filled in by the server, not the LLM
+        name for name, prop in schema["properties"].items() if not prop.get("readOnly")
+    ]
+    properties = {
+        # Required fields must carry a value, unless the model may answer null
+        name: _simplify(schema["properties"][name], defs, keep_null=name in nullable)
+        for name in names
+    }
+    return json.dumps({"type": "object", "properties": properties, "required": names})
+
+
+def ollama_format(
+    model: Type[BaseModel],
+    fields: Optional[Sequence[str]] = None,
+    nullable: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """
+    JSON schema for Ollama's `format` option.
+
+    Every listed field (default: all of the model's fields but readOnly
+    ones) is required at the top level, so defaults in the response model
+    don't let the LLM skip them; nested models keep their own required lists.
+    """
+    key = tuple(fields) if fields is not None else None
+    return json.loads(_cached_format(model, key, tuple(nullable)))
+
+
+class JsonStreamParser:
+    """
+    Incremental scanner for the first top-level JSON object or array.
+
+    Text before the opening bracket (e.g. a ```json fence) is skipped;
+    complete becomes True as soon as the matching bracket arrives.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._length = 0
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+
+    def feed(self, chunk: str) -> bool:
+        """Consume more output; True once the top-level value has closed."""
+        if self.complete or not chunk:
+            return self.complete
+        offset = self._length
+        self._chunks.append(chunk)
+        self._length += len(chunk)
+
+        for i, ch in enumerate(chunk):
+            if self.start is None:
+                if ch in "{[":
+                    self.start = offset + i
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self.end = offset + i + 1
+                    return True
+        return False
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return "".join(self._chunks)
+
+    def value_text(self) -> Optional[str]:
+        """The JSON value (complete or partial), without surrounding text."""
+        if self.start is None:
+            return None
+        return self.text[self.start:self.end]
+
+
+def repair_truncated_json(text: str) -> Optional[Any]:
+    """
+    Parse a JSON value that may have been cut off mid-generation.
+
+    The text is cut back to the last point where every open container
+    held only complete members, then the open containers are closed.
+    A nested container cut off before its first complete member is
+    dropped rather than closed empty (the root value may come back empty).
+    """
+    if not text:
+        return None
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return None
+    text = text[start:]
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    stack: List[str] = []
+    safe_cut, safe_stack = 0, []
+    in_string = escape = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            if len(stack) == 1:
+                safe_cut, safe_stack = i + 1, list(stack)
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            safe_cut, safe_stack = i + 1, list(stack)
+            if not stack:
+                break
+        elif ch == ",":
+            # Everything before a comma is a complete member
+            safe_cut, safe_stack = i, list(stack)
+
+    if not safe_stack and safe_cut == len(text):
+        candidate = text
+    else:
+        candidate = text[:safe_cut].rstrip().rstrip(",") + "".join(reversed(safe_stack))
+    try:
+        return json.loads(candidate)
+    except json.JSONDecodeError:
+        return None
+
+
+def missing_keys(value: Any, fields: Sequence[str], nullable: Sequence[str] = ()) -> List[str]:
+    """Required fields that are absent (or null, unless nullable) in a parsed reply."""
+    if not isinstance(value, dict):
+        return list(fields)
+    return [
+        name for name in fields
+        if name not in value or (value[name] is None and name not in nullable)
+    ]
@@ -0,0 +1,128 @@
+"""
+Token Accounting Service
+
+Prompt vs completion token accounting for Ollama calls, per API route:
+- The route comes from the request being served (RouteContextMiddleware);
+  calls made outside a request are booked under their options profile
+- Ollama's prompt_eval_count / eval_count are used when the response
+  reports them (streams cut early don't), the token_counter estimate otherwise
+- System-prompt tokens saved against the full all-modes prompt are turned
+  into prompt-eval time with the prompt-eval rate Ollama actually reported
+"""
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+COUNTERS = (
+    "calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "system_tokens",
+    "system_tokens_saved",
+    "trimmed",  # Prompts cut to fit the profile's prompt budget
+    "measured_prompt_tokens",  # Prompt tokens Ollama reported timings for
+    "prompt_eval_ms",
+)
+
+_request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_scope", default=None)
+
+
+class RouteContextMiddleware:
+    """ASGI middleware exposing the current request to token accounting."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+
+def current_route(default: str) -> str:
+    """'METHOD /path/template' of the request being served, else default."""
+    scope = _request_scope.get()
+    if scope is None:
+        return default
+    # FastAPI stores the matched route in the scope once routing is done
+    path = getattr(scope.get("route"), "path_format", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+class TokenAccountingService:
+    """Per-route token counters for calls to Ollama."""
+
+    def __init__(self, assumed_prompt_eval_rate: float = settings.ollama_prompt_eval_tokens_per_sec):
+        self.assumed_prompt_eval_rate = assumed_prompt_eval_rate
+        self.routes: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    def record(
+        self,
+        task: str,
+        system_tokens: int,
+        baseline_system_tokens: int,
+        prompt_tokens: int,
+        completion_tokens: int,
+        prompt_eval_ms: Optional[float] = None,
+        trimmed: bool = False
+    ) -> None:
+        route = current_route(task)
+        saved = max(0, baseline_system_tokens - system_tokens)
+        stats = self.routes[route]
+        stats["calls"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        stats["system_tokens"] += system_tokens
+        stats["system_tokens_saved"] += saved
+        stats["trimmed"] += int(trimmed)
+        if prompt_eval_ms:
+            stats["measured_prompt_tokens"] += prompt_tokens
+            stats["prompt_eval_ms"] += prompt_eval_ms
+        print(
+            f"[tokens] {route}: prompt {prompt_tokens} (system {system_tokens}, {saved} saved), "
+            f"completion {completion_tokens}{' [prompt trimmed]' if trimmed else ''}"
+        )
+
+    def prompt_eval_rate(self) -> float:
+        """Prompt tokens per second, as measured by Ollama (assumed until it reports any)."""
+        tokens = sum(stats["measured_prompt_tokens"] for stats in self.routes.values())
+        ms = sum(stats["prompt_eval_ms"] for stats in self.routes.values())
+        if tokens and ms:
+            return tokens / ms * 1000
+        return self.assumed_prompt_eval_rate
+
+    def report(self) -> Dict[str, Any]:
+        """Per-route tokens and prompt-eval time saved by mode-specific system prompts."""
+        rate = self.prompt_eval_rate()
+        routes = {}
+        for route, stats in sorted(self.routes.items()):
+            calls = stats["calls"] or 1
+            saved_ms = stats["system_tokens_saved"] / rate * 1000
+            routes[route] = {
+                **{key: stats[key] for key in COUNTERS if key != "measured_prompt_tokens"},
+                "avg_prompt_tokens": round(stats["prompt_tokens"] / calls, 1),
+                "avg_completion_tokens": round(stats["completion_tokens"] / calls, 1),
+                "prompt_eval_ms_saved": round(saved_ms, 1),
+                "avg_prompt_eval_ms_saved": round(saved_ms / calls, 1),
+            }
+        return {
+            "prompt_eval_tokens_per_sec": round(rate, 1),
+            "rate_measured": any(stats["prompt_eval_ms"] for stats in self.routes.values()),
+            "routes": routes,
+        }
+
+    def reset(self) -> None:
+        self.routes.clear()
+
+
+# Singleton instance
+token_accounting_service = TokenAccountingService()
@@ -0,0 +1,108 @@
+"""
+User Cache Service
+
+Resolves the authenticated user without a users-table query on most requests:
+- Tokens issued by /api/auth carry the user id and provider (uid / provider
+  claims), which is all the routes need, so they resolve with no query
+- Older tokens (subject only) hit a short-TTL, size-bounded cache of User rows
+- invalidate() on provider/profile changes drops the cached row, and tokens
+  issued before the change fall back to the database until they expire
+
+The cache is per worker; other workers see a change within the TTL.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.user import User
+
+settings = get_settings()
+
+USER_COLUMNS = tuple(column.key for column in User.__table__.columns)
+
+
+class UserCacheService:
+    """TTL + LRU cache of User rows keyed by token subject (email)."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.user_cache_ttl_seconds,
+        max_size: int = settings.user_cache_size
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._users: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._changed: "OrderedDict[str, float]" = OrderedDict()  # email -> time of last invalidate()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, email: str) -> Optional[User]:
+        """A fresh copy of the cached user, or None if absent or expired."""
+        entry = self._users.get(email)
+        if entry is None:
+            return None
+        expires_at, values = entry
+        if expires_at < time.monotonic():
+            del self._users[email]
+            return None
+        self._users.move_to_end(email)
+        # A new transient instance per request, so nothing is shared between sessions
+        return User(**values)
+
+    def put(self, user: User) -> None:
+        if self.ttl_seconds <= 0 or self.max_size <= 0:
+            return
+        values = {key: getattr(user, key) for key in USER_COLUMNS}
+        self._users[user.email] = (time.monotonic() + self.ttl_seconds, values)
+        self._users.move_to_end(user.email)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+
+    def invalidate(self, email: str) -> None:
+        """Forget a user after their row (or profile) changed."""
+        self._users.pop(email, None)
+        self._changed[email] = time.time()
+        self._changed.move_to_end(email)
+        while len(self._changed) > self.max_size:
+            self._changed.popitem(last=False)
+
+    def clear(self) -> None:
+        self._users.clear()
+        self._changed.clear()
+
+    def _claims_current(self, email: str, claims: Dict[str, Any]) -> bool:
+        """Token has uid/provider claims issued after the user's last change."""
+        if claims.get("uid") is None or claims.get("provider") is None:
+            return False
+        changed_at = self._changed.get(email)
+        return changed_at is None or claims.get("iat", 0) > changed_at
+
+    async def resolve(self, db: AsyncSession, claims: Dict[str, Any]) -> Optional[User]:
+        """User for a decoded access token: cache, then token claims, then the database."""
+        email = claims.get("sub")
+        if not email:
+            return None
+
+        user = self.get(email)
+        if user is not None:
+            self.hits += 1
+            return user
+
+        if self._claims_current(email, claims):
+            self.hits += 1
+            return User(id=claims["uid"], email=email, provider=claims["provider"])
+
+        self.misses += 1
+        result = await db.execute(select(User).where(User.email == email))
+        user = result.scalars().first()
+        if user is not None:
+            self.put(user)
+        return user
+
+
+# Singleton instance
+user_cache_service = UserCacheService()
@@ -0,0 +1,229 @@
+"""
+Vector Indexes for Retrieval
+
+Stores embedded chunks of uploaded documents and ranks a document's chunks
+by cosine similarity to a query vector:
+- NumpyVectorIndex: unit-length float32 vectors appended to a
+  memory-mapped file, chunk texts to a JSON-lines file, and a small
+  meta.json whose row count commits each add; reopened on startup, so the
+  index survives restarts and only new documents are ever embedded.
+  Meant for a single API process (several processes appending would
+  interleave rows); use pgvector behind several workers
+- PgVectorIndex: the document_chunks table (Alembic revision 0005),
+  ranked with pgvector's <=> cosine distance in Postgres
+
+Both keep the embedding model with the vectors: vectors from another model
+are not comparable, so the NumPy index starts over when the model changes
+and the table keeps rows per model.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from sqlalchemy import text
+
+from app.database import engine
+
+try:
+    import numpy as np
+except ImportError:  # Optional: only the NumPy index needs it
+    np = None
+
+
+class NumpyVectorIndex:
+    """Append-only vector index in memory-mapped files."""
+
+    def __init__(self, directory: str, model: str):
+        if np is None:
+            raise RuntimeError("NumPy is not installed (pip install numpy)")
+        self.directory = Path(directory)
+        self.model = model
+        self.meta_path = self.directory / "meta.json"
+        self.vectors_path = self.directory / "vectors.f32"
+        self.chunks_path = self.directory / "chunks.jsonl"
+        self.dim = 0
+        self.rows = 0
+        self.vectors = None  # np.memmap of shape (rows, dim)
+        self.offsets: List[int] = []  # Row -> byte offset of its line in chunks.jsonl
+        self.documents: Dict[str, List[int]] = {}  # document_id -> rows
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        meta = json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {}
+        if meta and meta.get("model") != self.model:
+            print(f"Retrieval index was built with '{meta.get('model')}', not '{self.model}'; starting over")
+            meta = {}
+        self.dim = meta.get("dim", 0)
+        rows = meta.get("rows", 0)
+
+        self.offsets, self.documents = [], {}
+        end = 0
+        if rows and self.chunks_path.exists():
+            with open(self.chunks_path, "rb") as f:
+                for row in range(rows):
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    self.offsets.append(end)
+                    self.documents.setdefault(json.loads(line)["document_id"], []).append(row)
+                    end += len(line)
+        self.rows = len(self.offsets)
+        if self.rows != rows:
+            print(f"Retrieval index: {rows - self.rows} chunk(s) missing from {self.chunks_path}; dropped")
+
+        # Drop whatever an interrupted add wrote past the committed rows
+        for path, size in ((self.chunks_path, end), (self.vectors_path, self.rows * self.dim * 4)):
+            if path.exists() and path.stat().st_size != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+        if self.rows != rows or not meta:
+            self._write_meta()
+        self._map()
+
+    def _map(self) -> None:
+        self.vectors = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+            if self.rows else None
+        )
+
+    def _write_meta(self) -> None:
+        tmp = self.meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"model": self.model, "dim": self.dim, "rows": self.rows}))
+        os.replace(tmp, self.meta_path)
+
+    async def has(self, document_id: str) -> bool:
+        return document_id in self.documents
+
+    async def add(self, document_id: str, filename: str, chunks: List[str], vectors: List[List[float]]) -> None:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if self.dim and matrix.shape[1] != self.dim:
+            raise ValueError(f"Embedding size {matrix.shape[1]} does not match the index ({self.dim})")
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+        with open(self.vectors_path, "ab") as f:
+            f.write(matrix.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        offsets = []
+        with open(self.chunks_path, "ab") as f:
+            position = f.tell()
+            for index, chunk in enumerate(chunks):
+                line = (json.dumps({
+                    "document_id": document_id, "filename": filename, "chunk": index, "text": chunk
+                }) + "\n").encode("utf-8")
+                offsets.append(position)
+                f.write(line)
+                position += len(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        # meta.json's row count is what commits the add
+        first = self.rows
+        self.dim = matrix.shape[1]
+        self.rows += len(chunks)
+        self._write_meta()
+        self.offsets.extend(offsets)
+        self.documents[document_id] = list(range(first, self.rows))
+        self._map()
+
+    def _text(self, row: int) -> str:
+        with open(self.chunks_path, "rb") as f:
+            f.seek(self.offsets[row])
+            return json.loads(f.readline())["text"]
+
+    async def search(self, query: List[float], document_ids: Sequence[str], k: int) -> List[str]:
+        """Texts of the k chunks closest to query, in document order."""
+        rows = [row for document_id in document_ids for row in self.documents.get(document_id, [])]
+        if not rows:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        if q.shape[0] != self.dim:
+            raise ValueError(f"Query embedding size {q.shape[0]} does not match the index ({self.dim})")
+        q /= max(float(np.linalg.norm(q)), 1e-12)
+        scores = self.vectors[rows] @ q
+        best = np.argsort(-scores)[:k]
+        return [self._text(rows[i]) for i in sorted(best)]
+
+    async def info(self) -> Dict:
+        return {
+            "backend": "numpy",
+            "model": self.model,
+            "directory": str(self.directory),
+            "documents": len(self.documents),
+            "chunks": self.rows,
+            "dim": self.dim,
+            "bytes": self.rows * self.dim * 4,
+        }
+
+
+class PgVectorIndex:
+    """Vector index in the document_chunks table (pgvector)."""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    @staticmethod
+    async def available() -> bool:
+        """Whether Postgres has the document_chunks table (alembic upgrade head)."""
+        if engine.dialect.name != "postgresql":
+            return False
+        async with engine.connect() as conn:
+            return (await conn.execute(text("SELECT to_regclass('document_chunks')"))).scalar() is not None
+
+    @staticmethod
+    def _vector(values: Sequence[float]) -> str:
+        return "[" + ",".join(repr(float(v)) for v in values) + "]"
+
+    async def has(self, document_id: str) -> bool:
+        async with engine.connect() as conn:
+            found = await conn.execute(
+                text("SELECT 1 FROM document_chunks WHERE document_id = :document_id AND model = :model LIMIT 1"),
+                {"document_id": document_id, "model": self.model}
+            )
+            return found.scalar() is not None
+
+    async def add(self, document_id: str, filename: str, chunks: List[str], vectors: List[List[float]]) -> None:
+        async with engine.begin() as conn:
+            await conn.execute(
+                text("""
+                    INSERT INTO document_chunks (document_id, model, chunk_index, filename, content, embedding)
+                    VALUES (:document_id, :model, :chunk_index, :filename, :content, CAST(:embedding AS vector))
+                    ON CONFLICT (document_id, model, chunk_index) DO NOTHING
+                """),
+                [
+                    {
+                        "document_id": document_id,
+                        "model": self.model,
+                        "chunk_index": index,
+                        "filename": filename[:255],
+                        "content": chunk,
+                        "embedding": self._vector(vector),
+                    }
+                    for index, (chunk, vector) in enumerate(zip(chunks, vectors))
+                ]
+            )
+
+    async def search(self, query: List[float], document_ids: Sequence[str], k: int) -> List[str]:
+        """Texts of the k chunks closest to query, in document order."""
+        async with engine.connect() as conn:
+            rows = (await conn.execute(
+                text("""
+                    SELECT document_id, chunk_index, content FROM document_chunks
+                    WHERE document_id = ANY(:document_ids) AND model = :model
+                    ORDER BY embedding <=> CAST(:query AS vector)
+                    LIMIT :k
+                """),
+                {"document_ids": list(document_ids), "model": self.model, "query": self._vector(query), "k": k}
+            )).all()
+        order = {document_id: i for i, document_id in enumerate(document_ids)}
+        return [row.content for row in sorted(rows, key=lambda r: (order[r.document_id], r.chunk_index))]
+
+    async def info(self) -> Dict:
+        async with engine.connect() as conn:
+            counts = (await conn.execute(
+                text("SELECT count(DISTINCT document_id), count(*) FROM document_chunks WHERE model = :model"),
+                {"model": self.model}
+            )).one()
+        return {"backend": "pgvector", "model": self.model, "documents": counts[0], "chunks": counts[1]}
@@ -0,0 +1,229 @@
+"""
+Catalog Validation Utility.
+
+Single linear-time (O(courses + prerequisites)) validation pass shared by the
+degree planner and manual course entry:
+- Duplicate codes via Counter
+- Unknown prerequisite / completed / priority references via set lookups
+- Prerequisite cycles via Tarjan's strongly connected components
+  (Kahn's topological sort would otherwise silently drop cyclic courses)
+- Structured issue codes so clients don't have to parse messages
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Protocol, Sequence, Tuple
+
+from app.schemas.plan import ValidationIssue
+
+
+# Issue codes
+NO_COURSES = "NO_COURSES"
+DUPLICATE_CODE = "DUPLICATE_CODE"
+UNKNOWN_PREREQUISITE = "UNKNOWN_PREREQUISITE"
+UNKNOWN_COMPLETED = "UNKNOWN_COMPLETED"
+UNKNOWN_PRIORITY = "UNKNOWN_PRIORITY"
+PREREQUISITE_CYCLE = "PREREQUISITE_CYCLE"
+CAPACITY_EXCEEDED = "CAPACITY_EXCEEDED"
+INVALID_CREDITS = "INVALID_CREDITS"
+
+
+class CourseLike(Protocol):
+    """Anything with a code, credits and prerequisite list (CourseInput, ManualCourse)."""
+    code: str
+    credits: int
+    prerequisites: List[str]
+
+
+@dataclass
+class CatalogReport:
+    """All issues found in one validation pass."""
+    issues: List[ValidationIssue] = field(default_factory=list)
+
+    @property
+    def errors(self) -> List[str]:
+        return [i.message for i in self.issues if i.severity == "error"]
+
+    @property
+    def warnings(self) -> List[str]:
+        return [i.message for i in self.issues if i.severity == "warning"]
+
+    @property
+    def is_valid(self) -> bool:
+        return not any(i.severity == "error" for i in self.issues)
+
+    def add(self, code: str, severity: str, message: str, course: Optional[str] = None, related: Optional[List[str]] = None) -> None:
+        self.issues.append(ValidationIssue(
+            code=code,
+            severity=severity,
+            message=message,
+            course=course,
+            related=related or []
+        ))
+
+
+def validate_catalog(
+    courses: Sequence[CourseLike],
+    completed: Iterable[str] = (),
+    priority: Iterable[str] = (),
+    remaining_semesters: Optional[int] = None,
+    max_per_semester: Optional[int] = None,
+    duplicate_severity: str = "warning",
+    credit_range: Optional[Tuple[int, int]] = None,
+    known_issues: Optional[List[ValidationIssue]] = None
+) -> CatalogReport:
+    """
+    Validate a course catalog in one linear pass.
+
+    Prerequisites satisfied by `completed` are not reported as unknown, and
+    cycles are only searched among courses still to be taken.
+    Pass `credit_range` to flag credits outside [low, high].
+    Pass `known_issues` (from validating the catalog on its own) to skip the
+    catalog-level checks and only check the request-specific inputs.
+    """
+    report = CatalogReport()
+
+    if not courses:
+        report.add(NO_COURSES, "error", "No courses provided. Please upload your course data.")
+        return report
+
+    completed_codes = list(dict.fromkeys(completed))  # de-duplicated, order kept
+    completed_set = set(completed_codes)
+    valid_codes = {c.code for c in courses}
+
+    if known_issues is not None:
+        # Catalog-level checks already ran; drop prerequisites now covered by completed
+        report.issues.extend(
+            issue for issue in known_issues
+            if not (issue.code == UNKNOWN_PREREQUISITE and issue.related and issue.related[0] in completed_set)
+        )
+    else:
+        _check_catalog(report, courses, valid_codes, completed_set, duplicate_severity, credit_range)
+
+    # Completed / priority references
+    for code in completed_codes:
+        if code not in valid_codes:
+            report.add(UNKNOWN_COMPLETED, "warning", f"Completed course {code} not found in course catalog.", course=code)
+
+    for code in priority:
+        if code not in valid_codes:
+            report.add(UNKNOWN_PRIORITY, "warning", f"Priority course {code} not found in course catalog.", course=code)
+
+    # Feasibility
+    if remaining_semesters is not None and max_per_semester is not None:
+        remaining_courses = len(valid_codes - completed_set)
+        max_possible = remaining_semesters * max_per_semester
+        if remaining_courses > max_possible:
+            report.add(
+                CAPACITY_EXCEEDED, "warning",
+                f"⚠️ {remaining_courses} courses remaining but only {max_possible} slots available ({remaining_semesters} semesters × {max_per_semester} courses)."
+            )
+
+    return report
+
+
+def _check_catalog(
+    report: CatalogReport,
+    courses: Sequence[CourseLike],
+    valid_codes: set,
+    completed_set: set,
+    duplicate_severity: str,
+    credit_range: Optional[Tuple[int, int]]
+) -> None:
+    """Checks that depend only on the catalog (and which courses are done)."""
+    # Duplicates
+    for code, count in Counter(c.code for c in courses).items():
+        if count > 1:
+            report.add(DUPLICATE_CODE, duplicate_severity, f"Duplicate course code: {code} ({count} entries)", course=code)
+
+    # Prerequisite references and credits
+    for course in courses:
+        for prereq in course.prerequisites:
+            if prereq not in valid_codes and prereq not in completed_set:
+                report.add(
+                    UNKNOWN_PREREQUISITE, "warning",
+                    f"Course {course.code} has prerequisite {prereq} not found in catalog.",
+                    course=course.code, related=[prereq]
+                )
+        if credit_range and not credit_range[0] <= course.credits <= credit_range[1]:
+            report.add(
+                INVALID_CREDITS, "warning",
+                f"{course.code} has unusual credit value: {course.credits}",
+                course=course.code
+            )
+
+    # Cycles among courses still to be taken
+    for component in find_cycles(courses, completed_set):
+        report.add(
+            PREREQUISITE_CYCLE, "error",
+            f"Prerequisite cycle detected among {', '.join(component)}. These courses can never be scheduled.",
+            course=component[0], related=component
+        )
+
+
+def find_cycles(courses: Sequence[CourseLike], completed: Iterable[str] = ()) -> List[List[str]]:
+    """
+    Return every prerequisite cycle as a list of course codes.
+
+    Uses an iterative Tarjan SCC pass over pending courses (no recursion
+    limit on deep chains). Each strongly connected component with more
+    than one course, or a course listing itself, is a cycle.
+    """
+    done = set(completed)
+    prereqs = {}
+    for course in courses:
+        if course.code not in done:
+            prereqs[course.code] = course.prerequisites
+
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack: List[str] = []
+    cycles: List[List[str]] = []
+    counter = 0
+
+    for root in prereqs:
+        if root in index_of:
+            continue
+        # (node, iterator over its pending prerequisites)
+        work = [(root, iter(prereqs[root]))]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, edges = work[-1]
+            advanced = False
+            for nxt in edges:
+                if nxt not in prereqs:
+                    continue
+                if nxt not in index_of:
+                    index_of[nxt] = lowlink[nxt] = counter
+                    counter += 1
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(prereqs[nxt])))
+                    advanced = True
+                    break
+                if nxt in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[nxt])
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1 or node in prereqs[node]:
+                    cycles.append(component[::-1])
+
+    return cycles
@@ -3,16 +3,16 @@ Security utilities: Password hashing, JWT token management, and User Dependencie
 Uses argon2 instead of bcrypt to avoid common issues.
 """
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any, Annotated
+from typing import Optional, Union, Any, Annotated, Dict
 from jose import jwt, JWTError
 import hashlib
 import secrets
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models.user import User
+from app.services.user_cache_service import user_cache_service
 
 # ============================================
 # CONFIGURATION
@@ -48,26 +48,43 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 # ============================================
 # JWT TOKEN FUNCTIONS
 # ============================================
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
-    """Create a JWT access token."""
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    user: Optional[User] = None
+) -> str:
+    """
+    Create a JWT access token.
+    
+    With user, the token also carries its id and provider (uid / provider
+    claims) so requests can be authenticated without a users query.
+    """
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"sub": str(subject), "exp": expire}
+    to_encode = {"sub": str(subject), "exp": expire, "iat": now}
+    if user is not None:
+        to_encode.update(uid=user.id, provider=user.provider or "local")
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-def decode_access_token(token: str) -> Optional[str]:
-    """Decode a JWT access token and return the subject (email)."""
+def decode_access_token_claims(token: str) -> Optional[Dict[str, Any]]:
+    """Decode a JWT access token and return all of its claims."""
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload.get("sub")
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
         return None
 
+
+def decode_access_token(token: str) -> Optional[str]:
+    """Decode a JWT access token and return the subject (email)."""
+    payload = decode_access_token_claims(token)
+    return payload.get("sub") if payload else None
+
 # ============================================
 # DEPENDENCIES
 # ============================================
@@ -82,12 +99,12 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    email = decode_access_token(token)
-    if email is None:
+    claims = decode_access_token_claims(token)
+    if claims is None:
         raise credentials_exception
     
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalars().first()
+    # Cached row or token claims when possible, otherwise one users query
+    user = await user_cache_service.resolve(db, claims)
     
     if user is None:
         raise credentials_exception
@@ -106,12 +123,10 @@ async def get_current_user_optional(
         return None
         
     try:
-        email = decode_access_token(token)
-        if email is None:
+        claims = decode_access_token_claims(token)
+        if claims is None:
             return None
         
-        result = await db.execute(select(User).where(User.email == email))
-        user = result.scalars().first()
-        return user
+        return await user_cache_service.resolve(db, claims)
     except:
         return None
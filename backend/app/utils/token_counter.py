@@ -0,0 +1,127 @@
+"""
+Token Counter Utility.
+
+Tokenizer-compatible token estimate for prompts sent to Ollama, without
+shipping a tokenizer:
+- Text is split with the same pre-tokenization rules as the Llama 3
+  (tiktoken-style) tokenizer: contractions, letter runs with one leading
+  space or symbol, 1-3 digit groups, punctuation runs, whitespace
+- Each ASCII piece counts as one token, long (rare) words as one per
+  ~5 characters; non-ASCII text as one per ~3 UTF-8 bytes (repeated
+  characters such as box-drawing rules as one per 4)
+
+Ollama's own prompt_eval_count / eval_count take precedence whenever a
+response reports them; this estimate is for budgets before the call.
+"""
+import math
+import re
+from typing import List
+
+_PIECES = re.compile(
+    r"'(?:[sdmt]|ll|ve|re)"
+    r"|[^\r\n\w]?[^\W\d_]+"
+    r"|\d{1,3}"
+    r"| ?[^\s\w]+[\r\n]*"
+    r"|\s*[\r\n]+"
+    r"|\s+(?!\S)"
+    r"|\s+"
+    r"|.",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Longest word (with its leading space) that is usually a single token
+_WHOLE_WORD_CHARS = 9
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimated Llama 3 token count of text."""
+    if not text:
+        return 0
+    count = 0
+    for piece in _PIECES.findall(text):
+        if piece.isascii():
+            count += 1 if len(piece) <= _WHOLE_WORD_CHARS else math.ceil(len(piece) / 5)
+        elif len(set(piece.strip())) == 1:
+            count += math.ceil(len(piece) / 4)  # Runs like "────" merge into few tokens
+        else:
+            count += math.ceil(len(piece.encode("utf-8")) / 3)
+    return count
+
+
+def trim_to_tokens(text: str, max_tokens: int, marker: str = "\n[...]\n") -> str:
+    """
+    Cut the middle out of text so it fits max_tokens.
+
+    Prompts put the task first and the output instructions last, so both
+    ends are kept (60% head / 40% tail) and bulk input in the middle goes.
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    keep_chars = max(0, int(len(text) * max_tokens / tokens) - len(marker))
+    while True:
+        head = int(keep_chars * 0.6)
+        tail = keep_chars - head
+        trimmed = text[:head] + marker + (text[-tail:] if tail else "")
+        if keep_chars == 0 or estimate_tokens(trimmed) <= max_tokens:
+            return trimmed
+        keep_chars = int(keep_chars * 0.9)
+
+
+_PARAGRAPHS = re.compile(r"\n\s*\n")
+_SENTENCES = re.compile(r"(?<=[.!?])\s+")
+
+
+def _split_units(text: str, max_tokens: int) -> List[str]:
+    """Paragraphs of text, with those over max_tokens split by sentence, then by words."""
+    units = []
+    for paragraph in _PARAGRAPHS.split(text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) <= max_tokens:
+            units.append(paragraph)
+            continue
+        for sentence in _SENTENCES.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                units.append(sentence)
+                continue
+            words = []
+            for word in sentence.split(" "):
+                if words and estimate_tokens(" ".join(words + [word])) > max_tokens:
+                    units.append(" ".join(words))
+                    words = []
+                words.append(word)
+            if words:
+                units.append(" ".join(words))
+    return units
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> List[str]:
+    """
+    Split text into chunks of about max_tokens (for embedding).
+
+    Chunks break at paragraph, then sentence boundaries (words only for a
+    sentence over max_tokens). Each chunk starts with the last units of the
+    previous one, up to overlap_tokens, so a passage cut at a boundary is
+    still whole in one chunk.
+    """
+    chunks = []
+    current, current_tokens = [], 0
+    for unit in _split_units(text, max_tokens):
+        tokens = estimate_tokens(unit)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n".join(current))
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                size = estimate_tokens(previous)
+                if overlap_size + size > overlap_tokens or overlap_size + size + tokens > max_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += size
+            current, current_tokens = overlap, overlap_size
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
@@ -0,0 +1,109 @@
+"""
+Bulk course import benchmark.
+
+Compares the previous per-row import (SELECT + INSERT + refresh per course)
+with the chunked INSERT ... ON CONFLICT upsert and the COPY path, counting
+database round trips. Needs the PostgreSQL database from DATABASE_URL; every
+run is rolled back, so the courses table is left untouched.
+
+Run from backend/:
+    python -m benchmarks.course_import_benchmark [--courses 2000]
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event, select
+
+from app.database import AsyncSessionLocal, engine, init_db
+from app.models.course import Course
+from app.schemas.course import CourseCreate
+from app.services.course_import_service import course_import_service
+
+
+class RoundTrips:
+    """Counts statements sent through the engine."""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def synthetic_courses(size: int):
+    return [
+        CourseCreate(
+            code=f"BX{i:05d}",
+            name=f"Benchmark Course {i}",
+            credits=3,
+            prerequisites=[f"BX{i - 1:05d}"] if i % 4 else []
+        )
+        for i in range(size)
+    ]
+
+
+async def legacy_import(db, courses):
+    """The per-row loop bulk_import_courses used before the upsert service."""
+    created = []
+    for course_data in courses:
+        existing = await db.execute(select(Course).where(Course.code == course_data.code.upper()))
+        if existing.scalar_one_or_none():
+            continue
+        course = Course(
+            code=course_data.code.upper(),
+            name=course_data.name,
+            credits=course_data.credits,
+            prerequisites=course_data.prerequisites,
+            semester_offered=course_data.semester_offered,
+            difficulty_weight=course_data.difficulty_weight,
+            description=course_data.description,
+        )
+        db.add(course)
+        created.append(course)
+    await db.flush()
+    for course in created:
+        await db.refresh(course)
+
+
+async def upsert_values(db, courses):
+    await course_import_service.upsert_courses(db, courses, use_copy=False)
+
+
+async def upsert_copy(db, courses):
+    # COPY itself goes straight to asyncpg and is not counted by the listener (+1)
+    await course_import_service.upsert_courses(db, courses, use_copy=True)
+
+
+async def measure(label, fn, courses, counter):
+    async with AsyncSessionLocal() as db:
+        counter.count = 0
+        started = time.perf_counter()
+        await fn(db, courses)
+        elapsed = (time.perf_counter() - started) * 1000
+        trips = counter.count
+        await db.rollback()
+    print(f"  {label:<22} {trips:>6} statements {elapsed:10.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine.echo = False
+    await init_db()
+    counter = RoundTrips()
+    courses = synthetic_courses(args.courses)
+
+    print(f"Importing {args.courses} new courses (rolled back after each run):")
+    await measure("legacy per-row", legacy_import, courses, counter)
+    await measure("INSERT ON CONFLICT", upsert_values, courses, counter)
+    await measure("COPY + INSERT SELECT", upsert_copy, courses, counter)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
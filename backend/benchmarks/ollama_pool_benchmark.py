@@ -0,0 +1,237 @@
+"""
+Ollama backend pool benchmark.
+
+Starts several stub Ollama servers on localhost (one request at a time each,
+like a CPU box with OLLAMA_NUM_PARALLEL=1, at different speeds) and drives
+OllamaService through the pool:
+- routing: a steady stream of calls, more than one backend keeps up with,
+  on one backend vs the pool under least-outstanding and weighted routing
+  (wall time, p50/p95 latency, calls per backend)
+- model availability: a backend without the model gets no traffic
+- ejection: a backend answering 500 is ejected, then re-admitted
+- health checks: a stopped backend is marked down, and up once restarted
+- sticky sessions: every turn of a session lands on the same backend
+
+Each scenario prints its numbers and OK / FAIL; the exit code is non-zero
+if any check fails.
+
+Run from backend/:
+    python -m benchmarks.ollama_pool_benchmark [--calls 80] [--rate 25] [--base-port 11500]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.services.ollama_pool import OllamaPool
+from app.services.ollama_service import ollama_service
+
+MODEL = ollama_service.model
+
+# name -> (seconds per call, models served)
+BACKENDS = {
+    "fast-1": (0.05, [MODEL]),
+    "fast-2": (0.05, [MODEL]),
+    "slow": (0.15, [MODEL]),
+    "other-model": (0.05, ["mistral:7b"]),
+}
+
+
+class StubBackend:
+    """A stub Ollama server: /api/tags and a non-streaming /api/generate."""
+
+    def __init__(self, name: str, port: int, seconds: float, models):
+        self.name = name
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.seconds = seconds
+        self.models = models
+        self.failing = False
+        self.server = None
+        self.task = None
+
+    def app(self) -> FastAPI:
+        app = FastAPI()
+        slot = asyncio.Semaphore(1)
+
+        @app.get("/api/tags")
+        async def tags():
+            return {"models": [{"name": model} for model in self.models]}
+
+        @app.post("/api/generate")
+        async def generate():
+            if self.failing:
+                return JSONResponse({"error": "model runner crashed"}, status_code=500)
+            async with slot:
+                await asyncio.sleep(self.seconds)
+            return {"response": self.name, "done": True, "eval_count": 1}
+
+        return app
+
+    async def start(self) -> None:
+        config = uvicorn.Config(self.app(), host="127.0.0.1", port=self.port, log_level="error")
+        self.server = uvicorn.Server(config)
+        self.task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            await asyncio.sleep(0.01)
+
+    async def stop(self) -> None:
+        self.server.should_exit = True
+        await self.task
+
+
+FAILURES = []
+
+
+def check(ok: bool, label: str) -> None:
+    print(f"  {'OK  ' if ok else 'FAIL'} {label}")
+    if not ok:
+        FAILURES.append(label)
+
+
+async def call() -> tuple:
+    started = time.perf_counter()
+    result = await ollama_service._call_ollama("ping", system_instruction="", profile="brief")
+    return result, time.perf_counter() - started
+
+
+async def load(calls: int, rate: float = 0) -> dict:
+    """calls arriving at rate per second (0 = all at once)."""
+    started = time.perf_counter()
+    tasks = []
+    for _ in range(calls):
+        tasks.append(asyncio.create_task(call()))
+        if rate:
+            await asyncio.sleep(1 / rate)
+    results = await asyncio.gather(*tasks)
+    wall = time.perf_counter() - started
+    latencies = sorted(latency for _, latency in results)
+    spread = {}
+    for name, _ in results:
+        spread[name] = spread.get(name, 0) + 1
+    return {
+        "wall": wall,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "spread": spread,
+    }
+
+
+def use_pool(stubs, routing: str = "least_outstanding", weights=None, **kwargs) -> OllamaPool:
+    pool = OllamaPool([stub.url for stub in stubs], weights, routing=routing, **kwargs)
+    ollama_service.pool = pool
+    return pool
+
+
+async def scenario_routing(stubs, calls: int, rate: float) -> None:
+    print(f"\nRouting: {calls} calls arriving at {rate:g}/s")
+    print(f"  {'setup':<34} {'wall s':>7} {'p50 ms':>7} {'p95 ms':>7}  spread")
+    rows = [
+        ("single backend (fast-1)", [stubs["fast-1"]], "least_outstanding", None),
+        ("pool, least outstanding", list(stubs.values()), "least_outstanding", None),
+        ("pool, weighted 3:3:1", list(stubs.values()), "weighted",
+         {stubs["fast-1"].url: 3, stubs["fast-2"].url: 3, stubs["slow"].url: 1}),
+    ]
+    results = {}
+    for label, members, routing, weights in rows:
+        pool = use_pool(members, routing, weights)
+        await pool.check_health(ollama_service.check_connection)
+        stats = await load(calls, rate)
+        results[label] = stats
+        print(f"  {label:<34} {stats['wall']:>7.2f} {stats['p50'] * 1000:>7.0f} {stats['p95'] * 1000:>7.0f}  {stats['spread']}")
+    single, pooled = results["single backend (fast-1)"], results["pool, least outstanding"]
+    check(pooled["p95"] < single["p95"] * 0.5, "pool keeps p95 latency well below one backend")
+    check("other-model" not in pooled["spread"], "backend without the model gets no traffic")
+    check(pooled["spread"].get("slow", 0) < pooled["spread"].get("fast-1", 0),
+          "least outstanding sends less to the slow backend")
+
+
+async def scenario_ejection(stubs) -> None:
+    print("\nEjection and re-admission")
+    members = [stubs["fast-1"], stubs["fast-2"]]
+    pool = use_pool(members, eject_after=3, eject_seconds=1.0)
+    broken = stubs["fast-2"]
+    broken.failing = True
+    for _ in range(8):
+        await call()
+    backend = pool.backend(broken.url)
+    print(f"  {broken.name}: {backend.failures} failures, {backend.ejections} ejection(s)")
+    check(backend.ejections == 1, "failing backend ejected after 3 failures")
+    stats = await load(10)
+    check(stats["spread"] == {"fast-1": 10}, f"traffic avoids the ejected backend {stats['spread']}")
+    broken.failing = False
+    await asyncio.sleep(1.1)
+    stats = await load(10)
+    check(stats["spread"].get(broken.name, 0) > 0, f"re-admitted after the ejection period {stats['spread']}")
+
+
+async def scenario_health(stubs) -> None:
+    print("\nHealth checks")
+    members = [stubs["fast-1"], stubs["slow"]]
+    pool = use_pool(members)
+    down = stubs["slow"]
+    await down.stop()
+    await pool.check_health(ollama_service.check_connection)
+    check(not pool.backend(down.url).healthy, f"stopped backend {down.name} marked down")
+    stats = await load(6)
+    check(stats["spread"] == {"fast-1": 6}, f"no calls to the down backend {stats['spread']}")
+    await down.start()
+    await pool.check_health(ollama_service.check_connection)
+    check(pool.backend(down.url).healthy, f"{down.name} back up after restart")
+
+
+async def scenario_sticky(stubs) -> None:
+    print("\nSticky sessions")
+    pool = use_pool([stubs["fast-1"], stubs["fast-2"], stubs["slow"]])
+
+    async def session(key: str) -> set:
+        seen = set()
+        for _ in range(4):
+            with pool.sticky(key):
+                name, _ = await call()
+            seen.add(name)
+        return seen
+
+    sessions = await asyncio.gather(*(session(f"session-{i}") for i in range(6)))
+    used = set().union(*sessions)
+    print(f"  backends per session: {[sorted(s) for s in sessions]}")
+    check(all(len(s) == 1 for s in sessions), "every turn of a session on one backend")
+    check(len(used) > 1, "sessions spread over the backends")
+
+
+async def run(args) -> None:
+    stubs = {}
+    for i, (name, (seconds, models)) in enumerate(BACKENDS.items()):
+        stubs[name] = StubBackend(name, args.base_port + i, seconds, models)
+        await stubs[name].start()
+    original = ollama_service.pool
+    try:
+        await scenario_routing(stubs, args.calls, args.rate)
+        await scenario_ejection(stubs)
+        await scenario_health(stubs)
+        await scenario_sticky(stubs)
+    finally:
+        ollama_service.pool = original
+        for stub in stubs.values():
+            await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=80, help="Calls in the routing scenario")
+    parser.add_argument("--rate", type=float, default=25.0,
+                        help="Arrivals per second (above one fast backend, below the pool)")
+    parser.add_argument("--base-port", type=int, default=11500, help="First port for the stub servers")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+    print(f"\n{'All checks passed' if not FAILURES else f'{len(FAILURES)} check(s) failed'}")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+Ollama options profile benchmark.
+
+Streams a representative prompt per task profile (settings.ollama_profiles)
+and reports time to first token, latency and generation tokens/sec, next to
+the single global options block every call used before
+(num_ctx 8192 / num_predict 4096).
+
+Backends:
+- stub (default): simulated Ollama with model load, KV allocation per
+  num_ctx, prompt eval and generation rates; some replies ramble until
+  num_predict, which is where the per-task budgets pay off
+- --replay FILE: replays streams recorded from a real server, with their timing
+- --base-url URL: a real Ollama server (add --record FILE to save the streams)
+
+Run from backend/:
+    python -m benchmarks.ollama_profile_benchmark [--runs 5] [--speedup 20]
+    python -m benchmarks.ollama_profile_benchmark --base-url http://localhost:11434 --record ollama.jsonl
+    python -m benchmarks.ollama_profile_benchmark --replay ollama.jsonl
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+from app.services.ollama_service import SYSTEM_PROMPT, ollama_service
+
+LEGACY_OPTIONS = {"num_ctx": 8192, "num_predict": 4096, "temperature": 0.4}
+
+# profile -> (prompt, typical reply length in tokens)
+PROFILE_PROMPTS = {
+    "default": ("Analyze this 8-semester Computer Science plan for a Data Engineer career.", 1800),
+    "brief": ("Explain the impact of failing CS201 on CS301 and CS302 (1 semester delay).", 220),
+    "chat": ("USER MESSAGE: I skipped studying for three days and feel behind.", 160),
+    "study_plan": ("Weekly study plan for Math, Physics and Chemistry, 3 hours a day.", 900),
+    "revision": ("Revision strategy for Operating Systems, exam in 10 days, weak on scheduling.", 700),
+    "document": ("Analyze this document and extract topics.\n" + "Process scheduling. " * 200, 350),
+    "explain": ("Explain recursion simply for a student.", 300),
+    "questions": ("Generate 5 MEDIUM MCQ questions from these notes.\n" + "Paging and segmentation. " * 150, 1400),
+    "grading": ("Evaluate 10 short answers on deadlocks.", 900),
+    "grading_batch": ("Evaluate 8 submissions of 3 short answers each on deadlocks.", 1500),
+    "summary": ("Update the summary with these turns.\n" + "USER: I keep missing lectures.\nASSISTANT: Let's plan.\n" * 40, 200),
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# ==========================================
+# STUB / REPLAY BACKENDS
+# ==========================================
+
+class SimulatedClock:
+    """
+    Sleeps until a simulated timestamp, compressed by speedup.
+
+    Sleeping against the clock (not per step) keeps timer granularity from
+    adding up over thousands of tokens.
+    """
+
+    def __init__(self, speedup: float):
+        self.speedup = speedup
+        self.started = time.perf_counter()
+        self.elapsed_ms = 0.0
+
+    async def advance(self, ms: float):
+        self.elapsed_ms += ms
+        delay = self.started + self.elapsed_ms / 1000 / self.speedup - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class StubOllama:
+    """
+    Simulated /api/generate stream.
+
+    Rough llama3.1:8b Q4 figures on an 8 GB GPU: the model is loaded on
+    every call (keep_alive 0), the KV cache grows with num_ctx, and 1 in 5
+    replies keeps going until num_predict.
+    """
+
+    def __init__(self, speedup: float = 20.0, seed: int = 42):
+        self.speedup = speedup
+        self.seed = seed
+        self.load_ms = 1200.0
+        self.kv_ms_per_1k_ctx = 40.0
+        self.prompt_tokens_per_sec = 1500.0
+        self.eval_tokens_per_sec = 45.0
+        self.ramble_rate = 0.2
+
+    async def stream(self, payload):
+        options = payload.get("options", {})
+        prompt_tokens = estimate_tokens(payload.get("system", "") + payload["prompt"])
+        typical = payload.get("_typical_tokens", 500)
+        # Same reply for the same (profile, run) whatever the options
+        rng = random.Random(f"{self.seed}:{payload.get('_profile')}:{payload.get('_run')}")
+        if rng.random() < self.ramble_rate:
+            wanted = 10 ** 6
+        else:
+            wanted = int(typical * rng.uniform(0.8, 1.2))
+        count = min(wanted, options.get("num_predict", 4096))
+
+        prompt_ms = prompt_tokens / self.prompt_tokens_per_sec * 1000
+        token_ms = 1000 / self.eval_tokens_per_sec
+        clock = SimulatedClock(self.speedup)
+        await clock.advance(self.load_ms + self.kv_ms_per_1k_ctx * options.get("num_ctx", 2048) / 1024 + prompt_ms)
+        for _ in range(count):
+            await clock.advance(token_ms)
+            yield {"response": " tok", "done": False}
+        yield {
+            "response": "",
+            "done": True,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_ms * 1e6),
+            "eval_count": count,
+            "eval_duration": int(count * token_ms * 1e6),
+        }
+
+
+class ReplayOllama:
+    """Replays recorded streams (per profile, round robin) with their original timing."""
+
+    def __init__(self, path: str, speedup: float = 1.0):
+        self.speedup = speedup
+        self.records = defaultdict(list)
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                self.records[record["profile"]].append(record)
+        self.next_index = defaultdict(int)
+
+    async def stream(self, payload):
+        profile = payload["_profile"]
+        records = self.records.get(profile) or self.records.get("default")
+        if not records:
+            raise ValueError(f"No recorded stream for profile {profile}")
+        record = records[self.next_index[profile] % len(records)]
+        self.next_index[profile] += 1
+        limit = payload.get("options", {}).get("num_predict", 4096)
+        clock = SimulatedClock(self.speedup)
+        for n, (delay_ms, chunk) in enumerate(record["chunks"]):
+            await clock.advance(delay_ms)
+            if n >= limit:
+                break
+            yield {"response": chunk, "done": False}
+        yield {**record["done"], "eval_count": min(record["done"].get("eval_count", 0), limit)}
+
+
+def transport_for(backend):
+    """httpx transport serving /api/generate NDJSON streams from a simulated backend."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+
+        async def body():
+            async for message in backend.stream(payload):
+                yield (json.dumps(message) + "\n").encode()
+
+        return httpx.Response(200, content=body())
+
+    return httpx.MockTransport(handler)
+
+
+# ==========================================
+# MEASUREMENT
+# ==========================================
+
+async def run_once(client, base_url, profile, options, run=0, speedup=1.0, simulated=True, recorder=None):
+    """One streamed call; times are reported in backend (unscaled) milliseconds."""
+    prompt, typical = PROFILE_PROMPTS[profile]
+    payload = {
+        "model": ollama_service.model,
+        "prompt": prompt,
+        "system": SYSTEM_PROMPT,
+        "stream": True,
+        "keep_alive": 0,
+        "options": options,
+    }
+    if simulated:
+        payload.update({"_profile": profile, "_run": run, "_typical_tokens": typical})
+
+    started = time.perf_counter()
+    first_token = None
+    chunks, last, done = [], started, {}
+    async with client.stream("POST", f"{base_url}/api/generate", json=payload) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"Ollama API error: {response.status_code} {(await response.aread())[:200]!r}")
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            message = json.loads(line)
+            now = time.perf_counter()
+            if message.get("done"):
+                done = message
+                break
+            if first_token is None:
+                first_token = now
+            chunks.append([round((now - last) * 1000, 2), message.get("response", "")])
+            last = now
+    finished = time.perf_counter()
+
+    if recorder is not None:
+        recorder.write(json.dumps({"profile": profile, "chunks": chunks, "done": done}) + "\n")
+
+    tokens = done.get("eval_count") or len(chunks)
+    eval_seconds = done.get("eval_duration", 0) / 1e9 or (finished - (first_token or finished)) * speedup
+    return {
+        "latency_ms": (finished - started) * 1000 * speedup,
+        "ttft_ms": ((first_token or finished) - started) * 1000 * speedup,
+        "tokens": tokens,
+        "tokens_per_sec": tokens / eval_seconds if eval_seconds > 0 else 0.0,
+    }
+
+
+def summarize(label, results):
+    latencies = sorted(r["latency_ms"] for r in results)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"  {label:<22} ttft {statistics.median(r['ttft_ms'] for r in results):8.0f} ms"
+        f"  latency p50 {statistics.median(latencies):8.0f} ms  p95 {p95:8.0f} ms"
+        f"  {statistics.mean(r['tokens'] for r in results):7.0f} tok"
+        f"  {statistics.mean(r['tokens_per_sec'] for r in results):6.1f} tok/s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Calls per profile")
+    parser.add_argument("--profiles", nargs="*", default=None, help="Profiles to run (default: all)")
+    parser.add_argument("--speedup", type=float, default=20.0, help="Stub/replay time compression")
+    parser.add_argument("--base-url", default=None, help="Real Ollama server to benchmark")
+    parser.add_argument("--record", default=None, help="Save streams from --base-url to this JSONL file")
+    parser.add_argument("--replay", default=None, help="Replay streams recorded with --record")
+    args = parser.parse_args()
+
+    profiles = args.profiles or [name for name in PROFILE_PROMPTS if name in ollama_service.profiles]
+    simulated = not args.base_url
+    if simulated:
+        backend = ReplayOllama(args.replay, args.speedup) if args.replay else StubOllama(args.speedup)
+        client = httpx.AsyncClient(transport=transport_for(backend), timeout=600.0)
+        base_url = "http://stub"
+        speedup = args.speedup
+        print(f"Backend: {'replay of ' + args.replay if args.replay else 'stub'} (times scaled back by x{speedup:g})")
+    else:
+        client = httpx.AsyncClient(timeout=600.0)
+        base_url = args.base_url
+        speedup = 1.0
+        print(f"Backend: {base_url}")
+    recorder = open(args.record, "w") if args.record and not simulated else None
+    print(f"num_thread: {ollama_service.num_thread}, {args.runs} runs per profile")
+
+    try:
+        for profile in profiles:
+            options = ollama_service._options(profile)
+            print(f"{profile}: num_ctx {options['num_ctx']}, num_predict {options['num_predict']}, "
+                  f"temperature {options['temperature']}")
+            for label, opts in (("profile", options), ("legacy global options", {**options, **LEGACY_OPTIONS})):
+                results = [
+                    await run_once(
+                        client, base_url, profile, opts, run, speedup, simulated,
+                        recorder if label == "profile" else None
+                    )
+                    for run in range(args.runs)
+                ]
+                summarize(label, results)
+    finally:
+        await client.aclose()
+        if recorder:
+            recorder.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,158 @@
+"""
+Plan repair benchmark.
+
+Applies random deltas (completed, failed, added, replaced and removed
+courses, cap and semester changes) to plans for synthetic catalogs and
+checks that repair_plan returns exactly what generate_plan returns for the
+changed request:
+- for every delta, the semesters and unscheduled courses match
+- deltas that only touch later semesters keep the earlier ones and still
+  match a fresh generation
+
+Then times repair against a fresh generation.
+
+Run from backend/:
+    python -m benchmarks.plan_repair_benchmark [--courses 60] [--deltas 500]
+"""
+import argparse
+import random
+import sys
+import time
+
+from app.schemas.plan import CourseInput, PlanDelta, PlanGenerateRequest
+from app.services.planner_service import DegreePlannerService
+
+FAILURES = []
+
+
+def check(ok: bool, label: str) -> None:
+    print(f"  {'OK  ' if ok else 'FAIL'} {label}")
+    if not ok:
+        FAILURES.append(label)
+
+
+def build_request(size: int, rng: random.Random) -> PlanGenerateRequest:
+    """Random DAG catalog with short prerequisite chains and a few completed courses."""
+    courses = []
+    for i in range(size):
+        pool = range(max(0, i - 12), i)
+        prereqs = [f"C{j}" for j in rng.sample(pool, min(len(pool), rng.randint(0, 3)))]
+        courses.append(CourseInput(code=f"C{i}", name=f"Course {i}", credits=3, prerequisites=prereqs))
+    completed = [f"C{i}" for i in rng.sample(range(size // 4), size // 10)]
+    return PlanGenerateRequest(
+        courses=courses,
+        completed_courses=completed,
+        remaining_semesters=min(20, rng.randint(size // 6, size // 3)),
+        max_courses_per_semester=rng.randint(3, 5),
+        priority_courses=[f"C{i}" for i in rng.sample(range(size), 3)],
+    )
+
+
+def random_delta(request: PlanGenerateRequest, plan: dict, rng: random.Random) -> PlanDelta:
+    """One or two random changes, mostly aimed at courses the plan already placed."""
+    placed = [code for codes in plan.values() for code in codes]
+    codes = [c.code for c in request.courses]
+    changes = {}
+    for _ in range(rng.randint(1, 2)):
+        kind = rng.choice(["completed", "failed", "added", "replaced", "removed", "cap", "semesters"])
+        if kind == "completed" and placed:
+            changes.setdefault("completed_courses", []).append(rng.choice(placed))
+        elif kind == "failed" and request.completed_courses:
+            changes.setdefault("failed_courses", []).append(rng.choice(request.completed_courses))
+        elif kind == "added":
+            prereqs = rng.sample(codes, rng.randint(0, 2))
+            code = f"N{len(changes.get('added_courses', []))}"
+            changes.setdefault("added_courses", []).append(
+                CourseInput(code=code, name=f"New {code}", credits=3, prerequisites=prereqs)
+            )
+        elif kind == "replaced":
+            index = rng.randrange(len(codes))
+            prereqs = rng.sample(codes[max(0, index - 12):index], min(index, rng.randint(0, 3)))
+            changes.setdefault("added_courses", []).append(
+                CourseInput(code=codes[index], name=f"Course {index} v2", credits=4, prerequisites=prereqs)
+            )
+        elif kind == "removed":
+            changes.setdefault("removed_courses", []).append(rng.choice(codes))
+        elif kind == "cap":
+            changes["max_courses_per_semester"] = rng.randint(2, 6)
+        elif kind == "semesters":
+            changes["remaining_semesters"] = min(20, max(1, request.remaining_semesters + rng.randint(-3, 3)))
+    return PlanDelta(**changes)
+
+
+def changed_request(request: PlanGenerateRequest, delta: PlanDelta) -> PlanGenerateRequest:
+    """The request a fresh generation would be given after the delta."""
+    removed, failed = set(delta.removed_courses), set(delta.failed_courses)
+    replaced = {c.code for c in delta.added_courses}
+    courses = [c for c in request.courses if c.code not in removed and c.code not in replaced]
+    return request.model_copy(update={
+        "courses": courses + list(delta.added_courses),
+        "completed_courses": [
+            code for code in dict.fromkeys([*request.completed_courses, *delta.completed_courses])
+            if code not in failed and code not in removed
+        ],
+        "max_courses_per_semester": delta.max_courses_per_semester or request.max_courses_per_semester,
+        "remaining_semesters": delta.remaining_semesters or request.remaining_semesters,
+    })
+
+
+def scenario_random_deltas(size: int, count: int, seed: int) -> None:
+    print(f"\nRandom deltas ({count} deltas, {size}-course catalogs)")
+    rng = random.Random(seed)
+    service = DegreePlannerService()
+    mismatched, later_only, later_mismatched, reused = 0, 0, 0, 0
+    for _ in range(count):
+        request = build_request(size, rng)
+        previous = service.generate_plan(request).degree_plan
+        delta = random_delta(request, previous, rng)
+        repaired = service.repair_plan(request, previous, delta)
+        fresh = service.generate_plan(changed_request(request, delta))
+        same = (
+            repaired.plan.degree_plan == fresh.degree_plan
+            and repaired.plan.unscheduled_courses == fresh.unscheduled_courses
+        )
+        mismatched += not same
+        if repaired.diff.unchanged_semesters:
+            later_only += 1
+            later_mismatched += not same
+            reused += repaired.diff.unchanged_semesters
+    check(mismatched == 0, f"repair equals a fresh generation for every delta ({mismatched} of {count} differ)")
+    check(later_only > 0, f"{later_only} deltas only touched later semesters ({reused} semesters kept)")
+    check(later_mismatched == 0, f"those keep the earlier semesters and still match ({later_mismatched} differ)")
+
+
+def scenario_timing(size: int, repeat: int, seed: int) -> None:
+    print(f"\nRepair vs. generation ({size} courses, {repeat} repeats)")
+    rng = random.Random(seed)
+    service = DegreePlannerService()
+    request = build_request(size, rng)
+    previous = service.generate_plan(request).degree_plan
+    last = list(previous.values())[-1]
+    delta = PlanDelta(completed_courses=last[:1])
+    changed = changed_request(request, delta)
+    for label, run in (
+        ("generate_plan", lambda: service.generate_plan(changed)),
+        ("repair_plan (last semester)", lambda: service.repair_plan(request, previous, delta)),
+    ):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            run()
+        per_call = (time.perf_counter() - started) / repeat * 1000
+        print(f"  {label:<28} {per_call:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=60, help="Courses per synthetic catalog")
+    parser.add_argument("--deltas", type=int, default=500, help="Random deltas to check")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per timing")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    scenario_random_deltas(args.courses, args.deltas, args.seed)
+    scenario_timing(max(args.courses, 600), args.repeat, args.seed)
+    print(f"\n{'All checks passed' if not FAILURES else f'{len(FAILURES)} check(s) failed'}")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+System prompt size report.
+
+Per route, the system prompt tokens sent before (the full all-modes
+SYSTEM_PROMPT) and after the mode-specific prompts, and the prompt-eval time
+that saves per call at a given prompt-eval speed. Needs no Ollama server;
+GET /api/ai/token-report has the live numbers (with measured speed).
+
+Run from backend/:
+    python -m benchmarks.prompt_size_report [--tokens-per-sec 1500] [--calls-per-day 1000]
+"""
+import argparse
+
+from app.config import get_settings
+from app.services.ollama_service import PROMPT_MODES, SYSTEM_PROMPT, build_system_prompt
+from app.utils.token_counter import estimate_tokens
+
+# Route -> prompt mode of the OllamaService method it calls
+ROUTE_MODES = {
+    "POST /api/ai/analyze-plan": "career",
+    "POST /api/ai/career-advice": "career",
+    "POST /api/ai/burnout-risk": "what_if",
+    "POST /api/ai/simulate-failure": "what_if",
+    "POST /api/ai/study-plan": "study_copilot",
+    "POST /api/revision/analyze-document": "revision",
+    "POST /api/revision/explain-topic": "explain",
+    "POST /api/practice/generate": "exam_mapping",
+    "POST /api/practice/evaluate": "weakness",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens-per-sec", type=float, default=get_settings().ollama_prompt_eval_tokens_per_sec,
+                        help="Prompt-eval speed of the model/hardware")
+    parser.add_argument("--calls-per-day", type=int, default=1000, help="For the daily total column")
+    args = parser.parse_args()
+
+    full = estimate_tokens(SYSTEM_PROMPT)
+    print(f"Full SYSTEM_PROMPT: {full} tokens ({len(SYSTEM_PROMPT)} chars), "
+          f"prompt eval at {args.tokens_per_sec:g} tokens/s")
+    print(f"  {'route':<36} {'mode':<14} {'before':>7} {'after':>7} {'saved':>7} {'ms/call':>8} {'s/day':>7}")
+    for route, mode in ROUTE_MODES.items():
+        assert mode in PROMPT_MODES, mode
+        tokens = estimate_tokens(build_system_prompt(mode))
+        saved = full - tokens
+        ms = saved / args.tokens_per_sec * 1000
+        print(f"  {route:<36} {mode:<14} {full:>7} {tokens:>7} {saved:>7} {ms:>8.0f} "
+              f"{ms * args.calls_per_day / 1000:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
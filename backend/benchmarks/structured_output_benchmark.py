@@ -0,0 +1,120 @@
+"""
+Structured output repair benchmark.
+
+Checks repair_truncated_json on replies cut off at every point of a
+practice question set (the shape generate_practice_questions asks for):
+- every cut parses, and keeps only the questions that were complete
+  (a question cut off mid-way comes back partial or not at all, never
+  as an empty {} or [])
+- hand-picked truncations give the expected value
+
+Then times the repair of long truncated replies.
+
+Run from backend/:
+    python -m benchmarks.structured_output_benchmark [--questions 20] [--repeat 200]
+"""
+import argparse
+import json
+import sys
+import time
+
+from app.services.structured_output import repair_truncated_json
+
+FAILURES = []
+
+# (truncated reply, expected repair)
+CASES = [
+    ('[{"q":1},{"q":2', [{"q": 1}]),
+    ('{"b": [1, 2, {"c": "hel', {"b": [1, 2]}),
+    ('{"b": [1, 2, {"c": "hello"}', {"b": [1, 2, {"c": "hello"}]}),
+    ('{"a": 1, "b": {"c": [', {"a": 1}),
+    ('{"a": {"b": 1, "c": [1', {"a": {"b": 1}}),
+    ('{"questions": [', {}),
+    ('[[1, 2], [3', [[1, 2]]),
+    ('[', []),
+    ('```json\n{"a": "x", "b": "y', {"a": "x"}),
+    ('{"a": "he said \\"}\\"", "b', {"a": 'he said "}"'}),
+    ('{"a": 1}', {"a": 1}),
+    ('no json here', None),
+]
+
+
+def check(ok: bool, label: str) -> None:
+    print(f"  {'OK  ' if ok else 'FAIL'} {label}")
+    if not ok:
+        FAILURES.append(label)
+
+
+def question_set(count: int) -> str:
+    return json.dumps({"questions": [
+        {
+            "text": f"Question {i} about deadlocks?",
+            "options": ["A. Mutex", "B. Semaphore", "C. Monitor", "D. Spinlock"],
+            "correct_answer": "A",
+            "explanation": "Only a mutex gives mutual exclusion with ownership.",
+        }
+        for i in range(count)
+    ]})
+
+
+def has_empty_container(value) -> bool:
+    if isinstance(value, dict):
+        return any(v in ({}, []) or has_empty_container(v) for v in value.values())
+    if isinstance(value, list):
+        return any(v in ({}, []) or has_empty_container(v) for v in value)
+    return False
+
+
+def scenario_cases() -> None:
+    print("\nHand-picked truncations")
+    for text, expected in CASES:
+        got = repair_truncated_json(text)
+        check(got == expected, f"{text!r} -> {got!r}")
+
+
+def scenario_every_cut(count: int) -> None:
+    print(f"\nEvery cut of a {count}-question reply")
+    full = question_set(count)
+    complete = json.loads(full)["questions"]
+    unparsed, empty, wrong = 0, 0, 0
+    for cut in range(1, len(full)):
+        repaired = repair_truncated_json(full[:cut])
+        if not isinstance(repaired, dict):
+            unparsed += 1
+            continue
+        questions = repaired.get("questions", [])
+        if has_empty_container(repaired):
+            empty += 1
+        # Questions before the last must be exactly the complete ones
+        if any(q != complete[i] for i, q in enumerate(questions[:-1])):
+            wrong += 1
+    check(unparsed == 0, f"all {len(full) - 1} cuts parse to an object ({unparsed} did not)")
+    check(empty == 0, f"no cut leaves an empty nested container ({empty} did)")
+    check(wrong == 0, f"no cut changes a complete question ({wrong} did)")
+
+
+def scenario_timing(count: int, repeat: int) -> None:
+    print(f"\nRepair time ({count} questions, {repeat} repeats)")
+    full = question_set(count)
+    for label, text in (("complete", full), ("cut in the last question", full[:-40])):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            repair_truncated_json(text)
+        per_call = (time.perf_counter() - started) / repeat * 1000
+        print(f"  {label:<26} {len(text):>7} chars  {per_call:>7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--questions", type=int, default=20, help="Questions in the generated reply")
+    parser.add_argument("--repeat", type=int, default=200, help="Repairs per timing")
+    args = parser.parse_args()
+    scenario_cases()
+    scenario_every_cut(min(args.questions, 5))
+    scenario_timing(args.questions, args.repeat)
+    print(f"\n{'All checks passed' if not FAILURES else f'{len(FAILURES)} check(s) failed'}")
+    sys.exit(1 if FAILURES else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Catalog validation benchmark.
+
+Compares the shared linear-time validator against the previous quadratic
+checks on synthetic catalogs.
+
+Run from backend/:
+    python -m benchmarks.validation_benchmark [--courses 5000] [--repeat 3]
+"""
+import argparse
+import random
+import time
+
+from app.schemas.plan import CourseInput
+from app.utils.catalog_validation import validate_catalog
+
+
+def build_catalog(size: int, max_prereqs: int = 4, seed: int = 42):
+    """Random DAG catalog plus a completed list covering ~20% of it."""
+    rng = random.Random(seed)
+    courses = []
+    for i in range(size):
+        pool = range(max(0, i - 200), i)
+        prereqs = [f"C{j}" for j in rng.sample(pool, min(len(pool), rng.randint(0, max_prereqs)))]
+        courses.append(CourseInput(code=f"C{i}", name=f"Course {i}", credits=3, prerequisites=prereqs))
+    completed = [f"C{i}" for i in rng.sample(range(size), size // 5)]
+    priority = [f"C{i}" for i in rng.sample(range(size), 20)]
+    return courses, completed, priority
+
+
+def legacy_validate(courses, completed, priority, remaining_semesters, max_per_semester):
+    """The list-based checks the planner used before the shared validator."""
+    warnings = []
+    codes = [c.code for c in courses]
+    duplicates = [code for code in codes if codes.count(code) > 1]
+    if duplicates:
+        warnings.append(f"Duplicate course codes detected: {set(duplicates)}")
+    valid_codes = set(codes)
+    for course in courses:
+        for prereq in course.prerequisites:
+            if prereq not in valid_codes and prereq not in completed:
+                warnings.append(f"Course {course.code} has prerequisite {prereq} not found in catalog.")
+    for code in completed:
+        if code not in valid_codes:
+            warnings.append(f"Completed course {code} not found in course catalog.")
+    for code in priority:
+        if code not in valid_codes:
+            warnings.append(f"Priority course {code} not found in course catalog.")
+    remaining = len([c for c in courses if c.code not in completed])
+    if remaining > remaining_semesters * max_per_semester:
+        warnings.append("capacity")
+    return warnings
+
+
+def best_of(repeat: int, fn, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--courses", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for size in sorted({args.courses // 10, args.courses // 2, args.courses}):
+        courses, completed, priority = build_catalog(size)
+        edges = sum(len(c.prerequisites) for c in courses)
+
+        legacy_ms = best_of(args.repeat, legacy_validate, courses, completed, priority, 8, 6)
+        shared_ms = best_of(
+            args.repeat,
+            lambda: validate_catalog(courses, completed, priority, remaining_semesters=8, max_per_semester=6)
+        )
+
+        # Close a cycle among the newest pending courses and make sure it is caught
+        done = set(completed)
+        cyclic = list(courses)
+        tail = next(c for c in reversed(cyclic) if c.code not in done and set(c.prerequisites) - done)
+        head = next(c for c in cyclic if c.code in tail.prerequisites and c.code not in done)
+        cyclic[cyclic.index(head)] = head.model_copy(update={"prerequisites": head.prerequisites + [tail.code]})
+        report = validate_catalog(cyclic, completed)
+
+        print(f"{size:>6} courses / {edges:>6} edges: legacy {legacy_ms:9.1f} ms | shared {shared_ms:7.1f} ms "
+              f"| speedup {legacy_ms / shared_ms:6.1f}x | cycle detected: {'✅' if not report.is_valid else '❌'}")
+
+
+if __name__ == "__main__":
+    main()